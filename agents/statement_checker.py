@@ -1,24 +1,31 @@
 from dotenv import load_dotenv
 from langchain_core.runnables import RunnablePassthrough
+import os
 
 load_dotenv()
 
-from typing import Literal, Annotated, List, Sequence, Optional
+import asyncio
+import json
+import logging
+import uuid
+from typing import Literal, Annotated, List, Sequence, Optional, Union, AsyncIterator, Tuple
 from typing_extensions import TypedDict
 
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage, ToolMessage
 from langchain_core.output_parsers import PydanticToolsParser
-from langchain_openai import ChatOpenAI
+from chains.llms import get_chat_model
 from langchain_core.tools import tool
 from langchain_core.documents.base import Document
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableConfig
 from operator import itemgetter
+import operator
 
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt import InjectedState, ToolNode
 from langgraph.graph import StateGraph, START, END
+from langgraph.constants import Send
 from langgraph.pregel import RetryPolicy
 
 from pydantic import BaseModel, Field
@@ -29,7 +36,17 @@ from datetime import datetime
 from chains.wikipedia_chain import retriever as wiki_retriever
 from chains.arxiv_chain import retriever as arxiv_retriever
 from chains.tavily_chain import retriever as web_retriever
-from chains.adjudicator_chain import chain as judge_chain, Verdict
+from chains.adjudicator_chain import get_chain as get_judge_chain, Verdict
+from chains.cascade import node_model, can_escalate, judge_escalation_reason, cascade_stats
+from chains.review_policy import ADAPTIVE_REVIEW, SKIP_MIN_SOURCES, confident_reason, distinct_domains, skip_review_reason
+from chains.budget import BudgetTracker, budget_config, get_tracker
+from chains.evidence_pool import get_pool
+from chains.evidence_memory import memory
+from chains.evidence import Passage, QUERY_TOKENS, pack_evidence, select_passages, summarize_passages, format_evidence
+from chains.reranker import arerank
+from config import settings
+
+logger = logging.getLogger(__name__)
 
 
 # State
@@ -41,42 +58,104 @@ class GraphState(TypedDict):
     verdict: Optional[Verdict]
     improved: bool
     next: str
+    tier: int  # Position in each node's model cascade; raised when the check escalates
+    escalations: Annotated[List[dict], operator.add]
+    review_skipped: Optional[str]  # Why the verdict went out without review, if it did
+    follow_up: Optional[dict]  # Search the reviewer asked for, run before judging again
+    hops: int  # Supervisor turns so far
+    budget_limited: Optional[str]  # The budget that ran out, if research was cut short
+    speculative_verdict: Optional[Verdict]  # Judged alongside the supervisor's turn, on the same research
 
 
 # Tools
+# Searches return a compact summary for the supervisor as the ToolMessage content, and the packed
+# passages as its artifact for the judge. Passages are reranked against the statement being checked,
+# and those it finds irrelevant dropped (chains/reranker.py). PACK_EVIDENCE=0 returns raw documents as before.
+PACK_EVIDENCE = settings.PACK_EVIDENCE
+# Once the next step is likely to be judging, the judge runs alongside the supervisor's turn
+# (SPECULATIVE_JUDGING=0 to disable). Its verdict is used if the supervisor judges, or if it is confident
+# enough to make more research moot; the supervisor's research is otherwise let go ahead, after waiting up
+# to SPECULATIVE_GRACE_SECONDS.
+SPECULATIVE_JUDGING = settings.SPECULATIVE_JUDGING
+SPECULATIVE_GRACE_SECONDS = settings.SPECULATIVE_GRACE_SECONDS
+
+
+async def _search(retriever, prefix: str, query: str, statement: str,
+                  config: RunnableConfig) -> Tuple[str, Optional[List[Passage]]]:
+    # Checks of an article's statements share an evidence pool: look there before searching
+    pool = get_pool(config) if PACK_EVIDENCE else None
+    if pool:
+        passages = pool.search(prefix, query)
+        if passages:
+            pool.pool_hits += 1
+            passages = await arerank(statement, query, passages)
+            return summarize_passages(passages), passages
+
+    # Then in evidence memory, everything retrieved by earlier checks that is still fresh
+    if memory and PACK_EVIDENCE:
+        passages = await memory.search(prefix, query)
+        if passages:
+            if pool:
+                pool.memory_hits += 1
+            passages = await arerank(statement, query, passages)
+            return summarize_passages(passages), passages
+
+    docs = await retriever.ainvoke(query)
+    if memory:
+        memory.remember(prefix, query, docs)
+    if pool:
+        pool.external_calls += 1
+        pool.add(prefix, query, docs)
+    if not PACK_EVIDENCE:
+        return json.dumps([doc.dict() for doc in docs], ensure_ascii=False, default=str), None
+    # Rerank every passage before applying the budget, so irrelevant ones don't take up room
+    passages = await arerank(statement, query, pack_evidence(query, docs, prefix, budget=10 ** 9))
+    passages = select_passages(passages, QUERY_TOKENS)
+    return summarize_passages(passages), passages
+
+
 ## Wikipedia
-@tool('search_wikipedia')
-def search_wikipedia(query: str) -> List[dict]:
+@tool('search_wikipedia', response_format='content_and_artifact')
+async def search_wikipedia(query: str, statement: Annotated[str, InjectedState('statement')],
+                           config: RunnableConfig) -> Tuple[str, Optional[List[Passage]]]:
     """Search Wikipedia. Useful for when you need well-established information."""
-    docs = wiki_retriever.invoke(query)
-    return [doc.dict() for doc in docs]
+    return await _search(wiki_retriever, 'wiki', query, statement, config)
 
 
 search_wikipedia_node = ToolNode([search_wikipedia])
 
 
 ## Arxiv
-@tool("search_arxiv")
-def search_arxiv(query: str) -> List[dict]:
+@tool("search_arxiv", response_format='content_and_artifact')
+async def search_arxiv(query: str, statement: Annotated[str, InjectedState('statement')],
+                       config: RunnableConfig) -> Tuple[str, Optional[List[Passage]]]:
     """Search Arxiv. Useful for when you need scholarly technical papers."""
-    docs = arxiv_retriever.invoke(query)
-    return [doc.dict() for doc in docs]
+    return await _search(arxiv_retriever, 'arxiv', query, statement, config)
 
 
 search_arxiv_node = ToolNode([search_arxiv])
 
 
 ## Web
-@tool("search_web")
-def search_web(query: str) -> List[dict]:
+@tool("search_web", response_format='content_and_artifact')
+async def search_web(query: str, statement: Annotated[str, InjectedState('statement')],
+                     config: RunnableConfig) -> Tuple[str, Optional[List[Passage]]]:
     """Search the Web. Useful for when you need recent information or anything that wouldn't be found in Wikipedia or Scholarly journals."""
-    docs = web_retriever.invoke(query)
-    return [doc.dict() for doc in docs]
+    return await _search(web_retriever, 'web', query, statement, config)
 
 
 search_web_node = ToolNode([search_web])
 
 
+# Search tool name -> graph node, used to fan research calls out in parallel
+SEARCH_NODES = {
+    'search_wikipedia': 'wikipedia',
+    'search_arxiv': 'arxiv',
+    'search_web': 'web'
+}
+SEARCH_TOOLS = {t.name: t for t in [search_wikipedia, search_arxiv, search_web]}
+
+
 ## Judge as Tool
 class JudgeStatement(BaseModel):
     """Render a Verdict on the Statement given the available research. 
@@ -84,19 +163,46 @@ class JudgeStatement(BaseModel):
     statement: str = Field(description="the statement to be Judged.")
 
 
-def judge(state: GraphState) -> GraphState:
+def judge_inputs(statement: str, research: List[ToolMessage]) -> dict:
+    if PACK_EVIDENCE:
+        passages = [p for msg in research if msg.artifact for p in msg.artifact]
+        comments = [f"Reviewer: {msg.content}" for msg in research if msg.name == 'review']
+        research = '\n\n'.join([format_evidence(statement, passages), *comments])
+    return {'statement': statement, 'research': research}
+
+
+async def judge(state: GraphState, config: RunnableConfig) -> GraphState:
     """Render a Verdict on the Statement given the available research. Useful when you probably have enough information about the Statement."""
-    statement = state['statement']
-    research = state['research']
-    verdict = judge_chain.invoke({
-        'statement': statement,
-        'research': research
-    })
-    return {'verdict': verdict}
+    inputs = judge_inputs(state['statement'], state['research'])
+
+    tier = state.get('tier', 0)
+    model = node_model('judge', tier)
+    verdict = state.get('speculative_verdict')
+    if verdict is None:
+        cascade_stats.record_call('judge', model)
+        verdict = await get_judge_chain(model).ainvoke(inputs)
+
+    tracker = get_tracker(config)
+    limited = state.get('budget_limited') or (tracker.exhausted() if tracker else None)
+
+    # A shaky first-pass verdict is judged again on the stronger model, budget permitting
+    escalations = []
+    reason = judge_escalation_reason(verdict)
+    if reason and can_escalate('judge', tier) and not limited:
+        tier += 1
+        stronger = node_model('judge', tier)
+        escalations.append(cascade_stats.record_escalation('judge', model, stronger, reason))
+        cascade_stats.record_call('judge', stronger)
+        verdict = await get_judge_chain(stronger).ainvoke(inputs)
+
+    verdict.budget_limited = limited
+    skipped = f"budget exhausted ({limited})" if limited else skip_review_reason(verdict, state.get('improved', False))
+    return {'verdict': verdict, 'tier': tier, 'escalations': escalations, 'speculative_verdict': None,
+            'next': 'FINISH' if skipped else 'review', 'review_skipped': skipped, 'budget_limited': limited}
 
 
 # Reviewer Agent (returns message as ToolMessage)
-def review(state: GraphState) -> GraphState:
+async def review(state: GraphState) -> GraphState:
     """Render a Verdict on the Statement given the available research. Useful when you probably have enough information about the Statement."""
 
     statement = state['statement']
@@ -128,13 +234,23 @@ Does this Verdict need improvement or is it finished and ready to publish?
         comments: Annotated[
             str,
             "If recommending to Improve, then why?  What does fact-check team need to do to make this better?"]
+        search: Annotated[
+            Optional[Literal["search_wikipedia", "search_arxiv", "search_web"]],
+            Field(description="If recommending to Improve, the one search that would best fill the gap.")] = None
+        query: Annotated[
+            Optional[str],
+            Field(description="If recommending to Improve, the query for that search.")] = None
 
     tools = [ReviewFeedback]
 
-    llm = ChatOpenAI(model="gpt-4o", streaming=True).bind_tools(tools)
+    tier = state.get('tier', 0)
+    model = node_model('review', tier)
+    cascade_stats.record_call('review', model)
+    llm = get_chat_model(model, streaming=True).bind_tools(tools)
     chain = prompt | llm
 
-    message = chain.invoke({'statement': statement, 'verdict': verdict})
+    message = await chain.ainvoke({'statement': statement, 'verdict': verdict})
+    feedback = message.tool_calls[0]['args']
     review_message = ToolMessage(
         content=message.tool_calls[0]['args']['comments'],
         tool_call_id=state['messages'][-1].tool_calls[0]['id'],
@@ -145,13 +261,58 @@ Does this Verdict need improvement or is it finished and ready to publish?
             'args']['next']
     except:
         next = message.tool_calls[0]['args']['next']
-    return {'messages': [review_message], 'next': next, 'improved': True}
 
+    # A rejected draft means the cheap models weren't enough: the rest of the check runs a tier up
+    escalations = []
+    if next == 'Improve' and (can_escalate('supervisor', tier) or can_escalate('judge', tier)):
+        escalations.append(cascade_stats.record_escalation(
+            'check', node_model('judge', tier), node_model('judge', tier + 1), 'review rejected'))
+        tier += 1
+
+    # Targeted improvement: run the one search the reviewer asked for and judge again,
+    # rather than sending the whole check back through the supervisor
+    follow_up = None
+    if next == 'Improve' and ADAPTIVE_REVIEW and feedback.get('search') in SEARCH_TOOLS and feedback.get('query'):
+        follow_up = {'name': feedback['search'], 'args': {'query': feedback['query']}}
+    return {'messages': [review_message], 'next': next, 'improved': True, 'tier': tier,
+            'escalations': escalations, 'follow_up': follow_up}
+
+
+async def follow_up_research(state: GraphState) -> GraphState:
+    """Run the search requested in review and add it to the research for the next judgement."""
+    call = {**state['follow_up'], 'id': f"call_{uuid.uuid4().hex[:12]}", 'type': 'tool_call'}
+    # Called directly rather than through a ToolNode, so the statement isn't injected for us
+    result = await SEARCH_TOOLS[call['name']].ainvoke({**call, 'args': {**call['args'], 'statement': state['statement']}})
+    request = AIMessage(content='', tool_calls=[call])
+    research = [msg for msg in state['messages'] if isinstance(msg, ToolMessage)] + [result]
+    return {'messages': [request, result], 'research': research, 'follow_up': None}
+
+
+def route_review(state: GraphState) -> str:
+    if state['next'] == 'FINISH':
+        return 'FINISH'
+    return 'targeted_research' if state.get('follow_up') else 'Improve'
+
+
+async def supervisor_agent(state: GraphState, config: RunnableConfig) -> GraphState:
+    research = [
+        msg for msg in state['messages'] if isinstance(msg, ToolMessage)
+    ]
 
-def supervisor_agent(state: GraphState) -> GraphState:
+    # Out of budget: judge on the research gathered so far rather than researching further
+    tracker = get_tracker(config)
+    hops = state.get('hops', 0)
+    exhausted = tracker.exhausted(hops) if tracker else None
+    if exhausted:
+        logger.info(f"Budget exhausted after {exhausted}, judging now")
+        call = {'name': 'JudgeStatement', 'args': {'statement': state['statement']}, 'id': f"call_{uuid.uuid4().hex[:12]}"}
+        return {'messages': [AIMessage(content='', tool_calls=[call])], 'research': research,
+                'next': 'JudgeStatement', 'budget_limited': exhausted, 'speculative_verdict': None}
 
     def next_action(message: AIMessage) -> str:
-        if message.tool_calls:
+        if any(call['name'] in SEARCH_NODES for call in message.tool_calls):
+            return 'research'
+        elif message.tool_calls:
             return message.tool_calls[0]['name']
         else:
             print('Error')
@@ -174,9 +335,11 @@ def supervisor_agent(state: GraphState) -> GraphState:
     """
 
     closing_prompt = """
-    Given the work done so far, which one of your available tool actions do you want to 
-    take next - more research or make a judgement? You must chose one of your available tools.
-    You never respond directly, you only respond with a tool call.
+    Given the work done so far, which of your available tool actions do you want to 
+    take next - more research or make a judgement? You must chose from your available tools.
+    If the Statement needs more than one kind of source, call all of the research tools you need
+    at once - they run in parallel. Only make a judgement once the research you need is in.
+    You never respond directly, you only respond with tool calls.
     """
 
     prompt = ChatPromptTemplate.from_messages([
@@ -185,14 +348,106 @@ def supervisor_agent(state: GraphState) -> GraphState:
         SystemMessage(closing_prompt)
     ])
 
-    llm = ChatOpenAI(model="gpt-4o", streaming=True).bind_tools(tools)
-    supervisor_chain = prompt | llm
-    message = supervisor_chain.invoke(state)
-    research = [
-        msg for msg in state['messages'] if isinstance(msg, ToolMessage)
-    ]
+    async def route(model: str) -> AIMessage:
+        cascade_stats.record_call('supervisor', model)
+        llm = get_chat_model(model, streaming=True).bind_tools(tools)
+        supervisor_chain = prompt | llm
+        return await supervisor_chain.ainvoke(state)
+
+    tier = state.get('tier', 0)
+    model = node_model('supervisor', tier)
+
+    speculation = None
+    if SPECULATIVE_JUDGING and not state.get('improved') and _speculation_reason(research, tracker, hops):
+        judge_model = node_model('judge', tier)
+        cascade_stats.record_call('judge', judge_model)
+        speculation = asyncio.create_task(
+            get_judge_chain(judge_model).ainvoke(judge_inputs(state['statement'], research)))
+
+    try:
+        message = await route(model)
+
+        # No usable tool call from the cheap model: ask the stronger one rather than loop
+        escalations = []
+        if not any(call['name'] in {'JudgeStatement', *SEARCH_NODES} for call in message.tool_calls) \
+                and can_escalate('supervisor', tier):
+            tier += 1
+            stronger = node_model('supervisor', tier)
+            escalations.append(cascade_stats.record_escalation('supervisor', model, stronger, 'no usable tool call'))
+            message = await route(stronger)
+    except BaseException:
+        if speculation:
+            speculation.cancel()
+            if tracker:
+                tracker.record_speculation(used=False)
+        raise
+
+    # Every tool call must be answered before the next turn, so drop calls we won't dispatch:
+    # unknown tools, and a JudgeStatement issued alongside research (judge once results are in).
+    tool_names = {'JudgeStatement', *SEARCH_NODES}
+    tool_calls = [call for call in message.tool_calls if call['name'] in tool_names]
+    if any(call['name'] in SEARCH_NODES for call in tool_calls):
+        tool_calls = [call for call in tool_calls if call['name'] in SEARCH_NODES]
+    if len(tool_calls) != len(message.tool_calls):
+        message.tool_calls = tool_calls
+        message.additional_kwargs.pop('tool_calls', None)
+
+    speculative_verdict = None
+    if speculation:
+        judging = any(call['name'] == 'JudgeStatement' for call in tool_calls)
+        speculative_verdict = await _speculation_result(speculation, None if judging else SPECULATIVE_GRACE_SECONDS)
+        confident = speculative_verdict and confident_reason(speculative_verdict)
+        if not judging and confident:
+            logger.info(f"Speculative verdict has {confident}, judging instead of researching further")
+            message.tool_calls = [{'name': 'JudgeStatement', 'args': {'statement': state['statement']},
+                                   'id': f"call_{uuid.uuid4().hex[:12]}"}]
+            message.additional_kwargs.pop('tool_calls', None)
+        elif not judging:
+            speculative_verdict = None
+        if tracker:
+            tracker.record_speculation(used=speculative_verdict is not None)
+
     next = next_action(message)
-    return {'messages': [message], 'research': research, 'next': next}
+    return {'messages': [message], 'research': research, 'next': next, 'tier': tier,
+            'escalations': escalations, 'hops': hops + 1, 'speculative_verdict': speculative_verdict}
+
+
+def _speculation_reason(research: List[ToolMessage], tracker: Optional[BudgetTracker], hops: int) -> Optional[str]:
+    """Why the next step is likely to be judging, making a judgement worth starting alongside the supervisor's turn."""
+    if not any(msg.name in SEARCH_NODES for msg in research):
+        return None
+    low = tracker.running_low(hops) if tracker else None
+    if low:
+        return f"budget running low ({low})"
+    # Until the research spans independent sources the supervisor keeps searching, and a speculative
+    # verdict couldn't end the research early anyway (review_policy.confident_reason)
+    sources = distinct_domains(p['source'] for msg in research if msg.artifact for p in msg.artifact)
+    if sources >= SKIP_MIN_SOURCES:
+        return f"research from {sources} independent sources"
+    return None
+
+
+async def _speculation_result(task: asyncio.Task, timeout: Optional[float]) -> Optional[Verdict]:
+    """The speculative verdict, or None if it failed or isn't in within `timeout` (it is then cancelled)."""
+    try:
+        return await asyncio.wait_for(task, timeout)
+    except asyncio.TimeoutError:
+        return None
+    except Exception as e:
+        logger.exception(f"Speculative judgement failed: {e}")
+        return None
+
+
+def route_supervisor(state: GraphState) -> Union[str, List[Send]]:
+    """Dispatch every research tool call to its search node concurrently, or move on to judgement."""
+    if state['next'] != 'research':
+        return state['next']
+    message = state['messages'][-1]
+    return [
+        Send(SEARCH_NODES[call['name']], {'messages': [AIMessage(content='', tool_calls=[call])],
+                                          'statement': state['statement']})
+        for call in message.tool_calls
+    ]
 
 
 # The Graph
@@ -208,28 +463,39 @@ graph.add_node('arxiv', search_arxiv_node, retry=RetryPolicy(max_attempts=2))
 graph.add_node('web', search_web_node, retry=RetryPolicy(max_attempts=2))
 graph.add_node('judgement', judge, retry=RetryPolicy(max_attempts=2))
 graph.add_node('review', review, retry=RetryPolicy(max_attempts=2))
+graph.add_node('targeted_research', follow_up_research, retry=RetryPolicy(max_attempts=2))
 
 graph.add_edge(START, 'supervisor')
 graph.add_conditional_edges(
-    'supervisor', lambda x: x['next'], {
-        'search_wikipedia': 'wikipedia',
-        'search_arxiv': 'arxiv',
-        'search_web': 'web',
-        'JudgeStatement': 'judgement'
+    'supervisor', route_supervisor, {
+        'wikipedia': 'wikipedia',
+        'arxiv': 'arxiv',
+        'web': 'web',
+        'JudgeStatement': 'judgement',
+        'supervisor': 'supervisor'
     })
 graph.add_edge('wikipedia', 'supervisor')
 graph.add_edge('arxiv', 'supervisor')
 graph.add_edge('web', 'supervisor')
-graph.add_edge('judgement', 'review')
+graph.add_conditional_edges('judgement', lambda x: x['next'], {
+    'review': 'review',
+    'FINISH': END
+})
 
-graph.add_conditional_edges('review', lambda x: x['next'], {
+graph.add_conditional_edges('review', route_review, {
     'Improve': 'supervisor',
+    'targeted_research': 'targeted_research',
     'FINISH': END
 })
+graph.add_edge('targeted_research', 'judgement')
 
 agent_graph = graph.compile()
 agent_graph.name = "Multi-Agent Statement Checker"
 
+def initial_state(statement: str) -> dict:
+    return {'statement': statement, 'messages': [HumanMessage(statement)], 'improved': False}
+
+
 ## As Chain
 get_state = lambda x: GraphState(**x)
 get_verdict = lambda x: x['verdict']
@@ -241,3 +507,50 @@ multi_agent_fact_check = (
     | get_state | agent_graph
     | get_verdict
 ).with_config({"run_name": "Multi-Agent Statement Checker"})
+
+
+## As Event Stream
+def _sources(message: ToolMessage) -> List[dict]:
+    if message.artifact is not None:
+        return [{'id': p['id'], 'title': p['title'], 'source': p['source']} for p in message.artifact]
+    try:
+        docs = json.loads(message.content)
+    except (TypeError, ValueError):
+        docs = []
+    return [
+        {'title': doc['metadata'].get('title') or doc['metadata'].get('Title'),
+         'source': doc['metadata'].get('source') or doc['metadata'].get('Entry ID')}
+        for doc in docs if isinstance(doc, dict) and 'metadata' in doc
+    ]
+
+
+async def stream_fact_check(statement: str, budget: str = 'interactive') -> AsyncIterator[Tuple[str, dict]]:
+    """Yield (event, data) as the graph works: tools chosen, sources found, draft verdicts,
+    review outcomes and finally the verdict."""
+    verdict = None
+    async for event in agent_graph.astream_events(initial_state(statement), budget_config(budget), version='v2'):
+        node = event['metadata'].get('langgraph_node')
+        if event['event'] != 'on_chain_end' or event['name'] != node:
+            continue
+        output = event['data'].get('output') or {}
+        for escalation in output.get('escalations', []) if isinstance(output, dict) else []:
+            yield 'escalation', escalation
+
+        if node in {'supervisor', 'targeted_research', *SEARCH_NODES.values()}:
+            for message in output.get('messages', []):
+                if isinstance(message, AIMessage):
+                    for call in message.tool_calls:
+                        yield 'tool', {'tool': call['name'], 'query': call['args'].get('query')}
+                elif isinstance(message, ToolMessage):
+                    yield 'sources', {'tool': message.name, 'sources': _sources(message)}
+        elif node == 'judgement':
+            verdict = output['verdict']
+            yield 'draft', verdict.dict()
+            if output.get('review_skipped'):
+                yield 'review', {'next': 'FINISH', 'comments': f"Review skipped: {output['review_skipped']}", 'skipped': True}
+        elif node == 'review':
+            yield 'review', {'next': output['next'], 'comments': output['messages'][-1].content}
+
+    if verdict is None:
+        raise ValueError("Fact-check finished without a verdict")
+    yield 'verdict', verdict.dict()
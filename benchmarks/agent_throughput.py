@@ -0,0 +1,168 @@
+"""Load benchmark for the multi-agent statement checker.
+
+Runs the real `agent_graph` against a stubbed LLM, judge and retrievers that
+only simulate latency, so the numbers reflect how many checks a single event
+loop can keep in flight rather than OpenAI or search API speed.
+
+    python -m benchmarks.agent_throughput --checks 200 --concurrency 200
+
+`--mode executor` reproduces the old behaviour, where every node call blocked a
+thread of the default executor; `--mode async` awaits the node I/O natively.
+
+`--sources 3` makes the stubbed supervisor consult Wikipedia, arXiv and the web
+before judging. By default it asks for all of them in one turn (parallel
+fan-out); `--one_tool_per_turn` reproduces the old one-search-per-turn loop.
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+# The chains read their settings from config, which also wants the app's database and secret
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'stub')
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agents import statement_checker
+from chains.adjudicator_chain import Verdict
+
+
+async def _wait(latency: float, mode: str) -> None:
+    if mode == 'executor':
+        await asyncio.get_running_loop().run_in_executor(None, time.sleep, latency)
+    else:
+        await asyncio.sleep(latency)
+
+
+SEARCH_TOOLS = ['search_wikipedia', 'search_arxiv', 'search_web']
+
+
+class StubChatModel(BaseChatModel):
+    """Scripted tool-calling model: search `sources` tools, judge, then FINISH the review."""
+    latency: float = 0.5
+    mode: str = 'async'
+    sources: int = 1
+    one_tool_per_turn: bool = False
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return 'stub-chat'
+
+    def bind_tools(self, tools, **kwargs):
+        names = [convert_to_openai_tool(t)['function']['name'] for t in tools]
+        return self.model_copy(update={'tool_names': names})
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        searched = {m.name for m in messages if isinstance(m, ToolMessage)}
+        pending = [name for name in SEARCH_TOOLS[:self.sources] if name not in searched]
+        if 'ReviewFeedback' in self.tool_names:
+            calls = [{'name': 'ReviewFeedback', 'args': {'next': 'FINISH', 'comments': 'Looks good.'}}]
+        elif pending:
+            pending = pending[:1] if self.one_tool_per_turn else pending
+            calls = [{'name': name, 'args': {'query': 'stub'}} for name in pending]
+        else:
+            calls = [{'name': 'JudgeStatement', 'args': {'statement': 'stub'}}]
+        for call in calls:
+            call['id'] = f'call_{uuid.uuid4().hex[:12]}'
+        message = AIMessage(content='', tool_calls=calls)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await _wait(self.latency, self.mode)
+        return self._respond(messages)
+
+
+class StubRetriever(BaseRetriever):
+    latency: float = 0.3
+    mode: str = 'async'
+
+    def _docs(self, query: str) -> List[Document]:
+        return [
+            Document(page_content=f'Stub evidence {i} for {query}.',
+                     metadata={'title': f'Stub {i}', 'source': f'https://source{i}.example.org/page'})
+            for i in range(3)
+        ]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        time.sleep(self.latency)
+        return self._docs(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        await _wait(self.latency, self.mode)
+        return self._docs(query)
+
+
+def install_stubs(llm_latency: float, search_latency: float, mode: str,
+                  sources: int = 1, one_tool_per_turn: bool = False) -> None:
+    async def stub_judge(_: Any) -> Verdict:
+        await _wait(llm_latency, mode)
+        return Verdict(verdict='True', explanation='Stub verdict.', references=[])
+
+    statement_checker.get_chat_model = lambda model, **kwargs: StubChatModel(
+        latency=llm_latency, mode=mode, sources=sources, one_tool_per_turn=one_tool_per_turn)
+    statement_checker.get_judge_chain = lambda model: RunnableLambda(lambda x: None, afunc=stub_judge)
+    for name in ('wiki_retriever', 'arxiv_retriever', 'web_retriever'):
+        setattr(statement_checker, name, StubRetriever(latency=search_latency, mode=mode))
+
+
+async def run(checks: int, concurrency: int) -> Tuple[float, List[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> Optional[Verdict]:
+        async with semaphore:
+            start = time.perf_counter()
+            verdict = await statement_checker.multi_agent_fact_check.ainvoke({'statement': f'Statement {i}'})
+            latencies.append(time.perf_counter() - start)
+            return verdict
+
+    start = time.perf_counter()
+    verdicts = await asyncio.gather(*[one(i) for i in range(checks)])
+    elapsed = time.perf_counter() - start
+    assert all(isinstance(v, Verdict) for v in verdicts)
+    return elapsed, latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checks', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--llm_latency', type=float, default=0.5, help='Seconds per stubbed LLM call')
+    parser.add_argument('--search_latency', type=float, default=0.3, help='Seconds per stubbed search')
+    parser.add_argument('--mode', choices=['async', 'executor', 'both'], default='both')
+    parser.add_argument('--sources', type=int, default=1, choices=[1, 2, 3],
+                        help='Number of search tools the stubbed supervisor consults per check')
+    parser.add_argument('--one_tool_per_turn', action='store_true',
+                        help='Stubbed supervisor requests one search per turn instead of fanning out')
+    parser.add_argument('--executor_workers', type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help='Size of the default executor (asyncio default is min(32, cpus + 4))')
+    args = parser.parse_args()
+
+    modes = ['executor', 'async'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        install_stubs(args.llm_latency, args.search_latency, mode, args.sources, args.one_tool_per_turn)
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=args.executor_workers))
+        elapsed, latencies = loop.run_until_complete(run(args.checks, args.concurrency))
+        loop.close()
+        print(f"{mode:>8}: {args.checks} checks in {elapsed:.2f}s -> {args.checks / elapsed:.1f} checks/sec, "
+              f"p50 latency {statistics.median(latencies):.2f}s")
@@ -0,0 +1,102 @@
+"""arXiv search latency, local index against the live API.
+
+Writes a synthetic metadata snapshot in the Kaggle format, with a
+Zipf-distributed vocabulary and abstracts of typical arXiv length, or uses
+`--snapshot` if given; ingests it into a fresh `ArxivIndex` and times
+queries made of title and abstract terms of random papers, plus queries for
+topics it doesn't have. `--live N` also times N queries against the live
+arXiv API, for comparison (needs network).
+
+    python -m benchmarks.arxiv_index --papers 200000 --live 3
+
+Reports ingest rate, database size, query latency percentiles, and the
+share of queries answered locally rather than passed to the live API.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from benchmarks.wiki_index import percentile
+from chains.arxiv_index import ArxivIndex, LocalArxivRetriever
+
+
+def write_snapshot(path: str, papers: int, vocabulary: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    cdf = np.cumsum(1 / np.arange(1, vocabulary + 1))
+    cdf /= cdf[-1]
+    with open(path, 'w') as f:
+        for i in range(papers):
+            abstract = np.searchsorted(cdf, rng.random(int(rng.integers(80, 250))))
+            title = rng.integers(vocabulary // 10, vocabulary, size=int(rng.integers(4, 10)))
+            f.write(json.dumps({
+                'id': f"{2000 + i // 100000}.{i % 100000:05d}",
+                'title': ' '.join(f"w{j}" for j in title),
+                'authors': 'A. Author',
+                'authors_parsed': [['Author', 'A.', '']],
+                'abstract': ' '.join(f"w{j}" for j in abstract),
+                'categories': 'cs.CL',
+                'update_date': '2024-01-01'
+            }) + '\n')
+
+
+def main(papers: int, vocabulary: int, queries: int, snapshot: Optional[str], live: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        if not snapshot:
+            snapshot = os.path.join(tmp, 'snapshot.json')
+            write_snapshot(snapshot, papers, vocabulary)
+        path = os.path.join(tmp, 'arxiv.db')
+        index = ArxivIndex(path)
+        start = time.perf_counter()
+        count = index.ingest_snapshot(snapshot)
+        seconds = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.startswith('arxiv.db'))
+        print(f"Ingested {count} papers in {seconds:.1f}s ({count / seconds:.0f}/s), {size / 2**20:.0f} MiB on disk")
+
+        rng = random.Random(0)
+        rowids = [rng.randint(1, count) for _ in range(queries)]
+        connection = index._connection()
+        sample = []
+        for rowid in rowids:
+            title, abstract = connection.execute('SELECT title, abstract FROM papers WHERE rowid = ?', (rowid,)).fetchone()
+            sample.append(' '.join([*rng.sample(title.split(), 3), *rng.sample(abstract.split(), 2)]))
+        # Misses: queries for topics the index doesn't have
+        sample += [f"zz{i} qq{i} unindexed topic" for i in range(queries // 10)]
+
+        retriever = LocalArxivRetriever(index=index)
+        latencies, hits = [], 0
+        for query in sample:
+            start = time.perf_counter()
+            hits += retriever.search(query) is not None
+            latencies.append(time.perf_counter() - start)
+        print(f"{len(sample)} queries: p50 {percentile(latencies, 50):.2f} ms, p95 {percentile(latencies, 95):.2f} ms, "
+              f"p99 {percentile(latencies, 99):.2f} ms; {hits / len(sample):.0%} answered locally")
+
+        if live:
+            from chains.api_retrievers import ArxivAPIRetriever
+            live_retriever = ArxivAPIRetriever(load_max_docs=3)
+            latencies = []
+            for query in ['transformer language models', 'inflation targeting central banks',
+                          'protein structure prediction'][:live]:
+                start = time.perf_counter()
+                asyncio.run(live_retriever.ainvoke(query))
+                latencies.append(time.perf_counter() - start)
+            print(f"Live API, {len(latencies)} queries: p50 {percentile(latencies, 50):.0f} ms, "
+                  f"max {max(latencies) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--papers', type=int, default=200000, help='Synthetic papers')
+    parser.add_argument('--vocabulary', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--snapshot', default=None, help='Ingest this snapshot instead of a synthetic one')
+    parser.add_argument('--live', type=int, default=0, choices=range(4), help='Also time this many live API queries')
+    args = parser.parse_args()
+    main(args.papers, args.vocabulary, args.queries, args.snapshot, args.live)
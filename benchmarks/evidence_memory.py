@@ -0,0 +1,83 @@
+"""External search calls for a recurring topic, with and without evidence memory.
+
+Checks the central-bank article of `benchmarks.evidence_pool` through the
+real `agent_graph` `--runs` times, as if the same topic came back in later
+articles, with the stub supervisor, stub retrievers and call counting of
+that benchmark. Memory is a local on-disk Qdrant collection in a temporary
+directory; embeddings are hashed bags of words, so no API is called.
+
+    python -m benchmarks.evidence_memory --runs 3
+
+Without memory every run pays for the same searches again. With it, the
+first run fills memory and later runs are answered from it.
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+# The chains read their settings from config, which also wants the app's database and secret
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'stub')
+
+import argparse
+import asyncio
+import hashlib
+import tempfile
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient
+
+from agents import statement_checker
+from benchmarks import evidence_pool as harness
+from chains import evidence_memory
+
+
+class HashedBagOfWords(Embeddings):
+    """Offline stand-in for the embedding model: each word hashed into one of VECTOR_SIZE buckets."""
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(evidence_memory.VECTOR_SIZE)
+        for word in text.casefold().split():
+            vector[int(hashlib.md5(word.strip('.,;:').encode()).hexdigest(), 16) % len(vector)] += 1
+        return (vector / (np.linalg.norm(vector) or 1)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+async def main(runs: int, sources: int, concurrency: int) -> None:
+    harness.install_stubs(0, 0, 'async', sources=sources, one_tool_per_turn=True)
+    statement_checker.get_chat_model = lambda model, **kwargs: harness.StatementQueryModel(
+        latency=0, sources=sources, one_tool_per_turn=True)
+    for name, source in (('wiki_retriever', 'wiki'), ('arxiv_retriever', 'arxiv'), ('web_retriever', 'web')):
+        setattr(statement_checker, name, harness.CorpusRetriever(source=source))
+
+    print(f"External searches per run of an article of {len(harness.STATEMENTS)} statements, "
+          f"{sources} searches per statement")
+    with tempfile.TemporaryDirectory() as path:
+        memory = evidence_memory.EvidenceMemory(AsyncQdrantClient(path=path), HashedBagOfWords())
+        for label, run_memory in (('no memory', None), ('evidence memory', memory)):
+            statement_checker.memory = run_memory
+            calls = []
+            for _ in range(runs):
+                harness.calls.clear()
+                await harness.check_article(None, concurrency)
+                if run_memory:
+                    await asyncio.gather(*run_memory._writes)
+                calls.append(sum(harness.calls.values()))
+            print(f"{label:<17}" + ''.join(f"{n:>6}" for n in calls))
+        print(f"Memory: {await memory.stats()}")
+        await memory.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=3, help='Times the article is checked')
+    parser.add_argument('--sources', type=int, default=2, choices=[1, 2, 3], help='Searches per statement')
+    parser.add_argument('--concurrency', type=int, default=5, help='Statements checked at once, as in jobs')
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.sources, args.concurrency))
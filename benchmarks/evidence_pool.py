@@ -0,0 +1,150 @@
+"""External search calls per article, with and without the shared evidence pool.
+
+Checks the statements of a synthetic article about central banks, several of
+which mention the same institutions and people, through the real
+`agent_graph`. The stubbed supervisor searches for the statement itself, one
+tool per turn, `--sources` times; the stub retrievers return the corpus
+paragraphs about every entity named in the query and count each call.
+
+    python -m benchmarks.evidence_pool --sources 2
+
+Without the pool every search is an external call. With it, `plan_research`
+first searches once per group of statements sharing an entity, and agent
+searches the pool can answer never leave the process.
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+# The chains read their settings from config, which also wants the app's database and secret
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'stub')
+
+import argparse
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.messages import HumanMessage
+from langchain_core.retrievers import BaseRetriever
+
+from agents import statement_checker
+from benchmarks.agent_throughput import StubChatModel, install_stubs
+from chains.evidence_pool import EvidencePool, plan_research
+
+CORPUS = {
+    'Federal Reserve': [
+        "The Federal Reserve raised its benchmark interest rate eleven times between March 2022 and July 2023.",
+        "The Federal Reserve targets inflation of two percent, measured by the personal consumption expenditures index.",
+        "The Federal Reserve held rates at a range of 5.25 to 5.5 percent for over a year before cutting in September 2024.",
+    ],
+    'Jerome Powell': [
+        "Jerome Powell has chaired the Federal Reserve since February 2018 and was renominated in 2021.",
+        "Jerome Powell said in 2022 that restoring price stability would require a period of below-trend growth.",
+    ],
+    'European Central Bank': [
+        "The European Central Bank raised its deposit rate to a record four percent in September 2023.",
+        "The European Central Bank began cutting rates in June 2024, ahead of the Federal Reserve.",
+    ],
+    'Christine Lagarde': [
+        "Christine Lagarde became president of the European Central Bank in November 2019.",
+        "Christine Lagarde previously led the International Monetary Fund from 2011 to 2019.",
+    ],
+    'Bank of England': [
+        "The Bank of England raised Bank Rate fourteen consecutive times from December 2021 to August 2023.",
+        "The Bank of England held Bank Rate at 5.25 percent until its first cut in August 2024.",
+    ],
+}
+FILLER = "Central banks publish minutes of their policy meetings, which markets study for signals about future moves."
+
+# The article's statements, each taken from the corpus so the evidence exists
+STATEMENTS = [
+    CORPUS['Federal Reserve'][0],
+    CORPUS['Federal Reserve'][1],
+    CORPUS['Federal Reserve'][2],
+    CORPUS['Jerome Powell'][0],
+    CORPUS['Jerome Powell'][1],
+    CORPUS['European Central Bank'][0],
+    CORPUS['European Central Bank'][1],
+    CORPUS['Christine Lagarde'][0],
+    CORPUS['Christine Lagarde'][1],
+    CORPUS['Bank of England'][0],
+    CORPUS['Bank of England'][1],
+]
+
+calls: Counter = Counter()
+
+
+class StatementQueryModel(StubChatModel):
+    """StubChatModel that searches for the statement it is checking."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        result = self._respond(messages)
+        statement = next((m.content for m in messages if isinstance(m, HumanMessage)), '')
+        for call in result.generations[0].message.tool_calls:
+            if 'query' in call['args']:
+                call['args']['query'] = statement
+        return result
+
+
+class CorpusRetriever(BaseRetriever):
+    """One document per corpus entity named in the query."""
+    source: str
+
+    def _docs(self, query: str) -> List[Document]:
+        calls[self.source] += 1
+        return [
+            Document(page_content='\n\n'.join([FILLER, *paragraphs]),
+                     metadata={'title': entity, 'source': f"https://{self.source}.example.org/{entity.replace(' ', '_')}"})
+            for entity, paragraphs in CORPUS.items() if entity.casefold() in query.casefold()
+        ]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._docs(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._docs(query)
+
+
+async def check_article(pool: Optional[EvidencePool], concurrency: int) -> None:
+    if pool is not None:
+        await plan_research(pool, STATEMENTS, {'wiki': statement_checker.wiki_retriever,
+                                               'web': statement_checker.web_retriever})
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(statement: str) -> None:
+        async with semaphore:
+            await statement_checker.multi_agent_fact_check.ainvoke(
+                {'statement': statement}, {'configurable': {'evidence_pool': pool}})
+
+    await asyncio.gather(*[one(st) for st in STATEMENTS])
+
+
+async def main(sources: int, concurrency: int) -> None:
+    install_stubs(0, 0, 'async', sources=sources, one_tool_per_turn=True)
+    statement_checker.get_chat_model = lambda model, **kwargs: StatementQueryModel(
+        latency=0, sources=sources, one_tool_per_turn=True)
+    for name, source in (('wiki_retriever', 'wiki'), ('arxiv_retriever', 'arxiv'), ('web_retriever', 'web')):
+        setattr(statement_checker, name, CorpusRetriever(source=source))
+
+    results: Dict[str, Counter] = {}
+    pool = EvidencePool()
+    for label, article_pool in (('no pool', None), ('evidence pool', pool)):
+        calls.clear()
+        await check_article(article_pool, concurrency)
+        results[label] = Counter(calls)
+
+    print(f"External searches for one article of {len(STATEMENTS)} statements, {sources} searches per statement")
+    print(f"{'':<16}{'wiki':>6}{'arxiv':>7}{'web':>6}{'total':>7}")
+    for label, counts in results.items():
+        print(f"{label:<16}{counts['wiki']:>6}{counts['arxiv']:>7}{counts['web']:>6}{sum(counts.values()):>7}")
+    print(f"Pool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sources', type=int, default=2, choices=[1, 2, 3], help='Searches per statement')
+    parser.add_argument('--concurrency', type=int, default=5, help='Statements checked at once, as in jobs')
+    args = parser.parse_args()
+    asyncio.run(main(args.sources, args.concurrency))
@@ -0,0 +1,164 @@
+"""Prompt tokens per check, with and without evidence packing.
+
+Runs the real `agent_graph` over the statements in dspy/data/fact-checking-v1.csv
+with a stubbed LLM that counts the tokens of every prompt it is sent. The stub
+retrievers return documents sized like the real ones (Wikipedia pages cut at
+4000 characters, arXiv abstracts, Tavily snippets), built from the statement's
+gold reference summaries padded with other rows' text as off-topic filler.
+
+    python -m benchmarks.evidence_tokens --hops 3
+
+`--hops` is the number of search turns before judging, one tool per turn, which
+is where raw documents made the supervisor prompt grow fastest.
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+# The chains read their settings from config, which also wants the app's database and secret
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'stub')
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import pandas as pd
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+
+from agents import statement_checker
+from benchmarks.agent_throughput import StubChatModel
+from chains import adjudicator_chain
+from chains.adjudicator_chain import Verdict
+from chains.evidence import count_tokens
+
+DATASET = 'dspy/data/fact-checking-v1.csv'
+# (documents per search, characters per document), roughly what each real retriever returns
+DOC_SHAPES = {'wiki': (3, 4000), 'arxiv': (3, 1500), 'web': (5, 1000)}
+
+tokens: Dict[str, int] = defaultdict(int)
+
+
+def _letters(text: str) -> str:
+    return re.sub(r'\W+', '', text)
+
+
+def _message_tokens(messages: List[BaseMessage]) -> int:
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        total += count_tokens(content)
+        for call in getattr(message, 'tool_calls', None) or []:
+            total += count_tokens(json.dumps(call['args']))
+    return total
+
+
+class CountingChatModel(StubChatModel):
+    """Scripted like StubChatModel, but searches for the statement itself and counts its prompts."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        role = 'review' if 'ReviewFeedback' in self.tool_names else 'supervisor'
+        tokens[role] += _message_tokens(messages)
+        result = self._respond(messages)
+        statement = next((m.content for m in messages if isinstance(m, HumanMessage)), '')
+        for call in result.generations[0].message.tool_calls:
+            if 'query' in call['args']:
+                call['args']['query'] = statement
+        return result
+
+
+class DatasetRetriever(BaseRetriever):
+    """Documents holding the statement's gold evidence among unrelated paragraphs."""
+    shape: str
+    evidence: Dict[str, List[dict]]
+    filler: List[str]
+
+    def _docs(self, query: str) -> List[Document]:
+        count, chars = DOC_SHAPES[self.shape]
+        rng = random.Random(f"{self.shape}{query}")
+        refs = self.evidence.get(query, [])
+        docs = []
+        for i in range(count):
+            ref = refs[i % len(refs)] if refs else {'title': f'Result {i}', 'source': f'https://example.org/{i}', 'summary': ''}
+            paragraphs = [ref['summary']]
+            while sum(len(p) for p in paragraphs) < chars:
+                paragraphs.insert(rng.randrange(len(paragraphs) + 1), rng.choice(self.filler))
+            docs.append(Document(page_content='\n\n'.join(paragraphs)[:chars],
+                                 metadata={'title': ref['title'], 'source': ref['source']}))
+        return docs
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._docs(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._docs(query)
+
+
+def load_dataset() -> tuple:
+    df = pd.read_csv(DATASET)
+    evidence, filler = {}, []
+    for _, row in df.iterrows():
+        output = json.loads(row['output_output'])
+        evidence[row['input_input']] = output['references']
+        filler.append(output['explanation'])
+        filler.extend(ref['summary'] for ref in output['references'])
+    return df['input_input'].tolist(), evidence, filler
+
+
+def install(hops: int, evidence: Dict[str, List[dict]], filler: List[str]) -> None:
+    async def counting_judge(inputs: Dict[str, Any]) -> Verdict:
+        prompt = adjudicator_chain.prompt.format(**inputs)
+        tokens['judge'] += count_tokens(prompt)
+        gold = [ref['summary'] for ref in evidence.get(inputs['statement'], [])]
+        tokens['gold'] += len(gold)
+        # Raw research reaches the prompt as message reprs with escaped quotes, so compare letters only
+        tokens['gold_kept'] += sum(_letters(summary) in _letters(prompt) for summary in gold)
+        return Verdict(verdict='True', explanation='Stub verdict.', references=[])
+
+    statement_checker.get_chat_model = lambda model, **kwargs: CountingChatModel(
+        latency=0, sources=hops, one_tool_per_turn=True)
+    statement_checker.get_judge_chain = lambda model: RunnableLambda(lambda x: None, afunc=counting_judge)
+    for name, shape in (('wiki_retriever', 'wiki'), ('arxiv_retriever', 'arxiv'), ('web_retriever', 'web')):
+        setattr(statement_checker, name, DatasetRetriever(shape=shape, evidence=evidence, filler=filler))
+
+
+async def measure(statements: List[str], packed: bool) -> Dict[str, float]:
+    statement_checker.PACK_EVIDENCE = packed
+    tokens.clear()
+    for statement in statements:
+        await statement_checker.multi_agent_fact_check.ainvoke({'statement': statement})
+    recall = tokens['gold_kept'] / tokens['gold'] if tokens['gold'] else 0.0
+    return {role: tokens[role] / len(statements) for role in ('supervisor', 'judge', 'review')}, recall
+
+
+async def main(hops: int, limit: int) -> None:
+    statements, evidence, filler = load_dataset()
+    statements = statements[:limit]
+    install(hops, evidence, filler)
+    results, recall = {}, {}
+    for packed in (False, True):
+        results[packed], recall[packed] = await measure(statements, packed)
+
+    print(f"Prompt tokens per check over {len(statements)} statements, {hops} search hops")
+    print(f"{'':<12}{'raw documents':>15}{'packed':>10}{'saved':>8}")
+    for role in ('supervisor', 'judge', 'review', 'total'):
+        before = sum(results[False].values()) if role == 'total' else results[False][role]
+        after = sum(results[True].values()) if role == 'total' else results[True][role]
+        saved = 1 - after / before if before else 0
+        print(f"{role:<12}{before:>15.0f}{after:>10.0f}{saved:>8.0%}")
+    print(f"Gold evidence reaching the judge: {recall[False]:.0%} raw, {recall[True]:.0%} packed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hops', type=int, default=3, choices=[1, 2, 3], help='Search turns before judging')
+    parser.add_argument('--limit', type=int, default=21, help='Number of dataset statements to check')
+    args = parser.parse_args()
+    asyncio.run(main(args.hops, args.limit))
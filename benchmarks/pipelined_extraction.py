@@ -0,0 +1,83 @@
+"""Article check time with extraction streamed into checking versus done up front.
+
+The stubbed extraction model writes `--statements` statements, one line each,
+at `--tokens_per_second`. Each statement is then checked through the real
+`agent_graph` with the stubbed LLM and retrievers of
+`benchmarks.agent_throughput`, `--concurrency` at a time as in jobs.
+
+    python -m benchmarks.pipelined_extraction --statements 20
+
+Sequential waits for the whole completion, as `get_statements` does, before
+the first check starts. Pipelined starts each check as soon as
+`stream_statements` yields its line.
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+# The chains read their settings from config, which also wants the app's database and secret
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'stub')
+
+import argparse
+import asyncio
+import time
+from typing import AsyncIterator, List
+
+from langchain_core.runnables import RunnableLambda
+
+from agents import statement_checker
+from benchmarks.agent_throughput import install_stubs
+from chains import statement_chain
+
+TOKENS_PER_STATEMENT = 30
+
+
+def install_extraction(statements: int, tokens_per_second: float) -> None:
+    async def astream(content: str, *args, **kwargs) -> AsyncIterator[str]:
+        for i in range(statements):
+            await asyncio.sleep(TOKENS_PER_STATEMENT / tokens_per_second)
+            yield f"Statement {i}"
+            yield "\n"
+
+    statement_chain.chain = RunnableLambda(lambda x: None)
+    statement_chain.chain.astream = astream
+
+
+async def check_article(pipelined: bool, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    finished: List[float] = []
+
+    async def one(statement: str) -> None:
+        async with semaphore:
+            await statement_checker.multi_agent_fact_check.ainvoke({'statement': statement})
+            finished.append(time.perf_counter() - start)
+
+    if pipelined:
+        tasks = [asyncio.create_task(one(st)) async for st in statement_chain.stream_statements('article')]
+    else:
+        tasks = [asyncio.create_task(one(st)) for st in await statement_chain.get_statements('article')]
+    await asyncio.gather(*tasks)
+    return min(finished), time.perf_counter() - start
+
+
+async def main(statements: int, tokens_per_second: float, concurrency: int,
+               llm_latency: float, search_latency: float) -> None:
+    install_stubs(llm_latency, search_latency, 'async')
+    install_extraction(statements, tokens_per_second)
+    extraction = statements * TOKENS_PER_STATEMENT / tokens_per_second
+    print(f"{statements} statements, extraction takes {extraction:.1f}s, {concurrency} checks at a time")
+    for pipelined in (False, True):
+        first, total = await check_article(pipelined, concurrency)
+        print(f"{'pipelined' if pipelined else 'sequential':>12}: first verdict {first:.2f}s, all verdicts {total:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--statements', type=int, default=20)
+    parser.add_argument('--tokens_per_second', type=float, default=100, help='Extraction model output speed')
+    parser.add_argument('--concurrency', type=int, default=5, help='Statements checked at once, as in jobs')
+    parser.add_argument('--llm_latency', type=float, default=0.5, help='Seconds per stubbed LLM call')
+    parser.add_argument('--search_latency', type=float, default=0.3, help='Seconds per stubbed search')
+    args = parser.parse_args()
+    asyncio.run(main(args.statements, args.tokens_per_second, args.concurrency, args.llm_latency, args.search_latency))
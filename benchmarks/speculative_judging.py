@@ -0,0 +1,69 @@
+"""Check latency with and without speculative judging.
+
+Runs the real `agent_graph` with the stubbed LLM and retrievers of
+`benchmarks.agent_throughput`. The stubbed supervisor searches one tool per
+turn, `--sources` times, before judging. A fraction `--easy` of the statements
+get a confident verdict backed by two independent sources, the kind the
+speculative judge can settle after the first search; the rest get an
+unconfident one, so their speculative judgements are discarded.
+
+    python -m benchmarks.speculative_judging --checks 50 --easy 0.5
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+# The chains read their settings from config, which also wants the app's database and secret
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'stub')
+
+import argparse
+import asyncio
+import statistics
+from typing import Any, Dict
+
+from langchain_core.runnables import RunnableLambda
+
+from agents import statement_checker
+from benchmarks.agent_throughput import _wait, install_stubs, run
+from chains.adjudicator_chain import Verdict
+
+REFERENCES = [
+    {'title': 'Source A', 'source': 'https://a.example.org/page', 'summary': 'Supports the statement.'},
+    {'title': 'Source B', 'source': 'https://b.example.com/page', 'summary': 'Also supports it.'},
+]
+
+
+def install_judge(llm_latency: float, easy: float) -> None:
+    async def judge(inputs: Dict[str, Any]) -> Verdict:
+        await _wait(llm_latency, 'async')
+        index = int(inputs['statement'].split()[-1])
+        if index % 100 < easy * 100:
+            return Verdict(verdict='True', explanation='Stub verdict.', references=REFERENCES, confidence=0.95)
+        return Verdict(verdict='True', explanation='Stub verdict.', references=REFERENCES[:1], confidence=0.75)
+
+    statement_checker.get_judge_chain = lambda model: RunnableLambda(lambda x: None, afunc=judge)
+
+
+async def main(checks: int, concurrency: int, llm_latency: float, search_latency: float,
+               sources: int, easy: float) -> None:
+    install_stubs(llm_latency, search_latency, 'async', sources=sources, one_tool_per_turn=True)
+    install_judge(llm_latency, easy)
+    print(f"{checks} checks, {sources} searches each unless settled early, {easy:.0%} easy")
+    for speculative in (False, True):
+        statement_checker.SPECULATIVE_JUDGING = speculative
+        elapsed, latencies = await run(checks, concurrency)
+        latencies.sort()
+        print(f"{'speculative' if speculative else 'sequential':>12}: p50 {statistics.median(latencies):.2f}s, "
+              f"p90 {latencies[int(len(latencies) * 0.9) - 1]:.2f}s, total {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checks', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--llm_latency', type=float, default=0.5, help='Seconds per stubbed LLM call')
+    parser.add_argument('--search_latency', type=float, default=0.3, help='Seconds per stubbed search')
+    parser.add_argument('--sources', type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument('--easy', type=float, default=0.5, help='Fraction of statements with a confident verdict')
+    args = parser.parse_args()
+    asyncio.run(main(args.checks, args.concurrency, args.llm_latency, args.search_latency, args.sources, args.easy))
@@ -0,0 +1,108 @@
+"""Round trips and wall time for saving an article's statements.
+
+Compares inserting statements one `crud.create_statement` at a time (a commit
+and refresh each) with `crud.create_statements_bulk`, and writing verdicts as
+each one completes with writing them in batches through `jobs.StatementWriter`.
+
+    python -m benchmarks.statement_persistence --statements 50
+
+Runs against the configured DATABASE_URL, so point it at a local Postgres.
+Tables are created if missing but never dropped, and the rows it writes are
+deleted afterwards. Round trips count every statement sent plus every
+BEGIN/COMMIT; an executemany counts once, as asyncpg pipelines it.
+"""
+import os
+os.environ.setdefault('OPENAI_API_KEY', 'stub')
+os.environ.setdefault('TAVILY_API_KEY', 'stub')
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import delete, event
+from sqlmodel import SQLModel
+
+import crud
+from database import engine, get_session_context
+from jobs import StatementWriter
+from models import Article, Statement, User
+
+
+class RoundTripCounter:
+    def __init__(self, sync_engine):
+        self.count = 0
+        event.listen(sync_engine, 'before_cursor_execute', self._count)
+        event.listen(sync_engine, 'begin', self._count)
+        event.listen(sync_engine, 'commit', self._count)
+
+    def _count(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+def make_statements(n: int) -> List[Statement]:
+    return [Statement(content=f"Benchmark statement {i}", status='pending') for i in range(n)]
+
+
+async def insert_one_by_one(n: int, article_id: int, user_id: int) -> List[Statement]:
+    async with get_session_context() as session:
+        return [await crud.create_statement(session, st, article_id, user_id) for st in make_statements(n)]
+
+
+async def insert_bulk(n: int, article_id: int, user_id: int) -> List[Statement]:
+    async with get_session_context() as session:
+        return await crud.create_statements_bulk(session, make_statements(n), article_id, user_id)
+
+
+async def write_verdicts(statements: List[Statement], article_id: int, batch_size: int) -> None:
+    writer = StatementWriter(article_id, batch_size=batch_size, flush_seconds=60)
+    for st in statements:
+        await writer.write(st.id, verdict='True', explanation='Benchmark verdict.', references=[], status='checked')
+    await writer.flush()
+
+
+async def measure(counter: RoundTripCounter, fn: Callable[[], Awaitable]) -> tuple:
+    start_count, start = counter.count, time.perf_counter()
+    result = await fn()
+    return counter.count - start_count, (time.perf_counter() - start) * 1000, result
+
+
+async def main(n: int, batch_size: int) -> None:
+    engine.echo = False
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all, checkfirst=True)
+    counter = RoundTripCounter(engine.sync_engine)
+
+    async with get_session_context() as session:
+        user = User(username='benchmark', email=f"benchmark-{time.time_ns()}@example.org", hashed_password='-')
+        session.add(user)
+        await session.flush()
+        article = Article(title='Benchmark', text='-', user_id=user.id, domain=None, authors=None, publication_date=None)
+        session.add(article)
+        await session.flush()
+        user_id, article_id = user.id, article.id
+
+    try:
+        print(f"{'':<28}{'round trips':>12}{'wall ms':>10}")
+        trips, ms, one_by_one = await measure(counter, lambda: insert_one_by_one(n, article_id, user_id))
+        print(f"{'insert one by one':<28}{trips:>12}{ms:>10.1f}")
+        trips, ms, bulk = await measure(counter, lambda: insert_bulk(n, article_id, user_id))
+        print(f"{'insert bulk':<28}{trips:>12}{ms:>10.1f}")
+        trips, ms, _ = await measure(counter, lambda: write_verdicts(one_by_one, article_id, batch_size=1))
+        print(f"{'verdicts one by one':<28}{trips:>12}{ms:>10.1f}")
+        trips, ms, _ = await measure(counter, lambda: write_verdicts(bulk, article_id, batch_size=batch_size))
+        print(f"{f'verdicts in batches of {batch_size}':<28}{trips:>12}{ms:>10.1f}")
+    finally:
+        async with get_session_context() as session:
+            await session.execute(delete(Statement).where(Statement.article_id == article_id))
+            await session.execute(delete(Article).where(Article.id == article_id))
+            await session.execute(delete(User).where(User.id == user_id))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--statements', type=int, default=50)
+    parser.add_argument('--batch_size', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.statements, args.batch_size))
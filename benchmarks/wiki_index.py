@@ -0,0 +1,99 @@
+"""Wikipedia search latency, offline index against the live API.
+
+Builds an index of a synthetic corpus, with a Zipf-distributed vocabulary
+and article lengths of a typical Wikipedia lead plus a few sections, or of
+`--dump` if given, and times queries made of terms from random articles, as
+the supervisor's queries are. `--live N` also times N of the same queries
+against the live Wikipedia API, for comparison (needs network).
+
+    python -m benchmarks.wiki_index --articles 20000 --live 5
+
+Reports build time, index size on disk, query latency percentiles, and the
+share of queries answered locally rather than passed to the live API.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from chains.wiki_index import LocalWikipediaRetriever, WikipediaIndex, build_index, read_dump
+
+
+def synthetic_corpus(articles: int, vocabulary: int, seed: int = 0) -> Iterator[Tuple[str, str]]:
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cdf = np.cumsum(1 / np.arange(1, vocabulary + 1))
+    cdf /= cdf[-1]
+    for i in range(articles):
+        body = np.searchsorted(cdf, rng.random(int(rng.integers(200, 1500))))
+        title = ' '.join(words[j] for j in rng.choice(vocabulary // 10, size=2) + vocabulary // 10)
+        yield f"{title} {i}", f"{title} is " + ' '.join(words[j] for j in body)
+
+
+def queries_from(index: WikipediaIndex, count: int, seed: int = 0) -> List[str]:
+    """Titles plus a few body terms of random indexed articles."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        doc = index.document(rng.randrange(index.size))
+        body = doc.page_content.split()
+        queries.append(' '.join([doc.metadata['title'], *rng.sample(body, min(4, len(body)))]))
+    return queries
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main(articles: int, vocabulary: int, queries: int, dump: Optional[str], live: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'wiki_index')
+        start = time.perf_counter()
+        corpus = read_dump(dump) if dump else synthetic_corpus(articles, vocabulary)
+        meta = build_index(corpus, path, limit=articles if dump else None)
+        build_seconds = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"Indexed {meta['documents']} articles, {meta['terms']} terms, {meta['postings']} postings "
+              f"in {build_seconds:.1f}s, {size / 2**20:.0f} MiB on disk")
+
+        index = WikipediaIndex(path)
+        retriever = LocalWikipediaRetriever(index=index)
+        sample = queries_from(index, queries)
+        # Misses: queries for topics the index doesn't have
+        sample += [f"zz{i} qq{i} unindexed topic" for i in range(queries // 10)]
+        retriever.invoke(sample[0])
+        latencies, hits = [], 0
+        for query in sample:
+            start = time.perf_counter()
+            hits += retriever.search(query) is not None
+            latencies.append(time.perf_counter() - start)
+        print(f"{len(sample)} queries: p50 {percentile(latencies, 50):.2f} ms, p95 {percentile(latencies, 95):.2f} ms, "
+              f"p99 {percentile(latencies, 99):.2f} ms; {hits / len(sample):.0%} answered locally")
+
+        if live:
+            from chains.api_retrievers import WikipediaAPIRetriever
+            live_retriever = WikipediaAPIRetriever()
+            latencies = []
+            for query in ['Federal Reserve interest rates', 'Christine Lagarde European Central Bank',
+                          'Bank of England Bank Rate', 'Jerome Powell', 'personal consumption expenditures'][:live]:
+                start = time.perf_counter()
+                asyncio.run(live_retriever.ainvoke(query))
+                latencies.append(time.perf_counter() - start)
+            print(f"Live API, {len(latencies)} queries: p50 {percentile(latencies, 50):.0f} ms, "
+                  f"max {max(latencies) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--articles', type=int, default=20000, help='Synthetic articles, or the limit for --dump')
+    parser.add_argument('--vocabulary', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--dump', default=None, help='Index this dump instead of a synthetic corpus')
+    parser.add_argument('--live', type=int, default=0, choices=range(6), help='Also time this many live API queries')
+    args = parser.parse_args()
+    main(args.articles, args.vocabulary, args.queries, args.dump, args.live)
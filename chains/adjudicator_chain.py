@@ -3,15 +3,18 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.documents.base import Document
 import dspy
 from dspy.predict.langchain import LangChainPredict
+from functools import lru_cache
+from pydantic.json_schema import SkipJsonSchema
 from typing import Optional, List, Dict, Annotated
 from typing_extensions import TypedDict
 from enum import Enum
+from datetime import datetime
 from pydantic import BaseModel, Field, AnyHttpUrl
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from chains.llms import get_chat_model
 
 
 class VerdictEnum(str, Enum):
@@ -39,9 +42,17 @@ class Verdict(BaseModel):
     verdict: VerdictEnum = Field(description="The verdict.")
     explanation: str = Field(description="Justification for the verdict. Must be derived from the References.")
     references: List[VerdictRefs] = Field(description="The References used to actually justify the verdict.")
+    confidence: Optional[float] = Field(
+        default=None,
+        description="How confident you are in the verdict, from 0 to 1. Below 0.7 means the References "
+                    "don't settle it: they are thin, indirect or disagree.")
+    # Set by the statement checker, never by the model: why research was cut short, if it was
+    budget_limited: SkipJsonSchema[Optional[str]] = None
+    # Set by the verdict cache, never by the model: when a reused verdict was originally reached
+    checked_at: SkipJsonSchema[Optional[datetime]] = None
 
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0.1, streaming=True, name='judge_llm')
+llm = get_chat_model("gpt-4o", temperature=0.1, streaming=True, name='judge_llm')
 
 prompt = ChatPromptTemplate.from_template(
     """
@@ -67,14 +78,17 @@ chain = (
     | PydanticToolsParser(tools=tools, first_tool_only=True, name='verdict')
 ).with_config({"run_name": "Get Verdict"})
 
-dspy_chain = (
-    LangChainPredict(prompt, llm.bind_tools(tools))
-    | PydanticToolsParser(tools=tools, first_tool_only=True)
-)
+@lru_cache(maxsize=None)
+def get_dspy_chain():
+    """The chain wrapped for dspy optimisation. Built on first use: LangChainPredict calls the model when constructed."""
+    return (
+        LangChainPredict(prompt, llm.bind_tools(tools))
+        | PydanticToolsParser(tools=tools, first_tool_only=True)
+    )
 
 
 def init_chain(settings: Dict):
-    llm = ChatOpenAI(model=settings["Model"], streaming=True)
+    llm = get_chat_model(settings["Model"], streaming=True)
     chain = (
         prompt
         | llm.bind_tools(tools)
@@ -84,6 +98,17 @@ def init_chain(settings: Dict):
     return chain
 
 
+@lru_cache(maxsize=None)
+def get_chain(model: str):
+    """The verdict chain on `model`, for the judge's model cascade."""
+    llm = get_chat_model(model, temperature=0.1, streaming=True, name='judge_llm')
+    return (
+        prompt
+        | llm.bind_tools(tools)
+        | PydanticToolsParser(tools=tools, first_tool_only=True, name='verdict')
+    ).with_config({"run_name": "Get Verdict"})
+
+
 def judge_statement(input: Dict['statement': str, 'references': List[Document]]) -> Verdict:
     verdict = chain.invoke(input)
     return verdict
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Wikipedia, arXiv and Tavily retrievers over the pooled HTTP clients.
+
+The langchain-community retrievers these replace bring their own client
+libraries: `WikipediaRetriever` and `ArxivRetriever` make blocking calls
+through the `wikipedia` and `arxiv` packages, run in a thread per request
+without connection reuse, and `TavilySearchAPIRetriever` creates a new Tavily
+client on every call. These call the same APIs directly with the clients of
+`http_clients`, natively async, and return the same `Document` shapes, so
+the chains, the retrieval cache and the local indexes are unchanged. The
+Wikipedia pages of a search are fetched concurrently rather than one after
+another.
+"""
+import asyncio
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+
+from chains.http_clients import http_clients
+from chains.wiki_index import summary
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+MAX_QUERY_LENGTH = 300  # As the wikipedia and arxiv packages truncate queries
+ARXIV_URL = 'https://export.arxiv.org/api/query'
+ATOM_NS = {'atom': 'http://www.w3.org/2005/Atom'}
+TAVILY_URL = 'https://api.tavily.com/search'
+
+
+def _json(response: httpx.Response) -> Dict[str, Any]:
+    response.raise_for_status()
+    return response.json()
+
+
+class WikipediaAPIRetriever(BaseRetriever):
+    """`WikipediaRetriever` over the MediaWiki API."""
+
+    top_k_results: int = 3
+    lang: str = 'en'
+    doc_content_chars_max: int = 4000
+
+    @property
+    def api_url(self) -> str:
+        return f"https://{self.lang}.wikipedia.org/w/api.php"
+
+    def _search_params(self, query: str) -> Dict[str, Any]:
+        return {'action': 'query', 'list': 'search', 'srsearch': query[:MAX_QUERY_LENGTH], 'srlimit': self.top_k_results,
+                'srprop': '', 'format': 'json', 'formatversion': 2}
+
+    @staticmethod
+    def _page_params(title: str) -> Dict[str, Any]:
+        return {'action': 'query', 'titles': title, 'prop': 'extracts|info|pageprops', 'explaintext': 1,
+                'inprop': 'url', 'ppprop': 'disambiguation', 'redirects': 1, 'format': 'json', 'formatversion': 2}
+
+    @staticmethod
+    def _titles(response: Dict[str, Any]) -> List[str]:
+        return [result['title'] for result in response.get('query', {}).get('search', [])]
+
+    def _to_document(self, title: str, response: Dict[str, Any]) -> Optional[Document]:
+        pages = response.get('query', {}).get('pages', [])
+        # Missing and disambiguation pages are skipped, as WikipediaRetriever does
+        if not pages or pages[0].get('missing') or 'disambiguation' in pages[0].get('pageprops', {}):
+            return None
+        content = pages[0].get('extract', '')
+        if not content:
+            return None
+        return Document(page_content=content[:self.doc_content_chars_max], metadata={
+            'title': title,
+            'summary': summary(content),
+            'source': pages[0]['fullurl']
+        })
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        client = http_clients.get_sync('wikipedia')
+        titles = self._titles(_json(client.get(self.api_url, params=self._search_params(query))))
+        docs = [self._to_document(title, _json(client.get(self.api_url, params=self._page_params(title))))
+                for title in titles]
+        return [doc for doc in docs if doc is not None]
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        client = http_clients.get('wikipedia')
+        titles = self._titles(_json(await client.get(self.api_url, params=self._search_params(query))))
+        pages = await asyncio.gather(*[client.get(self.api_url, params=self._page_params(title)) for title in titles])
+        docs = [self._to_document(title, _json(page)) for title, page in zip(titles, pages)]
+        return [doc for doc in docs if doc is not None]
+
+
+class ArxivAPIRetriever(BaseRetriever):
+    """`ArxivRetriever` with `get_full_documents=False`, over the arXiv API's Atom feed."""
+
+    load_max_docs: int = 3
+
+    def _params(self, query: str) -> Dict[str, Any]:
+        return {'search_query': query[:MAX_QUERY_LENGTH], 'start': 0, 'max_results': self.load_max_docs}
+
+    @staticmethod
+    def _to_documents(response: httpx.Response) -> List[Document]:
+        response.raise_for_status()
+        docs = []
+        for entry in ET.fromstring(response.content).findall('atom:entry', ATOM_NS):
+            entry_id = entry.findtext('atom:id', '', ATOM_NS)
+            # The API reports a malformed query as a single entry titled "Error"
+            if '/api/errors' in entry_id:
+                continue
+            docs.append(Document(page_content=entry.findtext('atom:summary', '', ATOM_NS).strip(), metadata={
+                'Entry ID': entry_id,
+                'Published': datetime.fromisoformat(entry.findtext('atom:updated', '', ATOM_NS)[:10]).date(),
+                'Title': ' '.join(entry.findtext('atom:title', '', ATOM_NS).split()),
+                'Authors': ', '.join(author.findtext('atom:name', '', ATOM_NS)
+                                     for author in entry.findall('atom:author', ATOM_NS))
+            }))
+        return docs
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._to_documents(http_clients.get_sync('arxiv').get(ARXIV_URL, params=self._params(query)))
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._to_documents(await http_clients.get('arxiv').get(ARXIV_URL, params=self._params(query)))
+
+
+class TavilyAPIRetriever(BaseRetriever):
+    """`TavilySearchAPIRetriever` over the Tavily search API."""
+
+    k: int = 10
+    include_generated_answer: bool = False
+    include_raw_content: bool = False
+    include_images: bool = False
+    search_depth: str = 'basic'
+    include_domains: Optional[List[str]] = None
+    exclude_domains: Optional[List[str]] = None
+    api_key: Optional[str] = None
+
+    def _request(self, query: str) -> Dict[str, Any]:
+        return {
+            'headers': {'Authorization': f"Bearer {self.api_key or os.getenv('TAVILY_API_KEY')}"},
+            'json': {
+                'query': query,
+                'max_results': self.k,
+                'search_depth': self.search_depth,
+                'include_domains': self.include_domains or [],
+                'exclude_domains': self.exclude_domains or [],
+                'include_answer': self.include_generated_answer,
+                'include_raw_content': self.include_raw_content,
+                'include_images': self.include_images
+            }
+        }
+
+    def _to_documents(self, response: Dict[str, Any]) -> List[Document]:
+        docs = [
+            Document(
+                page_content=(result.get('raw_content') or '') if self.include_raw_content else result.get('content', ''),
+                metadata={
+                    'title': result.get('title', ''),
+                    'source': result.get('url', ''),
+                    **{k: v for k, v in result.items() if k not in ('content', 'title', 'url', 'raw_content')},
+                    'images': response.get('images')
+                }
+            )
+            for result in response.get('results', [])
+        ]
+        if self.include_generated_answer:
+            docs.insert(0, Document(page_content=response.get('answer') or '',
+                                    metadata={'title': 'Suggested Answer', 'source': 'https://tavily.com/'}))
+        return docs
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._to_documents(_json(http_clients.get_sync('tavily').post(TAVILY_URL, **self._request(query))))
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._to_documents(_json(await http_clients.get('tavily').post(TAVILY_URL, **self._request(query))))
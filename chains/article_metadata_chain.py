@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from chains.llms import get_chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticToolsParser
 from pydantic import BaseModel, validator, Field
@@ -7,7 +7,7 @@ from dateutil.parser import parse as parse_date
 from dateutil.parser._parser import ParserError
 
 
-llm = ChatOpenAI(model='gpt-4o', temperature=0.1)
+llm = get_chat_model('gpt-4o', temperature=0.1)
 
 
 class Metadata(BaseModel):
@@ -0,0 +1,388 @@
+"""Local arXiv search over a metadata snapshot, instead of an arXiv API call per query.
+
+`ArxivRetriever` called the arXiv API for every supervisor search, which is
+slow and heavily throttled. `ArxivIndex` keeps the title, authors and
+abstract of each paper in a SQLite database, with an FTS5 full-text index
+over titles and abstracts: Porter-stemmed, BM25-ranked, titles weighted
+double. Fill it from the bulk metadata snapshot, then keep it current from
+arXiv's OAI-PMH feed:
+
+    python -m chains.arxiv_index ingest --snapshot arxiv-metadata-oai-snapshot.json --categories cs stat econ
+    python -m chains.arxiv_index update
+
+The snapshot is the JSON lines file arXiv publishes on Kaggle. `update`
+harvests the records changed since the last ingest or update, deleting
+withdrawn ones, and is meant to run daily from cron; the database is in WAL
+mode, so the app keeps serving searches while it runs.
+
+`LocalArxivRetriever` returns the same `Document` shape as `ArxivRetriever`
+(the abstract, with Entry ID, Published, Title and Authors) and only calls
+the live API on a miss, when no result contains at least
+`ARXIV_INDEX_MIN_COVERAGE` of the query's terms.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from contextlib import nullcontext
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, TypedDict
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+from chains.wiki_index import LocalIndexStats, terms
+
+logger = logging.getLogger(__name__)
+
+ARXIV_INDEX_PATH = os.getenv('ARXIV_INDEX_PATH', '')  # Unset to always use the live API
+MIN_COVERAGE = float(os.getenv('ARXIV_INDEX_MIN_COVERAGE', 0.6))  # Share of query terms a result needs to count as a hit
+OAI_URL = 'https://export.arxiv.org/oai2'
+OAI_NS = {'oai': 'http://www.openarchives.org/OAI/2.0/', 'arxiv': 'http://arxiv.org/OAI/arXiv/'}
+TITLE_WEIGHT = 2.0
+CONTENT_CHARS = 4000
+BATCH_SIZE = 10000
+# Any-term queries score every paper containing any of the terms, so they leave out terms in more papers than this
+RARE_TERM_PAPERS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, content='papers', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS papers_insert AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_delete AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_update AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+    INSERT INTO papers_fts(rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class Paper(TypedDict):
+    id: str
+    title: str
+    authors: str
+    abstract: str
+    categories: str
+    updated: str  # ISO date
+
+
+def _clean(text: str) -> str:
+    # Titles and abstracts are hard-wrapped and indented
+    return ' '.join(text.split())
+
+
+def in_categories(categories: str, prefixes: Optional[Sequence[str]]) -> bool:
+    """Whether any of a paper's space-separated categories is, or is under, one of `prefixes` ('cs', 'stat.ML')."""
+    if not prefixes:
+        return True
+    return any(c == p or c.startswith(f"{p}.") for c in categories.split() for p in prefixes)
+
+
+def read_snapshot(path: str, categories: Optional[Sequence[str]] = None) -> Iterator[Paper]:
+    """Papers in the arXiv metadata snapshot (JSON lines, optionally gzipped)."""
+    with (gzip.open(path, 'rt') if path.endswith('.gz') else open(path)) as f:
+        for line in f:
+            record = json.loads(line)
+            if not in_categories(record['categories'], categories):
+                continue
+            # authors_parsed is [last name, first names, suffix] with the LaTeX accents resolved
+            authors = [' '.join(filter(None, [first, last, suffix]))
+                       for last, first, suffix, *_ in record.get('authors_parsed') or []]
+            yield Paper(id=record['id'], title=_clean(record['title']),
+                        authors=', '.join(authors) or _clean(record['authors']),
+                        abstract=_clean(record['abstract']), categories=record['categories'],
+                        updated=record['update_date'])
+
+
+def harvest(since: str, http: httpx.Client) -> Iterator[Tuple[str, Optional[Paper], str]]:
+    """(arXiv id, paper or None if deleted, datestamp) of each record changed since `since` (YYYY-MM-DD)."""
+    params = {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'from': since}
+    while True:
+        response = http.get(OAI_URL, params=params)
+        if response.status_code == 503:
+            # arXiv throttles harvesters with 503 and a Retry-After
+            time.sleep(int(response.headers.get('Retry-After', 10)))
+            continue
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+        error = root.find('oai:error', OAI_NS)
+        if error is not None:
+            if error.get('code') == 'noRecordsMatch':
+                return
+            raise RuntimeError(f"arXiv OAI-PMH error {error.get('code')}: {error.text}")
+
+        for record in root.iterfind('oai:ListRecords/oai:record', OAI_NS):
+            header = record.find('oai:header', OAI_NS)
+            arxiv_id = header.findtext('oai:identifier', '', OAI_NS).rsplit(':', 1)[-1]
+            datestamp = header.findtext('oai:datestamp', '', OAI_NS)
+            if header.get('status') == 'deleted':
+                yield arxiv_id, None, datestamp
+                continue
+            meta = record.find('oai:metadata/arxiv:arXiv', OAI_NS)
+            authors = [
+                ' '.join(filter(None, [author.findtext(f'arxiv:{part}', '', OAI_NS)
+                                       for part in ('forenames', 'keyname', 'suffix')]))
+                for author in meta.iterfind('arxiv:authors/arxiv:author', OAI_NS)
+            ]
+            yield arxiv_id, Paper(
+                id=meta.findtext('arxiv:id', arxiv_id, OAI_NS),
+                title=_clean(meta.findtext('arxiv:title', '', OAI_NS)),
+                authors=', '.join(authors),
+                abstract=_clean(meta.findtext('arxiv:abstract', '', OAI_NS)),
+                categories=meta.findtext('arxiv:categories', '', OAI_NS),
+                updated=meta.findtext('arxiv:updated', None, OAI_NS) or meta.findtext('arxiv:created', datestamp, OAI_NS)
+            ), datestamp
+
+        token = root.findtext('oai:ListRecords/oai:resumptionToken', None, OAI_NS)
+        if not token:
+            return
+        params = {'verb': 'ListRecords', 'resumptionToken': token}
+
+
+class ArxivIndex:
+    """Paper metadata and the full-text index over it, in one SQLite database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared across threads, and searches run in worker threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path)
+        return connection
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT count(*) FROM papers').fetchone()[0]
+
+    def get_state(self, key: str) -> Optional[str]:
+        row = self._connection().execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        with self._connection() as connection:
+            connection.execute('INSERT INTO state (key, value) VALUES (?, ?) '
+                               'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (key, value))
+
+    def upsert(self, papers: Iterable[Paper]) -> int:
+        connection, count, batch = self._connection(), 0, []
+
+        def write():
+            with connection:
+                connection.executemany(
+                    'INSERT INTO papers (id, title, authors, abstract, categories, updated) '
+                    'VALUES (:id, :title, :authors, :abstract, :categories, :updated) '
+                    'ON CONFLICT(id) DO UPDATE SET title = excluded.title, authors = excluded.authors, '
+                    'abstract = excluded.abstract, categories = excluded.categories, updated = excluded.updated',
+                    batch)
+
+        for paper in papers:
+            batch.append(paper)
+            if len(batch) >= BATCH_SIZE:
+                write()
+                count, batch = count + len(batch), []
+        if batch:
+            write()
+        return count + len(batch)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._connection() as connection:
+            connection.executemany('DELETE FROM papers WHERE id = ?', ((i,) for i in ids))
+
+    def ingest_snapshot(self, path: str, categories: Optional[Sequence[str]] = None) -> int:
+        latest = ''
+
+        def papers():
+            nonlocal latest
+            for paper in read_snapshot(path, categories):
+                latest = max(latest, paper['updated'])
+                yield paper
+
+        count = self.upsert(papers())
+        if latest > (self.get_state('harvested_through') or ''):
+            self.set_state('harvested_through', latest)
+        if categories:
+            self.set_state('categories', ' '.join(categories))
+        return count
+
+    def update(self, since: Optional[str] = None, http: Optional[httpx.Client] = None) -> Tuple[int, int]:
+        """Harvest changes since `since`, or since the last ingest or update; (upserted, deleted)."""
+        since = since or self.get_state('harvested_through')
+        if not since:
+            raise ValueError("Nothing ingested yet; ingest a snapshot or pass a start date")
+        categories = (self.get_state('categories') or '').split()
+        upserted, deleted, latest = [], [], since
+        with nullcontext(http) if http else httpx.Client(timeout=60, follow_redirects=True) as client:
+            for arxiv_id, paper, datestamp in harvest(since, client):
+                latest = max(latest, datestamp)
+                if paper is None:
+                    deleted.append(arxiv_id)
+                elif in_categories(paper['categories'], categories):
+                    upserted.append(paper)
+        count = self.upsert(upserted)
+        self.delete(deleted)
+        self.set_state('harvested_through', latest)
+        return count, len(deleted)
+
+    def _papers_with(self, term: str, limit: int) -> int:
+        """Papers containing `term`, counting no further than `limit`."""
+        return self._connection().execute(
+            'SELECT count(*) FROM (SELECT 1 FROM papers_fts WHERE papers_fts MATCH ? LIMIT ?)', (term, limit)
+        ).fetchone()[0]
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[Paper, float]]:
+        """The `k` best papers for `query`, with the share of query terms each contains."""
+        query_terms = list(dict.fromkeys(terms(query)))
+        if not query_terms:
+            return []
+        connection = self._connection()
+        quoted = [f'"{term}"' for term in query_terms]
+        sql = ('SELECT p.rowid, p.id, p.title, p.authors, p.abstract, p.categories, p.updated '
+               'FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid '
+               f'WHERE papers_fts MATCH ? ORDER BY bm25(papers_fts, {TITLE_WEIGHT}, 1.0) LIMIT ?')
+        # Papers with every term first, which is cheap however common the terms are; then any of the rarer terms
+        rows = connection.execute(sql, (' AND '.join(quoted), k)).fetchall()
+        rare = [term for term in quoted if self._papers_with(term, RARE_TERM_PAPERS + 1) <= RARE_TERM_PAPERS]
+        if len(rows) < k and rare and len(quoted) > 1:
+            seen = {row[0] for row in rows}
+            rows += [row for row in connection.execute(sql, (' OR '.join(rare), k)).fetchall()
+                     if row[0] not in seen][:k - len(rows)]
+        if not rows:
+            return []
+
+        matched = Counter()
+        rowids = [row[0] for row in rows]
+        placeholders = ', '.join('?' * len(rowids))
+        for term in quoted:
+            for (rowid,) in connection.execute(
+                    f'SELECT rowid FROM papers_fts WHERE papers_fts MATCH ? AND rowid IN ({placeholders})',
+                    (term, *rowids)):
+                matched[rowid] += 1
+        return [(Paper(id=arxiv_id, title=title, authors=authors, abstract=abstract, categories=categories,
+                       updated=updated), matched[rowid] / len(query_terms))
+                for rowid, arxiv_id, title, authors, abstract, categories, updated in rows]
+
+
+def to_document(paper: Paper, chars: int = CONTENT_CHARS) -> Document:
+    return Document(page_content=paper['abstract'][:chars], metadata={
+        'Entry ID': f"http://arxiv.org/abs/{paper['id']}",
+        'Published': date.fromisoformat(paper['updated'][:10]),
+        'Title': paper['title'],
+        'Authors': paper['authors']
+    })
+
+
+arxiv_index_stats = LocalIndexStats(ARXIV_INDEX_PATH)
+
+
+class LocalArxivRetriever(BaseRetriever):
+    """`ArxivRetriever` answered from an `ArxivIndex`, falling back to `fallback` on a miss."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: ArxivIndex
+    fallback: Optional[BaseRetriever] = None
+    load_max_docs: int = 3
+    doc_content_chars_max: int = CONTENT_CHARS
+    min_coverage: float = MIN_COVERAGE
+
+    def search(self, query: str) -> Optional[List[Document]]:
+        """Documents from the index, or None on a miss."""
+        start = time.perf_counter()
+        results = self.index.search(query, self.load_max_docs)
+        hit = bool(results) and max(coverage for _, coverage in results) >= self.min_coverage
+        docs = [to_document(paper, self.doc_content_chars_max) for paper, _ in results] if hit else None
+        arxiv_index_stats.record(hit, time.perf_counter() - start)
+        return docs
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        docs = self.search(query)
+        if docs is None and self.fallback is not None:
+            docs = self.fallback.invoke(query, config={'callbacks': run_manager.get_child()})
+        return docs or []
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        docs = await asyncio.to_thread(self.search, query)
+        if docs is None and self.fallback is not None:
+            docs = await self.fallback.ainvoke(query, config={'callbacks': run_manager.get_child()})
+        return docs or []
+
+
+def local_first(live: BaseRetriever) -> BaseRetriever:
+    """`live` behind the local index at ARXIV_INDEX_PATH, or `live` alone if there is none."""
+    if not ARXIV_INDEX_PATH:
+        return live
+    if not os.path.exists(ARXIV_INDEX_PATH):
+        logger.warning(f"Not using the arXiv index at {ARXIV_INDEX_PATH}: no such file")
+        return live
+    try:
+        index = ArxivIndex(ARXIV_INDEX_PATH)
+        papers = len(index)
+    except (sqlite3.Error, OSError) as e:
+        # A corrupt or locked database shouldn't stop the app from starting
+        logger.warning(f"Not using the arXiv index at {ARXIV_INDEX_PATH}: {e}")
+        return live
+    logger.info(f"Searching {papers} arXiv papers locally before the live API")
+    return LocalArxivRetriever(index=index, fallback=live, name=live.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build, update or query a local arXiv index")
+    parser.add_argument('--db', default=ARXIV_INDEX_PATH or 'data/arxiv.db')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='Load the bulk metadata snapshot')
+    ingest.add_argument('--snapshot', required=True, help='arxiv-metadata-oai-snapshot.json, optionally .gz')
+    ingest.add_argument('--categories', nargs='*', default=None, help="Only these categories, e.g. cs stat.ML")
+    update = commands.add_parser('update', help='Harvest changes from the OAI-PMH feed')
+    update.add_argument('--since', default=None, help='YYYY-MM-DD; defaults to the last ingest or update')
+    search = commands.add_parser('search', help='Query the index')
+    search.add_argument('query')
+    search.add_argument('-k', type=int, default=3)
+    args = parser.parse_args()
+
+    index = ArxivIndex(args.db)
+    start = time.perf_counter()
+    if args.command == 'ingest':
+        count = index.ingest_snapshot(args.snapshot, args.categories)
+        print(f"Ingested {count} papers into {args.db} in {time.perf_counter() - start:.0f}s, {len(index)} in total")
+    elif args.command == 'update':
+        upserted, deleted = index.update(args.since)
+        print(f"Updated {upserted} and deleted {deleted} papers through {index.get_state('harvested_through')} "
+              f"in {time.perf_counter() - start:.0f}s")
+    else:
+        results = index.search(args.query, args.k)
+        print(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        for paper, coverage in results:
+            print(f"{coverage:.0%}  {paper['id']}  {paper['title']}")
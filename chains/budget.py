@@ -0,0 +1,149 @@
+"""Per-check budgets for the statement checker.
+
+A check gets a `BudgetTracker` through its run config. The tracker is also a
+callback handler, so it sees the token usage of every LLM call made under the
+check, judge included, and prices it. The graph checks it before each
+supervisor turn: once a check is out of hops, tokens, time or money, the
+supervisor stops researching and the judge rules on the evidence gathered so
+far. Review and escalations are skipped, and the verdict is marked
+`budget_limited`, instead of the check failing.
+
+Budgets are named per entry point: `interactive` for a user waiting on the
+API, `bulk` for article ingestion jobs.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from config import settings
+
+
+@dataclass(frozen=True)
+class Budget:
+    max_hops: int  # Supervisor turns
+    max_tokens: int
+    deadline_seconds: float
+    max_cost_usd: float
+
+
+# Overridden per field by settings.CHECK_BUDGETS
+DEFAULT_BUDGETS = {
+    'interactive': Budget(max_hops=4, max_tokens=40_000, deadline_seconds=60, max_cost_usd=0.20),
+    'bulk': Budget(max_hops=6, max_tokens=60_000, deadline_seconds=240, max_cost_usd=0.30),
+}
+
+# USD per million (input, output) tokens
+PRICES = {
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+}
+FALLBACK_PRICE = PRICES['gpt-4o']
+LOW_BUDGET_SHARE = 0.75  # A check past this share of any limit is running low
+
+
+def _configured_budgets() -> Dict[str, Budget]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for name, values in settings.CHECK_BUDGETS.items():
+        base = budgets.get(name, DEFAULT_BUDGETS['interactive'])
+        budgets[name] = Budget(**{**base.__dict__, **values})
+    return budgets
+
+
+BUDGETS = _configured_budgets()
+
+
+def _price(model: Optional[str]) -> tuple:
+    # Dated snapshots, e.g. gpt-4o-mini-2024-07-18, are priced as their base model
+    for name in sorted(PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            return PRICES[name]
+    return FALLBACK_PRICE
+
+
+def cost_usd(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = _price(model)
+    return (input_tokens * input_price + output_tokens * output_price) / 1e6
+
+
+class BudgetTracker(BaseCallbackHandler):
+    """Tokens, cost and elapsed time of one check, against its `Budget`."""
+    run_inline = True
+
+    def __init__(self, budget: Budget, name: str = ''):
+        self.budget = budget
+        self.name = name
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.cost_usd = 0.0
+        self.speculations = 0  # Judgements started alongside a supervisor turn
+        self.discarded_speculations = 0  # ... whose verdict went unused
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, 'message', None)
+                usage = getattr(message, 'usage_metadata', None)
+                if not usage:
+                    continue
+                model = (message.response_metadata or {}).get('model_name')
+                with self._lock:
+                    self.tokens += usage['total_tokens']
+                    self.cost_usd += cost_usd(model, usage['input_tokens'], usage['output_tokens'])
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def exhausted(self, hops: int = 0) -> Optional[str]:
+        """Which limit has been reached, or None while the check is within budget."""
+        if hops >= self.budget.max_hops:
+            return f"{hops} research turns"
+        if self.tokens >= self.budget.max_tokens:
+            return f"{self.tokens} tokens"
+        if self.elapsed >= self.budget.deadline_seconds:
+            return f"{self.elapsed:.0f}s elapsed"
+        if self.cost_usd >= self.budget.max_cost_usd:
+            return f"${self.cost_usd:.2f} spent"
+        return None
+
+    def running_low(self, hops: int = 0) -> Optional[str]:
+        """Which limit the check is on its last turn of, or past `LOW_BUDGET_SHARE` of, or None."""
+        if hops + 1 >= self.budget.max_hops:
+            return f"{hops} of {self.budget.max_hops} research turns"
+        if self.tokens >= LOW_BUDGET_SHARE * self.budget.max_tokens:
+            return f"{self.tokens} of {self.budget.max_tokens} tokens"
+        if self.elapsed >= LOW_BUDGET_SHARE * self.budget.deadline_seconds:
+            return f"{self.elapsed:.0f}s of {self.budget.deadline_seconds:.0f}s"
+        if self.cost_usd >= LOW_BUDGET_SHARE * self.budget.max_cost_usd:
+            return f"${self.cost_usd:.2f} of ${self.budget.max_cost_usd:.2f}"
+        return None
+
+    def record_speculation(self, used: bool) -> None:
+        with self._lock:
+            self.speculations += 1
+            if not used:
+                self.discarded_speculations += 1
+
+    def usage(self) -> Dict[str, Any]:
+        return {'tokens': self.tokens, 'cost_usd': round(self.cost_usd, 4), 'seconds': round(self.elapsed, 1),
+                'speculations': self.speculations, 'discarded_speculations': self.discarded_speculations}
+
+
+def budget_config(name: str) -> RunnableConfig:
+    """Run config enforcing the `name` budget on a check."""
+    tracker = BudgetTracker(BUDGETS[name], name)
+    return {
+        'configurable': {'budget': tracker},
+        'callbacks': [tracker],
+        # Leave the budget to end the research loop; a hop is at most three graph steps
+        'recursion_limit': tracker.budget.max_hops * 3 + 10
+    }
+
+
+def get_tracker(config: Optional[RunnableConfig]) -> Optional[BudgetTracker]:
+    return ((config or {}).get('configurable') or {}).get('budget')
@@ -0,0 +1,77 @@
+"""Model cascade for the statement checker's graph nodes.
+
+Each node has a list of models in `MODEL_POLICY`, cheapest first, which
+`settings.MODEL_POLICY` overrides per node. A check starts at tier 0 and moves
+up a tier when it escalates; every node then uses the model at that tier of its
+own list (or its last model). Escalations are counted here per node and
+reason, for cost analysis.
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Models per node, cheapest first, overridden per node by settings.MODEL_POLICY
+DEFAULT_POLICY = {
+    'supervisor': ['gpt-4o-mini', 'gpt-4o'],
+    'judge': ['gpt-4o-mini', 'gpt-4o'],
+    'review': ['gpt-4o']
+}
+FALLBACK_MODEL = 'gpt-4o'
+MIN_CONFIDENCE = settings.ESCALATION_MIN_CONFIDENCE  # Judge verdicts below this escalate
+
+
+def _configured_policy() -> Dict[str, List[str]]:
+    return {**DEFAULT_POLICY, **settings.MODEL_POLICY}
+
+
+MODEL_POLICY = _configured_policy()
+
+
+def node_model(node: str, tier: int) -> str:
+    models = MODEL_POLICY.get(node) or [FALLBACK_MODEL]
+    return models[min(tier, len(models) - 1)]
+
+
+def can_escalate(node: str, tier: int) -> bool:
+    """Whether moving up a tier would change the model `node` runs on."""
+    return node_model(node, tier + 1) != node_model(node, tier)
+
+
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.escalations: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record_call(self, node: str, model: str) -> None:
+        with self._lock:
+            self.calls[f"{node}:{model}"] += 1
+
+    def record_escalation(self, node: str, from_model: str, to_model: str, reason: str) -> Dict[str, Any]:
+        logger.info(f"Escalating {node} from {from_model} to {to_model}: {reason}")
+        with self._lock:
+            self.escalations[node][reason] += 1
+        return {'node': node, 'from_model': from_model, 'to_model': to_model, 'reason': reason}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'policy': MODEL_POLICY,
+                'calls': dict(self.calls),
+                'escalations': {node: dict(reasons) for node, reasons in self.escalations.items()}
+            }
+
+
+cascade_stats = CascadeStats()
+
+
+def judge_escalation_reason(verdict: Any) -> Optional[str]:
+    if str(verdict.verdict) == 'Uncertain':
+        return 'uncertain verdict'
+    if verdict.confidence is not None and verdict.confidence < MIN_CONFIDENCE:
+        return 'low confidence'
+    return None
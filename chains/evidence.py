@@ -0,0 +1,183 @@
+"""Evidence packing for the statement checker.
+
+Search tools used to hand the agents every retrieved document in full, and the
+supervisor re-sent all of it on every turn. Instead, retrieved documents are
+split into passages, the passages most relevant to the query are kept under a
+tiktoken budget, and each gets a citation id that is stable across hops (a
+hash of its source and text), so the same passage found twice is only counted
+once. The supervisor sees a one-line summary per passage; the judge gets the
+passage text, again capped by a budget.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, List
+
+import tiktoken
+from langchain_core.documents.base import Document
+from typing_extensions import TypedDict
+from config import settings
+
+
+PASSAGE_TOKENS = settings.EVIDENCE_PASSAGE_TOKENS  # Target passage size
+QUERY_TOKENS = settings.EVIDENCE_QUERY_TOKENS  # Kept per search call
+JUDGE_TOKENS = settings.EVIDENCE_JUDGE_TOKENS  # Evidence sent to the judge
+SUMMARY_CHARS = 160
+
+_TOKEN_RE = re.compile(r'\w+')
+_STOPWORDS = {
+    'the', 'and', 'for', 'that', 'with', 'this', 'from', 'was', 'were', 'are', 'has', 'have', 'had', 'its',
+    'his', 'her', 'their', 'they', 'been', 'which', 'who', 'will', 'would', 'than', 'more', 'also', 'into',
+    'about', 'after', 'over', 'not', 'but', 'said', 'says', 'most', 'some', 'such', 'there', 'when', 'where'
+}
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+class Passage(TypedDict):
+    id: str
+    title: str
+    source: str
+    text: str
+    score: float
+    tokens: int
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.encoding_for_model('gpt-4o')
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+def citation_id(prefix: str, source: str, text: str) -> str:
+    digest = hashlib.sha1('\n'.join([source, text]).encode()).hexdigest()
+    return f"{prefix}:{digest[:8]}"
+
+
+def _terms(text: str) -> List[str]:
+    return [term.casefold() for term in _TOKEN_RE.findall(text)]
+
+
+def content_terms(text: str) -> set:
+    return {t for t in _terms(text) if len(t) > 2 and t not in _STOPWORDS}
+
+
+def covers(query: str, passages: List[Passage], min_coverage: float) -> bool:
+    """Whether `passages` contain at least `min_coverage` of the content terms of `query`."""
+    terms = content_terms(query)
+    if not terms or not passages:
+        return False
+    covered = set().union(*(content_terms(f"{p['title']} {p['text']}") for p in passages)) & terms
+    return len(covered) >= min_coverage * len(terms)
+
+
+def split_passages(text: str, max_tokens: int = PASSAGE_TOKENS) -> List[str]:
+    """Paragraph-aligned chunks of about `max_tokens`; oversized paragraphs are split on sentences."""
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(s for s in _SENTENCE_RE.split(paragraph) if s.strip())
+
+    passages, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            passages.append(' '.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+
+def bm25_scores(query: str, texts: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """BM25 of `query` against `texts`, with document frequencies taken from `texts` themselves."""
+    docs = [_terms(text) for text in texts]
+    if not docs:
+        return []
+    avg_len = sum(len(doc) for doc in docs) / len(docs) or 1
+    df = Counter(term for doc in docs for term in set(doc))
+    scores = []
+    for doc in docs:
+        tf = Counter(doc)
+        score = 0.0
+        for term in set(_terms(query)):
+            if term not in tf:
+                continue
+            idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(doc) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def _title(doc: Document) -> str:
+    return doc.metadata.get('title') or doc.metadata.get('Title') or ''
+
+
+def _source(doc: Document) -> str:
+    return doc.metadata.get('source') or doc.metadata.get('Entry ID') or doc.metadata.get('url') or ''
+
+
+def pack_evidence(query: str, docs: List[Document], prefix: str, budget: int = QUERY_TOKENS) -> List[Passage]:
+    """The best passages of `docs` for `query`, highest scoring first, totalling at most `budget` tokens."""
+    candidates = []
+    for doc in docs:
+        title, source = _title(doc), _source(doc)
+        for text in split_passages(doc.page_content):
+            candidates.append(Passage(id=citation_id(prefix, source, text), title=title, source=source,
+                                      text=text, score=0.0, tokens=count_tokens(text)))
+    # Titles count towards relevance, so a passage from a well-matched article isn't ranked on its text alone
+    scores = bm25_scores(query, [f"{p['title']} {p['text']}" for p in candidates])
+    for passage, score in zip(candidates, scores):
+        passage['score'] = round(score, 3)
+    return select_passages(candidates, budget)
+
+
+def select_passages(passages: Iterable[Passage], budget: int) -> List[Passage]:
+    """Greedy by score under a token budget, skipping passages already selected under the same id."""
+    selected, seen, used = [], set(), 0
+    for passage in sorted(passages, key=lambda p: p['score'], reverse=True):
+        if passage['id'] in seen or used + passage['tokens'] > budget:
+            continue
+        selected.append(passage)
+        seen.add(passage['id'])
+        used += passage['tokens']
+    return selected
+
+
+def summarize_passages(passages: List[Passage]) -> str:
+    """Compact listing for the supervisor: citation id, title and the opening of each passage."""
+    if not passages:
+        return 'No relevant passages found.'
+    lines = []
+    for p in passages:
+        snippet = p['text']
+        if len(snippet) > SUMMARY_CHARS:
+            snippet = snippet[:SUMMARY_CHARS].rsplit(' ', 1)[0] + '...'
+        lines.append(f"[{p['id']}] {p['title']}: {snippet}")
+    return '\n'.join(lines)
+
+
+def format_evidence(statement: str, passages: List[Passage], budget: int = JUDGE_TOKENS) -> str:
+    """Passages for the judge under `budget` tokens, each under its citation id.
+
+    Passages come from different searches, whose scores aren't comparable, so they are re-ranked
+    against the statement itself before the budget is applied.
+    """
+    unique = list({p['id']: p for p in passages}.values())
+    scores = bm25_scores(statement, [f"{p['title']} {p['text']}" for p in unique])
+    ranked = [{**p, 'score': score} for p, score in zip(unique, scores)]
+    return '\n\n'.join(
+        f"[{p['id']}] {p['title']} ({p['source']})\n{p['text']}"
+        for p in select_passages(ranked, budget)
+    )
@@ -0,0 +1,216 @@
+"""Evidence memory: every passage we retrieve, kept in a persistent vector index.
+
+Research used to be thrown away after each check, except for the few
+references the judge keeps. `EvidenceMemory` embeds every passage the search
+tools and the research planner retrieve and stores it in Qdrant, on disk in
+local mode at `EVIDENCE_MEMORY_PATH` or on the Qdrant server at
+`EVIDENCE_MEMORY_URL`. Each entry carries its source, the query that found
+it, when it was retrieved and when it stops being fresh. Searches look in
+memory before paying for an external call: fresh passages from the same
+source that are similar to the query and cover enough of its terms answer
+it. So checks on recurring topics are increasingly answered from memory.
+
+How long a passage stays fresh depends on how fast its source changes
+(`MAX_AGE_DAYS`). Retrieving a passage again renews it without embedding it
+again. Local mode searches by brute force and suits up to some tens of
+thousands of passages; beyond that, or with several app processes, use a
+server.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import (
+    Distance, FieldCondition, Filter, MatchValue, PayloadSchemaType, PointStruct, Range, VectorParams
+)
+
+from chains.evidence import Passage, QUERY_TOKENS, covers, pack_evidence, select_passages
+from chains.llms import get_embeddings
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EVIDENCE_MEMORY_PATH = os.getenv('EVIDENCE_MEMORY_PATH', '')  # Local on-disk Qdrant, e.g. data/evidence_memory
+EVIDENCE_MEMORY_URL = os.getenv('EVIDENCE_MEMORY_URL', '')  # Or a Qdrant server; neither disables the memory
+COLLECTION = os.getenv('EVIDENCE_MEMORY_COLLECTION', 'evidence_memory')
+MIN_SIMILARITY = float(os.getenv('EVIDENCE_MEMORY_MIN_SIMILARITY', 0.45))  # Cosine, query to passage
+MIN_COVERAGE = float(os.getenv('EVIDENCE_MEMORY_MIN_COVERAGE', 0.7))  # Share of a query's terms remembered passages must contain
+EMBEDDING_MODEL = 'text-embedding-3-small'
+VECTOR_SIZE = 1536
+CANDIDATES = 20
+# How long a passage answers searches, per source: encyclopedic and scholarly text changes slowly, the web quickly
+MAX_AGE_DAYS = {'wiki': 90, 'arxiv': 365, 'web': 7}
+DAY = 24 * 60 * 60
+EMPTY_RECHECK_SECONDS = 60  # How long an empty collection is trusted to stay empty; another process may fill it
+
+
+def point_id(passage: Passage) -> str:
+    # Citation ids hash the source and text, so the same passage retrieved again is the same point
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, passage['id']))
+
+
+class EvidenceMemory:
+    """Retrieved passages in a Qdrant collection, searched by query embedding."""
+
+    def __init__(self, client: AsyncQdrantClient, embeddings: Embeddings, collection: str = COLLECTION,
+                 server: bool = False):
+        self.client = client
+        self.embeddings = embeddings
+        self.collection = collection
+        self.server = server
+        self._ready = False
+        self._setup = asyncio.Lock()
+        self._writes = set()
+        self._lock = threading.Lock()
+        self._has_passages: Optional[bool] = None
+        self._counted_at = 0.0
+        self.counters = {'searches': 0, 'hits': 0, 'embedded': 0, 'renewed': 0, 'errors': 0}
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += n
+
+    async def _ensure_collection(self) -> None:
+        if self._ready:
+            return
+        async with self._setup:
+            if self._ready:
+                return
+            if not await self.client.collection_exists(self.collection):
+                await self.client.create_collection(
+                    collection_name=self.collection,
+                    vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+                )
+                # Local mode has no payload indexes; it filters by scanning
+                if self.server:
+                    for field, schema in (('source', PayloadSchemaType.KEYWORD), ('expires_at', PayloadSchemaType.FLOAT)):
+                        await self.client.create_payload_index(self.collection, field, schema)
+            self._ready = True
+
+    async def _any_passages(self) -> bool:
+        """Whether the collection has any passages, so searches of an empty one don't pay for an embedding."""
+        if not self._has_passages and time.monotonic() - self._counted_at >= EMPTY_RECHECK_SECONDS:
+            self._has_passages = (await self.client.count(self.collection, exact=False)).count > 0
+            self._counted_at = time.monotonic()
+        return bool(self._has_passages)
+
+    async def search(self, prefix: str, query: str, budget: int = QUERY_TOKENS) -> Optional[List[Passage]]:
+        """Fresh remembered passages from `prefix` answering `query`, or None if they don't cover enough of it."""
+        self._count('searches')
+        try:
+            await self._ensure_collection()
+            if not await self._any_passages():
+                return None
+            vector = await self.embeddings.aembed_query(query)
+            result = await self.client.query_points(
+                collection_name=self.collection,
+                query=vector,
+                query_filter=Filter(must=[
+                    FieldCondition(key='source', match=MatchValue(value=prefix)),
+                    FieldCondition(key='expires_at', range=Range(gt=time.time())),
+                ]),
+                limit=CANDIDATES,
+                score_threshold=MIN_SIMILARITY,
+                with_payload=True,
+            )
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Evidence memory search failed, searching {prefix} instead: {e}")
+            return None
+
+        passages = [
+            Passage(id=point.payload['id'], title=point.payload['title'], source=point.payload['url'],
+                    text=point.payload['text'], score=round(point.score, 3), tokens=point.payload['tokens'])
+            for point in result.points
+        ]
+        selected = select_passages(passages, budget)
+        if not covers(query, selected, MIN_COVERAGE):
+            return None
+        self._count('hits')
+        return selected
+
+    def remember(self, prefix: str, query: str, docs: List[Document]) -> None:
+        """Store the passages of `docs` in the background, so the search returning them isn't held up."""
+        if not docs:
+            return
+        task = asyncio.create_task(self._store(prefix, query, docs))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _store(self, prefix: str, query: str, docs: List[Document]) -> None:
+        passages = {point_id(p): p for p in pack_evidence(query, docs, prefix, budget=10 ** 9)}
+        now = time.time()
+        max_age_days = MAX_AGE_DAYS.get(prefix, min(MAX_AGE_DAYS.values()))
+        freshness = {'retrieved_at': now, 'expires_at': now + max_age_days * DAY, 'max_age_days': max_age_days}
+        try:
+            await self._ensure_collection()
+            known = {str(point.id) for point in await self.client.retrieve(
+                self.collection, ids=list(passages), with_payload=False, with_vectors=False)}
+            if known:
+                await self.client.set_payload(self.collection, payload=freshness, points=list(known))
+            new = {pid: p for pid, p in passages.items() if pid not in known}
+            if new:
+                vectors = await self.embeddings.aembed_documents([f"{p['title']}\n{p['text']}" for p in new.values()])
+                await self.client.upsert(self.collection, points=[
+                    PointStruct(id=pid, vector=vector, payload={
+                        'id': p['id'], 'title': p['title'], 'url': p['source'], 'text': p['text'],
+                        'tokens': p['tokens'], 'source': prefix, 'query': query, **freshness
+                    })
+                    for (pid, p), vector in zip(new.items(), vectors)
+                ])
+                self._has_passages = True
+            self._count('renewed', len(known))
+            self._count('embedded', len(new))
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Storing {len(passages)} {prefix} passages in evidence memory failed: {e}")
+
+    async def prune(self) -> None:
+        """Delete passages that have gone stale."""
+        await self._ensure_collection()
+        await self.client.delete(self.collection, points_selector=Filter(must=[
+            FieldCondition(key='expires_at', range=Range(lte=time.time()))
+        ]))
+        self._has_passages, self._counted_at = None, 0.0
+
+    async def close(self) -> None:
+        """Finish storing what has been retrieved, then close the client."""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        await self.client.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        try:
+            await self._ensure_collection()
+            passages = (await self.client.count(self.collection, exact=True)).count
+        except Exception:
+            passages = None
+        return {
+            'store': EVIDENCE_MEMORY_URL or EVIDENCE_MEMORY_PATH,
+            'passages': passages,
+            **counters,
+            'hit_rate': round(counters['hits'] / counters['searches'], 3) if counters['searches'] else 0.0
+        }
+
+
+def open_memory() -> Optional[EvidenceMemory]:
+    if EVIDENCE_MEMORY_URL:
+        client = AsyncQdrantClient(url=EVIDENCE_MEMORY_URL, api_key=os.getenv('QDRANT_API_KEY'))
+    elif EVIDENCE_MEMORY_PATH:
+        client = AsyncQdrantClient(path=EVIDENCE_MEMORY_PATH)
+    else:
+        return None
+    return EvidenceMemory(client, get_embeddings(EMBEDDING_MODEL), server=bool(EVIDENCE_MEMORY_URL))
+
+
+memory = open_memory()
@@ -0,0 +1,238 @@
+"""Article-level evidence pool shared by the statement checks of one article.
+
+Statements extracted from one article mostly mention the same people, places
+and events, and each statement's agent used to search for them separately.
+`plan_research` groups an article's statements by the named entities they
+share and retrieves evidence once per group into an `EvidencePool`. The search
+tools then look in the pool first: a query whose content terms are covered by
+pooled passages is answered from the pool, and only otherwise goes to the
+external retriever, whose results are added to the pool for the statements
+still to come.
+
+When statements arrive one at a time, as extraction streams, a
+`ResearchPlanner` does the same per entity: the first time a statement shares
+an entity with an earlier one, that entity is searched once, and the
+statement's check waits for it. At most `PLAN_MAX_SEARCHES` entities or
+groups are searched per article, since every planned search is a paid call
+whether or not a statement's agent would have made it.
+"""
+import asyncio
+import logging
+import re
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents.base import Document
+from langchain_core.runnables import RunnableConfig
+
+from chains.evidence import Passage, QUERY_TOKENS, bm25_scores, covers, pack_evidence, select_passages
+from chains.evidence_memory import memory
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MIN_COVERAGE = float(os.getenv('EVIDENCE_POOL_MIN_COVERAGE', 0.7))  # Share of a query's terms pooled passages must contain
+PLAN_SOURCES = ('wiki', 'web')  # Searched once per statement group by the planner
+PLAN_QUERY_ENTITIES = 3
+PLAN_MAX_SEARCHES = 8  # Entities (or statement groups) searched by the planner per article
+
+# Capitalised word runs, allowing lower-case joiners inside names ("Bank of England")
+_ENTITY_RE = re.compile(r"\b[A-Z][\w'’.-]*(?:\s+(?:of|the|de|la|and|for)?\s*[A-Z][\w'’.-]*)*")
+# Sentence-initial words that are capitalised without being names
+_NOT_ENTITIES = {'The', 'A', 'An', 'In', 'On', 'At', 'It', 'This', 'That', 'These', 'Those', 'He', 'She',
+                 'They', 'We', 'His', 'Her', 'Their', 'Its', 'According', 'After', 'Before', 'During', 'As'}
+# What precedes a word opening a sentence: nothing, or sentence-ending punctuation, then any opening quotes
+_SENTENCE_START_RE = re.compile(r"(?:^|[.!?][\"'”’)]*\s)\s*[\"'“‘(]*$")
+
+
+def entities(text: str) -> List[str]:
+    """Names in `text`. A lone capitalised word opening a sentence ("However", "Officials") is left out,
+    as it is more often an ordinary word than a name."""
+    found = []
+    for match in _ENTITY_RE.finditer(text):
+        opens_sentence = _SENTENCE_START_RE.search(text[:match.start()]) is not None
+        for words in _sentence_runs(match.group().split()):
+            while words and words[0] in _NOT_ENTITIES:
+                words = words[1:]
+                opens_sentence = False
+            if len(words) > 1 or (words and not opens_sentence):
+                found.append(' '.join(words))
+            opens_sentence = True
+    return found
+
+
+def _sentence_runs(words: List[str]) -> List[List[str]]:
+    # A run of capitalised words can cross a full stop ("... the Bank of England. Monday ..."): split it
+    # there, dropping the stop but keeping those of abbreviations ("U.S.")
+    runs, run = [], []
+    for word in words:
+        if word.endswith('.') and word.count('.') == 1:
+            run.append(word[:-1])
+            runs.append(run)
+            run = []
+        else:
+            run.append(word)
+    return runs + [run] if run else runs
+
+
+def group_statements(statements: Sequence[str]) -> List[List[int]]:
+    """Indexes of `statements` grouped by shared entities (connected components), largest group first."""
+    parent = list(range(len(statements)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    first_seen: Dict[str, int] = {}
+    for i, statement in enumerate(statements):
+        for entity in entities(statement):
+            key = entity.casefold()
+            if key in first_seen:
+                parent[find(i)] = find(first_seen[key])
+            else:
+                first_seen[key] = i
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(statements)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def group_query(statements: Sequence[str]) -> str:
+    """The entities most of the group's statements mention."""
+    counts = Counter(entity for st in statements for entity in dict.fromkeys(entities(st)))
+    return ' '.join(entity for entity, _ in counts.most_common(PLAN_QUERY_ENTITIES))
+
+
+class EvidencePool:
+    """Passages retrieved for one article, per source, with counts of where searches were answered."""
+
+    def __init__(self, article_id: Optional[int] = None):
+        self.article_id = article_id
+        self.passages: Dict[str, Dict[str, Passage]] = {}
+        self.planned_calls = 0
+        self.external_calls = 0
+        self.pool_hits = 0
+        self.memory_hits = 0  # Searches the pool couldn't answer that evidence memory did
+
+    def add(self, prefix: str, query: str, docs: List[Document]) -> None:
+        # Everything retrieved is kept, not just what fits one query's budget
+        for passage in pack_evidence(query, docs, prefix, budget=10 ** 9):
+            self.passages.setdefault(prefix, {})[passage['id']] = passage
+
+    def search(self, prefix: str, query: str, budget: int = QUERY_TOKENS) -> Optional[List[Passage]]:
+        """The pooled passages answering `query`, or None if they don't cover enough of it."""
+        candidates = list(self.passages.get(prefix, {}).values())
+        if not candidates:
+            return None
+        scores = bm25_scores(query, [f"{p['title']} {p['text']}" for p in candidates])
+        ranked = [{**p, 'score': round(score, 3)} for p, score in zip(candidates, scores) if score > 0]
+        selected = select_passages(ranked, budget)
+        return selected if covers(query, selected, MIN_COVERAGE) else None
+
+    def stats(self) -> Dict[str, Any]:
+        searches = self.external_calls - self.planned_calls + self.pool_hits + self.memory_hits
+        return {
+            'article_id': self.article_id,
+            'agent_searches': searches,
+            'answered_from_pool': self.pool_hits,
+            'answered_from_memory': self.memory_hits,
+            'external_calls': self.external_calls,
+            'planned_calls': self.planned_calls,
+            'external_calls_saved': searches - self.external_calls,
+            'passages': sum(len(p) for p in self.passages.values())
+        }
+
+
+async def plan_research(pool: EvidencePool, statements: Sequence[str], retrievers: Dict[str, Any]) -> None:
+    """Retrieve evidence once for each of the largest groups of two or more statements sharing an entity."""
+    planned = 0
+    for group in group_statements(statements):
+        if len(group) < 2 or planned >= PLAN_MAX_SEARCHES:
+            break
+        query = group_query([statements[i] for i in group])
+        if not query:
+            continue
+        planned += 1
+        await _retrieve(pool, query, retrievers)
+
+
+async def _retrieve(pool: EvidencePool, query: str, retrievers: Dict[str, Any]) -> None:
+    for prefix in PLAN_SOURCES:
+        docs = await retrievers[prefix].ainvoke(query)
+        if memory:
+            memory.remember(prefix, query, docs)
+        pool.planned_calls += 1
+        pool.external_calls += 1
+        pool.add(prefix, query, docs)
+
+
+class ResearchPlanner:
+    """`plan_research` for statements that arrive one at a time."""
+
+    def __init__(self, pool: EvidencePool, retrievers: Dict[str, Any]):
+        self.pool = pool
+        self.retrievers = retrievers
+        self._mentions: Counter = Counter()
+        self._planned: Dict[str, asyncio.Task] = {}
+
+    async def add(self, statement: str) -> None:
+        """Wait until the entities `statement` shares with earlier statements are in the pool."""
+        shared = []
+        for entity in dict.fromkeys(entities(statement)):
+            key = entity.casefold()
+            self._mentions[key] += 1
+            if self._mentions[key] < 2:
+                continue
+            if key not in self._planned:
+                if len(self._planned) >= PLAN_MAX_SEARCHES:
+                    continue
+                self._planned[key] = asyncio.create_task(self._plan(entity))
+            shared.append(self._planned[key])
+        await asyncio.gather(*shared)
+
+    async def _plan(self, entity: str) -> None:
+        try:
+            await _retrieve(self.pool, entity, self.retrievers)
+        except Exception as e:
+            # The statements' agents search for themselves instead
+            logger.error(f"Research planning for {entity!r} failed for article {self.pool.article_id}: {e}")
+
+
+def get_pool(config: Optional[RunnableConfig]) -> Optional[EvidencePool]:
+    return ((config or {}).get('configurable') or {}).get('evidence_pool')
+
+
+class EvidencePoolStats:
+    """Pool results of recently checked articles, for the admin stats endpoint."""
+
+    def __init__(self, maxlen: int = 100):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=maxlen)
+
+    def record(self, pool: EvidencePool) -> Dict[str, Any]:
+        stats = pool.stats()
+        with self._lock:
+            self.recent.append(stats)
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = list(self.recent)
+        searches = sum(s['agent_searches'] for s in recent)
+        external = sum(s['external_calls'] for s in recent)
+        return {
+            'articles': len(recent),
+            'agent_searches': searches,
+            'external_calls': external,
+            'external_call_reduction': round(1 - external / searches, 3) if searches else 0.0,
+            'recent': recent[-10:]
+        }
+
+
+evidence_pool_stats = EvidencePoolStats()
@@ -0,0 +1,303 @@
+"""Pooled HTTP clients for every external source.
+
+Each retriever used to bring its own client library and connections: the
+`wikipedia` and `arxiv` packages made blocking `requests` calls without
+session reuse, `TavilySearchAPIRetriever` built a new client per call, and
+every `ChatOpenAI` opened its own connection pool. `HTTPClients` owns one
+keep-alive httpx client per service, sync and async, over HTTP/2 where the
+server supports it (and the h2 package is installed). OpenAI models,
+embeddings and the Wikipedia, arXiv and Tavily retrievers all take their
+connections from it.
+
+The app opens the clients at startup and closes their connection pools at
+shutdown; outside the app they are opened on first use. Every client's transport is metered,
+so `stats()` can report requests, requests in flight and the open, busy and
+idle connections of each pool.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 100))  # Per service
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', 20))  # Per service
+KEEPALIVE_SECONDS = float(os.getenv('HTTP_KEEPALIVE_SECONDS', 60))
+# The OpenAI SDK sets its own per-request timeouts
+TIMEOUTS = {
+    'openai': httpx.Timeout(600, connect=5),
+    'tavily': httpx.Timeout(60, connect=5),
+    'wikipedia': httpx.Timeout(30, connect=5),
+    'arxiv': httpx.Timeout(60, connect=5),
+}
+USER_AGENT = 'foxcheck/1.0 (statement fact-checker)'
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+class PoolMetrics:
+    """Request counts of one service's clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finished(self, error: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += error
+
+
+class _Finish:
+    """Calls `metrics.finished` once, however many times the response is closed."""
+
+    def __init__(self, metrics: PoolMetrics):
+        self.metrics = metrics
+        self.done = False
+
+    def __call__(self, error: bool = False) -> None:
+        if not self.done:
+            self.done = True
+            self.metrics.finished(error)
+
+
+class _MeteredStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, finish: _Finish):
+        self._stream = stream
+        self._finish = finish
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._finish()
+
+
+class _AsyncMeteredStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, finish: _Finish):
+        self._stream = stream
+        self._finish = finish
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._finish()
+
+
+def _pool(transport: Union[httpx.HTTPTransport, httpx.AsyncHTTPTransport]) -> Any:
+    # httpx keeps its httpcore pool private; pinned in requirements.txt to versions that have it
+    return getattr(transport, '_pool', None)
+
+
+class MeteredTransport(httpx.BaseTransport):
+    """HTTPTransport counting requests as in flight until their response is closed.
+
+    Closing it closes the connection pool, and the next request opens a new
+    one, so clients handed out (and kept by cached models) stay usable.
+    """
+
+    def __init__(self, metrics: PoolMetrics, **options):
+        self.metrics = metrics
+        self.options = options
+        self._lock = threading.Lock()
+        self.transport: Optional[httpx.HTTPTransport] = None
+
+    def _transport(self) -> httpx.HTTPTransport:
+        with self._lock:
+            if self.transport is None:
+                self.transport = httpx.HTTPTransport(**self.options)
+            return self.transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._transport()
+        self.metrics.started()
+        finish = _Finish(self.metrics)
+        try:
+            response = transport.handle_request(request)
+        except BaseException:
+            finish(error=True)
+            raise
+        response.stream = _MeteredStream(response.stream, finish)
+        return response
+
+    def pools(self) -> List[Any]:
+        return [_pool(self.transport)] if self.transport is not None else []
+
+    def close(self) -> None:
+        with self._lock:
+            transport, self.transport = self.transport, None
+        if transport is not None:
+            transport.close()
+
+
+class AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    """AsyncHTTPTransport counting requests as in flight until their response is closed.
+
+    Connections belong to the event loop that opened them, so there is one
+    pool per loop: the app's, plus any a script or worker thread runs with
+    `asyncio.run`. As with `MeteredTransport`, closing it only closes the pools.
+    """
+
+    def __init__(self, metrics: PoolMetrics, **options):
+        self.metrics = metrics
+        self.options = options
+        self._lock = threading.Lock()
+        self.transports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._drop_closed()
+            transport = self.transports.get(loop)
+            if transport is None:
+                transport = self.transports[loop] = httpx.AsyncHTTPTransport(**self.options)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._transport()
+        self.metrics.started()
+        finish = _Finish(self.metrics)
+        try:
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            finish(error=True)
+            raise
+        response.stream = _AsyncMeteredStream(response.stream, finish)
+        return response
+
+    def _drop_closed(self) -> None:
+        # A finished `asyncio.run` leaves its pool behind; its connections went with the loop
+        for loop in [loop for loop in self.transports if loop.is_closed()]:
+            del self.transports[loop]
+
+    def pools(self) -> List[Any]:
+        with self._lock:
+            self._drop_closed()
+            return [_pool(transport) for transport in self.transports.values()]
+
+    async def aclose(self) -> None:
+        """Close the current loop's pool; those of other loops can't be closed from here and are dropped."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self.transports.pop(loop, None)
+            self.transports.clear()
+        if transport is not None:
+            await transport.aclose()
+
+
+def _connections(transport: Union[MeteredTransport, AsyncMeteredTransport, None]) -> Optional[Dict[str, int]]:
+    """Open, busy and idle connections in a transport's pools, or None if httpcore doesn't expose them."""
+    pools = transport.pools() if transport else []
+    if any(pool is None or not hasattr(pool, 'connections') for pool in pools):
+        return None
+    try:
+        connections = [connection for pool in pools for connection in pool.connections]
+        idle = sum(1 for connection in connections if connection.is_idle())
+    except AttributeError:
+        return None
+    return {'open': len(connections), 'busy': len(connections) - idle, 'idle': idle}
+
+
+class HTTPClients:
+    """One pooled sync and async httpx client per external service."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, MeteredTransport] = {}
+        self._async_transports: Dict[str, AsyncMeteredTransport] = {}
+        self.metrics: Dict[str, PoolMetrics] = {service: PoolMetrics() for service in TIMEOUTS}
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            'http2': HTTP2,
+            'limits': httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                   keepalive_expiry=KEEPALIVE_SECONDS),
+            'retries': 1,  # Reconnects only; the callers retry failed requests
+        }
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        with self._lock:
+            client = self._async_clients.get(service)
+            if client is None:
+                transport = self._async_transports[service] = AsyncMeteredTransport(self.metrics[service], **self._options())
+                client = self._async_clients[service] = httpx.AsyncClient(
+                    transport=transport,
+                    timeout=TIMEOUTS[service], headers={'User-Agent': USER_AGENT}, follow_redirects=True)
+            return client
+
+    def get_sync(self, service: str) -> httpx.Client:
+        with self._lock:
+            client = self._clients.get(service)
+            if client is None:
+                transport = self._transports[service] = MeteredTransport(self.metrics[service], **self._options())
+                client = self._clients[service] = httpx.Client(
+                    transport=transport,
+                    timeout=TIMEOUTS[service], headers={'User-Agent': USER_AGENT}, follow_redirects=True)
+            return client
+
+    def open(self) -> None:
+        """Create every client up front, at app startup."""
+        for service in TIMEOUTS:
+            self.get(service)
+            self.get_sync(service)
+        logger.info(f"Opened pooled HTTP clients for {', '.join(TIMEOUTS)} (HTTP/2: {HTTP2})")
+
+    async def aclose(self) -> None:
+        """Close every connection pool, at app shutdown. The clients reconnect if used again."""
+        with self._lock:
+            transports, async_transports = list(self._transports.values()), list(self._async_transports.values())
+        for transport in transports:
+            transport.close()
+        for async_transport in async_transports:
+            await async_transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            transports, async_transports = dict(self._transports), dict(self._async_transports)
+        stats = {'http2': HTTP2, 'max_connections': MAX_CONNECTIONS, 'services': {}}
+        for service, metrics in self.metrics.items():
+            with metrics._lock:
+                requests = {'requests': metrics.requests, 'errors': metrics.errors,
+                            'in_flight': metrics.in_flight, 'max_in_flight': metrics.max_in_flight}
+            sync, async_ = _connections(transports.get(service)), _connections(async_transports.get(service))
+            # Busy connections where httpcore reports them, else requests in flight, counted here
+            busy = sync['busy'] + async_['busy'] if sync and async_ else requests['in_flight']
+            stats['services'][service] = {
+                **requests,
+                'connections': {'sync': sync, 'async': async_},
+                'utilization': round(busy / (2 * MAX_CONNECTIONS), 3)
+            }
+        return stats
+
+
+http_clients = HTTPClients()
@@ -0,0 +1,45 @@
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from chains.rate_limiter import get_rate_limiter, TokenUsageHandler
+from chains.http_clients import http_clients
+
+_models = {}
+
+
+def get_chat_model(model: str, **kwargs) -> ChatOpenAI:
+    """ChatOpenAI sharing the process-wide rate limiter for `model`.
+
+    Use this instead of constructing ChatOpenAI directly so every call site
+    is throttled against the same requests/tokens-per-minute budget, and
+    sends its requests over the pooled OpenAI connections. Models are built
+    once per configuration and reused, as nodes ask for one on every call.
+    """
+    try:
+        key = (model, tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        key = None
+    if key in _models:
+        return _models[key]
+
+    limiter = get_rate_limiter(model)
+    llm = ChatOpenAI(
+        model=model,
+        rate_limiter=limiter,
+        callbacks=[TokenUsageHandler(limiter)],
+        stream_usage=True,
+        http_client=http_clients.get_sync('openai'),
+        http_async_client=http_clients.get('openai'),
+        **kwargs
+    )
+    if key is not None:
+        _models[key] = llm
+    return llm
+
+
+def get_embeddings(model: str) -> OpenAIEmbeddings:
+    """OpenAIEmbeddings over the pooled OpenAI connections."""
+    return OpenAIEmbeddings(
+        model=model,
+        http_client=http_clients.get_sync('openai'),
+        http_async_client=http_clients.get('openai')
+    )
@@ -2,6 +2,7 @@ from langchain_core.output_parsers import PydanticToolsParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from dspy.predict.langchain import LangChainPredict
+from functools import lru_cache
 import dspy
 from operator import itemgetter
 from typing import Annotated
@@ -10,12 +11,12 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from chains.llms import get_chat_model
 
 lm = dspy.LM('openai/gpt-4o', max_tokens=5000)
 dspy.configure(lm=lm)
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0.1, streaming=True, name='query_llm')
+llm = get_chat_model("gpt-4o", temperature=0.1, streaming=True, name='query_llm')
 
 
 class QueryOutput(BaseModel):
@@ -58,10 +59,13 @@ chain = (
     | get_query
 ).with_config({"run_name": "Get Query"})
 
-dspy_chain = (
-    LangChainPredict(prompt, llm.bind_tools(tools))
-    | PydanticToolsParser(tools=tools, first_tool_only=True)
-)
+@lru_cache(maxsize=None)
+def get_dspy_chain():
+    """The chain wrapped for dspy optimisation. Built on first use: LangChainPredict calls the model when constructed."""
+    return (
+        LangChainPredict(prompt, llm.bind_tools(tools))
+        | PydanticToolsParser(tools=tools, first_tool_only=True)
+    )
 
 
 def get_query(content: str) -> str:
@@ -0,0 +1,189 @@
+"""Process-wide OpenAI rate limiting.
+
+Every chat model built through `chains.llms.get_chat_model` shares one
+`ModelRateLimiter` per model name. It is a token bucket on both requests per
+minute and tokens per minute: each request takes a request slot and reserves
+an estimated token count up front, then `TokenUsageHandler` settles the
+difference once the real usage comes back. Callers wait in the limiter
+instead of tripping 429s.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+from config import settings
+
+
+# (requests per minute, tokens per minute) per model, overridden per model by settings.OPENAI_RATE_LIMITS
+DEFAULT_LIMITS = {
+    'gpt-4o': (5000, 450_000),
+    'gpt-4o-mini': (5000, 2_000_000),
+}
+FALLBACK_LIMITS = (500, 200_000)
+BURST_SECONDS = 10  # Bucket capacity, in seconds' worth of the per-minute rate
+TOKENS_PER_REQUEST = 2000  # Reserved up front, settled against actual usage
+
+
+class ModelRateLimiter(BaseRateLimiter):
+    """Token bucket on requests/minute and tokens/minute for a single model."""
+
+    def __init__(self, model: str, requests_per_minute: int, tokens_per_minute: int,
+                 tokens_per_request: int = TOKENS_PER_REQUEST):
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_rate = requests_per_minute / 60
+        self.token_rate = tokens_per_minute / 60
+        self.request_capacity = max(1.0, self.request_rate * BURST_SECONDS)
+        self.token_capacity = max(1.0, self.token_rate * BURST_SECONDS)
+        self.tokens_per_request = min(tokens_per_request, self.token_capacity)
+
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.tokens_used = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        self._requests = min(self.request_capacity, self._requests + elapsed * self.request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self.token_rate)
+
+    def _try_acquire(self) -> float:
+        """Take a request slot and reserve tokens. Returns 0 on success, else seconds until it could succeed."""
+        with self._lock:
+            self._refill()
+            if self._requests >= 1 and self._tokens >= self.tokens_per_request:
+                self._requests -= 1
+                self._tokens -= self.tokens_per_request
+                return 0.0
+            wait_requests = (1 - self._requests) / self.request_rate if self._requests < 1 else 0.0
+            wait_tokens = (self.tokens_per_request - self._tokens) / self.token_rate if self._tokens < self.tokens_per_request else 0.0
+            return max(wait_requests, wait_tokens, 0.01)
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self.acquired += 1
+            if waited > 0.001:
+                self.throttled += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        start = time.monotonic()
+        delay = self._try_acquire()
+        if delay and not blocking:
+            return False
+        if delay:
+            with self._lock:
+                self.waiting += 1
+            try:
+                while delay:
+                    time.sleep(delay)
+                    delay = self._try_acquire()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        self._record_wait(time.monotonic() - start)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        start = time.monotonic()
+        delay = self._try_acquire()
+        if delay and not blocking:
+            return False
+        if delay:
+            with self._lock:
+                self.waiting += 1
+            try:
+                while delay:
+                    await asyncio.sleep(delay)
+                    delay = self._try_acquire()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        self._record_wait(time.monotonic() - start)
+        return True
+
+    def record_usage(self, tokens: Optional[int]) -> None:
+        """Settle a request's reservation against the tokens it actually used (None refunds it)."""
+        with self._lock:
+            self._refill()
+            self._tokens += self.tokens_per_request - (tokens or 0)
+            self._tokens = min(self._tokens, self.token_capacity)
+            self.tokens_used += tokens or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {
+                'requests_per_minute': self.requests_per_minute,
+                'tokens_per_minute': self.tokens_per_minute,
+                'queue_depth': self.waiting,
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'avg_wait_seconds': round(self.wait_seconds / self.throttled, 3) if self.throttled else 0.0,
+                'max_wait_seconds': round(self.max_wait_seconds, 3),
+                'tokens_used': self.tokens_used,
+                'available_requests': round(self._requests, 1),
+                'available_tokens': round(self._tokens)
+            }
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Reports each completion's token usage back to its model's limiter."""
+    run_inline = True
+
+    def __init__(self, limiter: ModelRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        tokens = (response.llm_output or {}).get('token_usage', {}).get('total_tokens')
+        if tokens is None:
+            usage = [
+                getattr(generation.message, 'usage_metadata', None)
+                for generations in response.generations for generation in generations
+                if hasattr(generation, 'message')
+            ]
+            tokens = sum(u['total_tokens'] for u in usage if u) or None
+        self.limiter.record_usage(tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.limiter.record_usage(None)
+
+
+def _configured_limits() -> Dict[str, tuple]:
+    return {**DEFAULT_LIMITS, **settings.OPENAI_RATE_LIMITS}
+
+
+_limits = _configured_limits()
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    with _limiters_lock:
+        if model not in _limiters:
+            requests_per_minute, tokens_per_minute = _limits.get(model, FALLBACK_LIMITS)
+            _limiters[model] = ModelRateLimiter(model, requests_per_minute, tokens_per_minute)
+        return _limiters[model]
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.stats() for model, limiter in limiters.items()}
@@ -0,0 +1,88 @@
+"""Local reranking of retrieved passages against the statement being checked.
+
+Evidence packing ranks a search's passages against the supervisor's query
+and keeps as many as fit the token budget, relevant or not. The reranker
+scores them against the statement itself (plus the query) and drops those
+that fall below a relevance threshold before they reach the supervisor and
+judge. Everything runs in-process on CPU: BM25 always, then optionally a
+small cross-encoder over the BM25 survivors, if `RERANK_CROSS_ENCODER` names
+one and sentence-transformers is installed.
+"""
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+from chains.evidence import Passage, bm25_scores
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RERANK = settings.RERANK
+MIN_RELATIVE_SCORE = settings.RERANK_MIN_RELATIVE_SCORE  # BM25 as a share of the best passage's
+CROSS_ENCODER_MODEL = settings.RERANK_CROSS_ENCODER  # Unset for BM25 only
+MIN_CROSS_ENCODER_SCORE = settings.RERANK_MIN_CROSS_ENCODER_SCORE
+CROSS_ENCODER_CANDIDATES = 20
+
+
+_load_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_cross_encoder(model: str):
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        logger.warning("RERANK_CROSS_ENCODER is set but sentence-transformers isn't installed; reranking with BM25 only")
+        return None
+    return CrossEncoder(model, device='cpu')
+
+
+def _cross_encoder():
+    """The configured cross-encoder, downloaded and loaded on first use, which can take seconds."""
+    if not CROSS_ENCODER_MODEL:
+        return None
+    # Concurrent first calls wait for one load rather than each loading the model
+    with _load_lock:
+        return _load_cross_encoder(CROSS_ENCODER_MODEL)
+
+
+def _text(passage: Passage) -> str:
+    return f"{passage['title']} {passage['text']}"
+
+
+def rerank(statement: str, query: str, passages: List[Passage], cross_encoder: Optional[object] = None) -> List[Passage]:
+    """The passages relevant to `statement`, best first, scored by BM25 or else by `cross_encoder`."""
+    if not passages:
+        return passages
+    scores = bm25_scores(f"{statement} {query}", [_text(p) for p in passages])
+    best = max(scores)
+    # Passages sharing no terms with the statement or query are never relevant
+    kept = sorted(
+        ({**p, 'score': round(score, 3)} for p, score in zip(passages, scores)
+         if score > 0 and score >= MIN_RELATIVE_SCORE * best),
+        key=lambda p: p['score'], reverse=True
+    )
+    if cross_encoder is None or not kept:
+        return kept
+
+    candidates = kept[:CROSS_ENCODER_CANDIDATES]
+    # Single-label cross-encoders return sigmoid probabilities
+    probabilities = cross_encoder.predict([(statement, _text(p)) for p in candidates])
+    return sorted(
+        ({**p, 'score': round(float(probability), 3)} for p, probability in zip(candidates, probabilities)
+         if probability >= MIN_CROSS_ENCODER_SCORE),
+        key=lambda p: p['score'], reverse=True
+    )
+
+
+async def arerank(statement: str, query: str, passages: List[Passage]) -> List[Passage]:
+    """`rerank` with the configured cross-encoder, off the event loop when there is one."""
+    if not RERANK:
+        return passages
+    # Loading the model is also kept off the event loop
+    cross_encoder = await asyncio.to_thread(_cross_encoder) if CROSS_ENCODER_MODEL else None
+    if cross_encoder is None:
+        return rerank(statement, query, passages)
+    return await asyncio.to_thread(rerank, statement, query, passages, cross_encoder)
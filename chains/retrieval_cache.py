@@ -0,0 +1,229 @@
+"""Caching layer for the Wikipedia, arXiv and web retrievers.
+
+`CachedRetriever` wraps any langchain retriever and keeps results in a shared
+`RetrievalCache`: an in-process LRU in front of an optional SQL tier (a SQLite
+file or our Postgres) so results survive restarts and are shared between
+workers. Entries are keyed on the normalized query plus the wrapped
+retriever's parameters, and expire after a per-source TTL. Empty results only
+live for `EMPTY_TTL`, so a transient empty response or outage doesn't hide a
+topic for the source's whole TTL.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, create_engine, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+
+# Seconds an entry stays valid, per source
+HOUR = 60 * 60
+DAY = 24 * HOUR
+WIKIPEDIA_TTL = 7 * DAY
+ARXIV_TTL = 30 * DAY
+WEB_TTL = 6 * HOUR
+EMPTY_TTL = 15 * 60
+
+_IGNORED_PARAMS = {'name', 'tags', 'metadata'}
+
+metadata = MetaData()
+cache_table = Table(
+    'retrieval_cache',
+    metadata,
+    Column('key', String(64), primary_key=True),
+    Column('source', String(50), index=True),
+    Column('value', Text, nullable=False),
+    Column('expires_at', Float, nullable=False, index=True),
+)
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, unicode forms, whitespace and surrounding punctuation so near-identical queries share a key."""
+    query = unicodedata.normalize('NFKC', query).casefold()
+    query = re.sub(r'\s+', ' ', query)
+    return query.strip(' \t\n"\'`.,;:!?')
+
+
+def retriever_params(retriever: BaseRetriever) -> Dict[str, Any]:
+    """The retriever settings that change its results (k, domains, ...), minus clients and secrets."""
+    params = {}
+    for name, value in retriever.model_dump().items():
+        if name in _IGNORED_PARAMS or 'key' in name.lower():
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, (str, int, float, bool, type(None))):
+            params[name] = value
+        elif isinstance(value, (list, tuple, dict)):
+            try:
+                params[name] = json.loads(json.dumps(value))
+            except (TypeError, ValueError):
+                continue
+    return params
+
+
+def _dump_docs(docs: List[Document]) -> str:
+    return json.dumps([{'page_content': doc.page_content, 'metadata': doc.metadata} for doc in docs], default=str)
+
+
+def _load_docs(value: str) -> List[Document]:
+    return [Document(**doc) for doc in json.loads(value)]
+
+
+def _copy_docs(docs: List[Document]) -> List[Document]:
+    # Callers (the evidence packer, the reranker) write to metadata, which must not reach the cached entry
+    return [doc.model_copy(update={'metadata': copy.deepcopy(doc.metadata)}) for doc in docs]
+
+
+class RetrievalCache:
+    """In-process LRU with an optional SQL tier behind it, plus hit/miss counters per source."""
+
+    def __init__(self, maxsize: int = 2048, url: Optional[str] = None):
+        self.maxsize = maxsize
+        self._lru: OrderedDict[str, Tuple[float, List[Document]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'store_hits': 0, 'misses': 0})
+        self.engine = None
+        if url:
+            self.engine = create_engine(url, pool_pre_ping=True)
+            metadata.create_all(self.engine, checkfirst=True)
+
+    def get(self, key: str, source: str) -> Optional[List[Document]]:
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry and entry[0] > now:
+                self._lru.move_to_end(key)
+                self.counters[source]['hits'] += 1
+                return _copy_docs(entry[1])
+            elif entry:
+                del self._lru[key]
+
+        if self.engine is not None:
+            with self.engine.connect() as conn:
+                row = conn.execute(
+                    select(cache_table.c.value, cache_table.c.expires_at)
+                    .where(cache_table.c.key == key, cache_table.c.expires_at > now)
+                ).first()
+            if row:
+                docs = _load_docs(row.value)
+                self._remember(key, row.expires_at, docs)
+                with self._lock:
+                    self.counters[source]['store_hits'] += 1
+                return _copy_docs(docs)
+
+        with self._lock:
+            self.counters[source]['misses'] += 1
+        return None
+
+    def set(self, key: str, source: str, docs: List[Document], ttl: float) -> None:
+        if not docs:
+            ttl = min(ttl, EMPTY_TTL)
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, _copy_docs(docs))
+        if self.engine is not None:
+            values = {'key': key, 'source': source, 'value': _dump_docs(docs), 'expires_at': expires_at}
+            dialect = postgresql if self.engine.dialect.name == 'postgresql' else sqlite
+            stmt = dialect.insert(cache_table).values(**values)
+            stmt = stmt.on_conflict_do_update(index_elements=['key'], set_={
+                'value': stmt.excluded.value,
+                'expires_at': stmt.excluded.expires_at
+            })
+            with self.engine.begin() as conn:
+                conn.execute(stmt)
+
+    def _remember(self, key: str, expires_at: float, docs: List[Document]) -> None:
+        with self._lock:
+            self._lru[key] = (expires_at, docs)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def prune(self) -> int:
+        """Drop expired entries from the SQL tier. Returns the number of rows removed."""
+        if self.engine is None:
+            return 0
+        with self.engine.begin() as conn:
+            result = conn.execute(delete(cache_table).where(cache_table.c.expires_at <= time.time()))
+        return result.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+        if self.engine is not None:
+            with self.engine.begin() as conn:
+                conn.execute(delete(cache_table))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stats = {source: dict(counts) for source, counts in self.counters.items()}
+        for counts in stats.values():
+            lookups = counts['hits'] + counts['store_hits'] + counts['misses']
+            counts['hit_rate'] = round((counts['hits'] + counts['store_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever that answers from `cache` when it can and only calls `retriever` on a miss."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    cache: RetrievalCache
+    source: str
+    ttl: float
+
+    def cache_key(self, query: str) -> str:
+        payload = {
+            'source': self.source,
+            'query': normalize_query(query),
+            'params': retriever_params(self.retriever)
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        key = self.cache_key(query)
+        docs = self.cache.get(key, self.source)
+        if docs is None:
+            docs = self.retriever.invoke(query, config={'callbacks': run_manager.get_child()})
+            self.cache.set(key, self.source, docs, self.ttl)
+        return docs
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        key = self.cache_key(query)
+        if self.cache.engine is None:
+            docs = self.cache.get(key, self.source)
+        else:
+            docs = await asyncio.to_thread(self.cache.get, key, self.source)
+        if docs is None:
+            docs = await self.retriever.ainvoke(query, config={'callbacks': run_manager.get_child()})
+            if self.cache.engine is None:
+                self.cache.set(key, self.source, docs, self.ttl)
+            else:
+                await asyncio.to_thread(self.cache.set, key, self.source, docs, self.ttl)
+        return docs
+
+
+# Shared by every module-level retriever in chains/
+retrieval_cache = RetrievalCache(
+    maxsize=int(os.getenv('RETRIEVAL_CACHE_SIZE', 2048)),
+    url=os.getenv('RETRIEVAL_CACHE_URL')
+)
+
+
+def cached(retriever: BaseRetriever, source: str, ttl: float) -> CachedRetriever:
+    return CachedRetriever(retriever=retriever, cache=retrieval_cache, source=source, ttl=ttl, name=retriever.name)
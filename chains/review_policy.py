@@ -0,0 +1,48 @@
+"""When the statement checker can skip its review step.
+
+Every verdict used to go to the reviewer, another full-size model call. A
+verdict the judge is confident in, backed by references from several
+independent sources, is published without review. So is a verdict that has
+already been through one round of review, since a second review could only
+ever finish it anyway.
+"""
+from typing import Any, Iterable, Optional
+from urllib.parse import urlparse
+from config import settings
+
+
+ADAPTIVE_REVIEW = settings.ADAPTIVE_REVIEW  # 0 reviews every verdict and restarts research on Improve
+SKIP_MIN_CONFIDENCE = settings.REVIEW_SKIP_MIN_CONFIDENCE
+SKIP_MIN_SOURCES = settings.REVIEW_SKIP_MIN_SOURCES  # Distinct domains among the verdict's references
+
+
+def distinct_domains(urls: Iterable[Optional[str]]) -> int:
+    domains = set()
+    for url in urls:
+        netloc = urlparse(url or '').netloc.lower()
+        if netloc:
+            domains.add(netloc.removeprefix('www.'))
+    return len(domains)
+
+
+def independent_sources(verdict: Any) -> int:
+    return distinct_domains(ref.get('source') for ref in verdict.references or [])
+
+
+def confident_reason(verdict: Any) -> Optional[str]:
+    """Why `verdict` can stand as it is, or None if it is not confident and well-sourced enough."""
+    if str(verdict.verdict) == 'Uncertain' or verdict.confidence is None:
+        return None
+    sources = independent_sources(verdict)
+    if verdict.confidence >= SKIP_MIN_CONFIDENCE and sources >= SKIP_MIN_SOURCES:
+        return f"confidence {verdict.confidence:.2f} with {sources} independent sources"
+    return None
+
+
+def skip_review_reason(verdict: Any, improved: bool) -> Optional[str]:
+    """Why `verdict` can be published without review, or None if it should be reviewed."""
+    if not ADAPTIVE_REVIEW:
+        return None
+    if improved:
+        return 'already reviewed'
+    return confident_reason(verdict)
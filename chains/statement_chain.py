@@ -1,17 +1,39 @@
+"""Statement extraction.
+
+Short articles are extracted in one completion. Longer ones are split into
+token-bounded, paragraph-aligned windows that overlap a little, so a statement
+spanning a boundary is seen whole by one of them; all windows are extracted
+concurrently. Either way statements are yielded as soon as their line is
+finished, in article order, with blank lines, repeats and near-duplicates
+(the same statement extracted from two overlapping windows) dropped.
+`estimate_extraction` prices an article's extraction and checks up front.
+"""
+import asyncio
+import re
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from operator import itemgetter
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 from pydantic import BaseModel, Field
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from chains.budget import BUDGETS, cost_usd
+from chains.evidence import count_tokens
+from chains.llms import get_chat_model
+
 
+EXTRACTION_MODEL = "gpt-4o"
+CHUNK_TOKENS = int(os.getenv('EXTRACTION_CHUNK_TOKENS', 3000))  # Window size for long articles; 0 extracts in one go
+CHUNK_OVERLAP_TOKENS = int(os.getenv('EXTRACTION_CHUNK_OVERLAP_TOKENS', 200))
+DUPLICATE_SIMILARITY = float(os.getenv('EXTRACTION_DUPLICATE_SIMILARITY', 0.8))  # Word overlap (Jaccard) of near-duplicates
+# For estimates: article tokens per extracted statement, and output tokens per statement line
+ARTICLE_TOKENS_PER_STATEMENT = 70
+STATEMENT_TOKENS = 35
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0.1, streaming=True, name='get_statements_llm')
+llm = get_chat_model(EXTRACTION_MODEL, temperature=0.1, streaming=True, name='get_statements_llm')
 
 
 prompt = ChatPromptTemplate.from_template(
@@ -33,6 +55,187 @@ Each statement should be on a new line.
 chain = (prompt | llm | StrOutputParser(name='statements')).with_config({"run_name": "Get Statements"})
 
 
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r'\w+')
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*')
+_NEGATIONS = {'not', 'no', 'never', 'none', 'nor', 'neither', 'nobody', 'nothing', 'nowhere', 'without', 'cannot'}
+
+
+def _pieces(text: str, max_tokens: int) -> List[Tuple[str, int]]:
+    """Paragraphs with their token counts, with any paragraph over `max_tokens` split into sentences."""
+    pieces = []
+    for paragraph in (p.strip() for p in text.split('\n')):
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, tokens))
+        else:
+            pieces.extend((sentence, count_tokens(sentence)) for sentence in _SENTENCE_RE.split(paragraph))
+    return pieces
+
+
+def _tail(pieces: List[Tuple[str, int]], max_tokens: int) -> List[Tuple[str, int]]:
+    """The last whole paragraphs of `pieces` within `max_tokens`, or else the last sentences of the final one."""
+    carried = []
+    for text, tokens in reversed(pieces):
+        if sum(t for _, t in carried) + tokens <= max_tokens:
+            carried.insert(0, (text, tokens))
+            continue
+        if not carried:
+            for sentence in reversed(_SENTENCE_RE.split(text)):
+                sentence_tokens = count_tokens(sentence)
+                if sum(t for _, t in carried) + sentence_tokens > max_tokens:
+                    break
+                carried.insert(0, (sentence, sentence_tokens))
+            if carried:
+                carried = [(' '.join(t for t, _ in carried), sum(t for _, t in carried))]
+        break
+    return carried
+
+
+def split_article(text: str, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """Paragraph-aligned windows of at most about `max_tokens`, each starting with the last
+    `overlap_tokens` or so of the one before."""
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return [text]
+    windows = []
+    current: List[Tuple[str, int]] = []
+    for piece in _pieces(text, max_tokens):
+        if current and sum(tokens for _, tokens in current) + piece[1] > max_tokens:
+            windows.append('\n\n'.join(p for p, _ in current))
+            # Only as much overlap as leaves room for the piece, so the window stays within max_tokens
+            current = _tail(current, min(overlap_tokens, max_tokens - piece[1]))
+        current.append(piece)
+    windows.append('\n\n'.join(p for p, _ in current))
+    return windows
+
+
+async def _lines(article: str) -> AsyncIterator[str]:
+    """Non-blank lines of the extraction completion for `article`, as each is finished."""
+    buffer = ''
+    async for chunk in chain.astream(article):
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                yield line.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def _window_lines(windows: List[str]) -> AsyncIterator[str]:
+    """Lines of every window's completion, extracted concurrently but yielded in window order."""
+    queues = [asyncio.Queue() for _ in windows]
+
+    async def extract(window: str, queue: asyncio.Queue) -> None:
+        try:
+            async for line in _lines(window):
+                queue.put_nowait(line)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    tasks = [asyncio.create_task(extract(window, queue)) for window, queue in zip(windows, queues)]
+    try:
+        for queue in queues:
+            while (line := await queue.get()) is not None:
+                if isinstance(line, Exception):
+                    raise line
+                yield line
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def claim_markers(statement: str) -> Tuple[frozenset, bool]:
+    """The numbers in a statement and whether it is negated.
+
+    Statements differing in either make different claims however alike their wording
+    ("rose to 4.1%" and "rose to 5.1%", "did" and "did not"), so they are never treated
+    as duplicates of each other.
+    """
+    text = statement.casefold().replace('\u2019', "'")
+    numbers = frozenset(number.replace(',', '') for number in _NUMBER_RE.findall(text))
+    negations = sum(word in _NEGATIONS or word.endswith("n't") for word in re.findall(r"[\w']+", text))
+    return numbers, negations % 2 == 1
+
+
+class _Deduplicator:
+    """Tells new statements apart from repeats and near-duplicates of ones already seen.
+
+    Near-duplicates share most of their words and all of their `claim_markers`, so
+    statements differing only in a figure, a date or a negation are kept apart.
+    """
+
+    def __init__(self, similarity: float = DUPLICATE_SIMILARITY):
+        self.similarity = similarity
+        self.keys = set()
+        self.seen: List[Tuple[set, Tuple[frozenset, bool]]] = []
+
+    def _near_duplicate(self, words: set, markers: Tuple[frozenset, bool], seen: set,
+                        seen_markers: Tuple[frozenset, bool]) -> bool:
+        if markers != seen_markers:
+            return False
+        return len(words & seen) >= self.similarity * len(words | seen)
+
+    def is_new(self, statement: str) -> bool:
+        key = ' '.join(statement.casefold().split())
+        words = {word.casefold() for word in _WORD_RE.findall(statement)}
+        markers = claim_markers(statement)
+        if key in self.keys or any(self._near_duplicate(words, markers, *seen) for seen in self.seen):
+            return False
+        self.keys.add(key)
+        self.seen.append((words, markers))
+        return True
+
+
+async def stream_statements(content: str) -> AsyncIterator[str]:
+    """Yield each statement as soon as its line of the completion is finished.
+
+    Blank lines, repeats and near-duplicates are dropped as they stream.
+    """
+    windows = split_article(content)
+    lines = _lines(content) if len(windows) == 1 else _window_lines(windows)
+    seen = _Deduplicator()
+    async for statement in lines:
+        if seen.is_new(statement):
+            yield statement
+
+
 async def get_statements(content: str) -> List[str]:
-    res = await chain.ainvoke(content)
-    return [st.strip() for st in res.split('\n')]
\ No newline at end of file
+    return [st async for st in stream_statements(content)]
+
+
+class ExtractionEstimate(BaseModel):
+    """Preflight estimate of an article's extraction, and the most its checks may cost."""
+    article_tokens: int
+    windows: int
+    extraction_tokens: int = Field(description="Input and expected output tokens of the extraction calls")
+    extraction_cost_usd: float
+    statements: int = Field(description="Expected number of statements")
+    check_tokens_max: int = Field(description="Token budget of checking every expected statement")
+    check_cost_usd_max: float
+    total_cost_usd_max: float
+
+
+def estimate_extraction(content: str, budget: str = 'bulk') -> ExtractionEstimate:
+    """Estimate, without calling any model, what extracting and checking `content` will cost."""
+    article_tokens = count_tokens(content)
+    windows = split_article(content)
+    prompt_tokens = count_tokens(prompt.format(article=''))
+    input_tokens = sum(prompt_tokens + count_tokens(window) for window in windows)
+    statements = max(round(article_tokens / ARTICLE_TOKENS_PER_STATEMENT), 1)
+    output_tokens = statements * STATEMENT_TOKENS
+    extraction_cost = cost_usd(EXTRACTION_MODEL, input_tokens, output_tokens)
+    check_budget = BUDGETS[budget]
+    return ExtractionEstimate(
+        article_tokens=article_tokens,
+        windows=len(windows),
+        extraction_tokens=input_tokens + output_tokens,
+        extraction_cost_usd=round(extraction_cost, 4),
+        statements=statements,
+        check_tokens_max=statements * check_budget.max_tokens,
+        check_cost_usd_max=round(statements * check_budget.max_cost_usd, 4),
+        total_cost_usd_max=round(extraction_cost + statements * check_budget.max_cost_usd, 4)
+    )
@@ -1,15 +1,17 @@
-from langchain_community.retrievers import TavilySearchAPIRetriever
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
+from functools import lru_cache
 from operator import itemgetter
-from typing import Optional, List, Dict, TypedDict, Annotated
+from typing import Optional, List, Dict, Sequence, Tuple, TypedDict, Annotated
 from pydantic import BaseModel, Field
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from chains.api_retrievers import TavilyAPIRetriever
+from chains.llms import get_chat_model
+from chains.retrieval_cache import cached, WEB_TTL
 
 
 
@@ -27,7 +29,7 @@ class WikipediaCheckOutput(TypedDict):
     context: Annotated[List[WikipediaMetaData], "The returned Wikipedia references"]
 
 
-llm = ChatOpenAI(model="gpt-4o-mini", streaming=True)
+llm = get_chat_model("gpt-4o-mini", streaming=True)
 
 prompt = ChatPromptTemplate.from_template(
     """
@@ -45,7 +47,7 @@ prompt = ChatPromptTemplate.from_template(
 def format_docs(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
-retriever = TavilySearchAPIRetriever(name='web', k=5)
+retriever = cached(TavilyAPIRetriever(name='web', k=5), source='web', ttl=WEB_TTL)
 
 chain = (
     {"context": retriever, "statement": RunnablePassthrough()}
@@ -58,9 +60,11 @@ chain = (
 )
 
 
-async def check_web(statement: str, exclude_domains: List[str] = []) -> WikipediaCheckOutput:
-    retriever = TavilySearchAPIRetriever(k=3, exclude_domains=exclude_domains)
-    chain = (
+@lru_cache(maxsize=32)
+def _web_check_chain(exclude_domains: Tuple[str, ...]):
+    """The check_web chain for one set of excluded domains, built once and reused."""
+    retriever = cached(TavilyAPIRetriever(k=3, exclude_domains=list(exclude_domains)), source='web', ttl=WEB_TTL)
+    return (
         {"context": retriever, "statement": RunnablePassthrough()}
         | RunnablePassthrough.assign(statement=itemgetter('statement'), context=itemgetter('context'))
         | {
@@ -69,5 +73,7 @@ async def check_web(statement: str, exclude_domains: List[str] = []) -> Wikipedi
             'context': itemgetter('context')
         }
     )
-    
-    return await chain.ainvoke(statement)
\ No newline at end of file
+
+
+async def check_web(statement: str, exclude_domains: Optional[Sequence[str]] = None) -> WikipediaCheckOutput:
+    return await _web_check_chain(tuple(sorted(exclude_domains or ()))).ainvoke(statement)
@@ -0,0 +1,357 @@
+"""Offline Wikipedia index, searched before the live Wikipedia API.
+
+Every Wikipedia search used to be a live API call, seconds per hop and often
+rate-limited. `WikipediaIndex` is a BM25 index over a Wikipedia dump, or a
+subset of one, kept on disk and memory-mapped:
+
+    meta.json           format version, document count, average length
+    vocab.json          term -> [offset, document frequency] into the postings
+    postings.docs       uint32 document ids, grouped by term
+    postings.tfs        uint16 term frequencies, parallel to postings.docs
+    lengths             uint32 document lengths in terms
+    store.offsets       uint64 byte offsets into store.jsonl, one per document plus one
+    store.jsonl         title, summary and text of each document
+
+`LocalWikipediaRetriever` answers from the index with the same `Document`
+shape as `WikipediaRetriever` and only calls the live API on a miss, when no
+result contains at least `WIKI_INDEX_MIN_COVERAGE` of the query's terms.
+Build an index with
+
+    python -m chains.wiki_index build --dump enwiki-latest-pages-articles.xml.bz2 --out data/wiki_index
+
+and point `WIKI_INDEX_DIR` at it. Dumps can be MediaWiki XML or JSON lines of
+`{"title": ..., "text": ...}`, optionally bz2 or gzip compressed. The builder
+holds the postings in memory, which suits subsets; a full English dump needs
+a machine with memory to match.
+"""
+import argparse
+import asyncio
+import bz2
+import gzip
+import json
+import logging
+import math
+import mmap
+import re
+import shutil
+import threading
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WIKI_INDEX_DIR = os.getenv('WIKI_INDEX_DIR', '')  # Unset to always use the live API
+MIN_COVERAGE = float(os.getenv('WIKI_INDEX_MIN_COVERAGE', 0.6))  # Share of query terms a result needs to count as a hit
+FORMAT_VERSION = 1
+K1, B = 1.2, 0.75
+TITLE_WEIGHT = 2  # Title terms count this many times
+STORE_CHARS = 4000  # WikipediaRetriever's doc_content_chars_max
+MIN_CHARS = 200  # Shorter articles are stubs and not indexed
+
+_TERM_RE = re.compile(r'\w+')
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'he', 'in', 'is', 'it', 'its',
+    'of', 'on', 'or', 'she', 'that', 'the', 'their', 'they', 'this', 'to', 'was', 'were', 'which', 'with'
+}
+
+
+def terms(text: str) -> List[str]:
+    return [t for t in (term.casefold() for term in _TERM_RE.findall(text)) if t not in _STOPWORDS]
+
+
+def page_url(title: str) -> str:
+    return f"https://en.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
+
+
+# Wikitext markup, removed or unwrapped to leave roughly the plain text the API returns
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_REF_RE = re.compile(r'<ref[^>]*/>|<ref[^>]*>.*?</ref>', re.S | re.I)
+_TEMPLATE_RE = re.compile(r'\{\{[^{}]*\}\}')
+_TABLE_RE = re.compile(r'\{\|.*?\|\}', re.S)
+_FILE_RE = re.compile(r'\[\[(?:File|Image|Category):(?:[^\[\]]|\[\[[^\]]*\]\])*\]\]', re.I)
+_LINK_RE = re.compile(r'\[\[(?:[^|\]]*\|)?([^\]]*)\]\]')
+_EXTERNAL_LINK_RE = re.compile(r'\[https?://\S+\s?([^\]]*)\]')
+_TAG_RE = re.compile(r'<[^>]+>')
+_EMPHASIS_RE = re.compile(r"'{2,}")
+
+
+def clean_wikitext(text: str) -> str:
+    text = _REF_RE.sub('', _COMMENT_RE.sub('', text))
+    previous = None
+    while previous != text:
+        # Templates nest, so strip the innermost until none are left
+        previous, text = text, _TEMPLATE_RE.sub('', text)
+    text = _FILE_RE.sub('', _TABLE_RE.sub('', text))
+    text = _EXTERNAL_LINK_RE.sub(r'\1', _LINK_RE.sub(r'\1', text))
+    text = _EMPHASIS_RE.sub('', _TAG_RE.sub('', text))
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def summary(text: str) -> str:
+    """The lead section, before the first heading."""
+    return text.split('\n==', 1)[0].strip()
+
+
+def _open(path: str):
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_dump(path: str) -> Iterator[Tuple[str, str]]:
+    """(title, plain text) of each article in a MediaWiki XML dump or a JSON lines file."""
+    with _open(path) as f:
+        if '.jsonl' in path or '.json' in path:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['title'], record['text']
+            return
+
+        for _, element in ET.iterparse(f, events=('end',)):
+            if element.tag.rsplit('}', 1)[-1] != 'page':
+                continue
+            fields = {child.tag.rsplit('}', 1)[-1]: child for child in element.iter()}
+            # Articles only: main namespace, no redirects
+            if fields.get('ns') is not None and fields['ns'].text == '0' and 'redirect' not in fields \
+                    and fields.get('text') is not None and fields['text'].text:
+                yield fields['title'].text, clean_wikitext(fields['text'].text)
+            element.clear()
+
+
+def build_index(articles: Iterable[Tuple[str, str]], out_dir: str, limit: Optional[int] = None,
+                min_chars: int = MIN_CHARS, store_chars: int = STORE_CHARS) -> Dict[str, Any]:
+    """Write the index of `articles` to `out_dir`, replacing any index already there."""
+    staging = f"{out_dir.rstrip('/')}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    postings: Dict[str, Tuple[array, array]] = {}
+    lengths, offsets = array('I'), array('Q', [0])
+    with open(os.path.join(staging, 'store.jsonl'), 'wb') as store:
+        for title, text in articles:
+            if limit is not None and len(lengths) >= limit:
+                break
+            if len(text) < min_chars:
+                continue
+            doc_id = len(lengths)
+            counts = Counter(terms(text))
+            for term in terms(title):
+                counts[term] += TITLE_WEIGHT
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                docs, tfs = postings.setdefault(term, (array('I'), array('H')))
+                docs.append(doc_id)
+                tfs.append(min(tf, 0xFFFF))
+            record = json.dumps({'title': title, 'summary': summary(text), 'text': text[:store_chars]},
+                                ensure_ascii=False).encode() + b'\n'
+            store.write(record)
+            offsets.append(offsets[-1] + len(record))
+
+    vocab, position = {}, 0
+    with open(os.path.join(staging, 'postings.docs'), 'wb') as docs_file, \
+            open(os.path.join(staging, 'postings.tfs'), 'wb') as tfs_file:
+        for term in sorted(postings):
+            docs, tfs = postings[term]
+            docs.tofile(docs_file)
+            tfs.tofile(tfs_file)
+            vocab[term] = [position, len(docs)]
+            position += len(docs)
+    with open(os.path.join(staging, 'lengths'), 'wb') as f:
+        lengths.tofile(f)
+    with open(os.path.join(staging, 'store.offsets'), 'wb') as f:
+        offsets.tofile(f)
+    with open(os.path.join(staging, 'vocab.json'), 'w') as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    meta = {
+        'version': FORMAT_VERSION,
+        'documents': len(lengths),
+        'terms': len(vocab),
+        'postings': position,
+        'avg_length': sum(lengths) / len(lengths) if lengths else 0.0
+    }
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(staging, out_dir)
+    return meta
+
+
+def _memmap(path: str, dtype) -> np.ndarray:
+    # np.memmap can't map an empty file
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class WikipediaIndex:
+    """Read side of an index written by `build_index`."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Wikipedia index at {path} is version {self.meta['version']}, "
+                             f"expected {FORMAT_VERSION}; rebuild it")
+        with open(os.path.join(path, 'vocab.json')) as f:
+            self.vocab: Dict[str, List[int]] = json.load(f)
+        self.docs = _memmap(os.path.join(path, 'postings.docs'), np.uint32)
+        self.tfs = _memmap(os.path.join(path, 'postings.tfs'), np.uint16)
+        self.lengths = _memmap(os.path.join(path, 'lengths'), np.uint32)
+        self.offsets = _memmap(os.path.join(path, 'store.offsets'), np.uint64)
+        self._store_file = open(os.path.join(path, 'store.jsonl'), 'rb')
+        self._store = mmap.mmap(self._store_file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+    @property
+    def size(self) -> int:
+        return self.meta['documents']
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float, float]]:
+        """(document id, BM25 score, share of query terms matched) of the `k` best documents."""
+        query_terms = list(dict.fromkeys(terms(query)))
+        found = [self.vocab[term] for term in query_terms if term in self.vocab]
+        if not found:
+            return []
+        ids, scores = [], []
+        for offset, df in found:
+            docs = self.docs[offset:offset + df]
+            tf = self.tfs[offset:offset + df].astype(np.float32)
+            idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            norm = K1 * (1 - B + B * self.lengths[docs] / self.meta['avg_length'])
+            ids.append(docs)
+            scores.append(idf * tf * (K1 + 1) / (tf + norm))
+        unique, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        matched = np.bincount(inverse)
+        top = np.argpartition(-totals, k - 1)[:k] if len(totals) > k else np.arange(len(totals))
+        top = top[np.argsort(-totals[top])]
+        return [(int(unique[i]), float(totals[i]), matched[i] / len(query_terms)) for i in top]
+
+    def document(self, doc_id: int, chars: int = STORE_CHARS) -> Document:
+        record = json.loads(self._store[int(self.offsets[doc_id]):int(self.offsets[doc_id + 1])])
+        return Document(page_content=record['text'][:chars], metadata={
+            'title': record['title'],
+            'summary': record['summary'],
+            'source': page_url(record['title'])
+        })
+
+
+class LocalIndexStats:
+    """Searches answered by a local index versus passed to the live API, for the admin stats endpoint."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0
+
+    def record(self, hit: bool, seconds: float) -> None:
+        with self._lock:
+            self.hits += hit
+            self.misses += not hit
+            self.seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            searches = self.hits + self.misses
+            return {
+                'index': self.path or None,
+                'searches': searches,
+                'local_hits': self.hits,
+                'live_fallbacks': self.misses,
+                'hit_rate': round(self.hits / searches, 3) if searches else 0.0,
+                'avg_local_ms': round(self.seconds / searches * 1000, 2) if searches else 0.0
+            }
+
+
+wiki_index_stats = LocalIndexStats(WIKI_INDEX_DIR)
+
+
+class LocalWikipediaRetriever(BaseRetriever):
+    """`WikipediaRetriever` answered from a `WikipediaIndex`, falling back to `fallback` on a miss."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: WikipediaIndex
+    fallback: Optional[BaseRetriever] = None
+    top_k_results: int = 3
+    doc_content_chars_max: int = STORE_CHARS
+    min_coverage: float = MIN_COVERAGE
+
+    def search(self, query: str) -> Optional[List[Document]]:
+        """Documents from the index, or None on a miss."""
+        start = time.perf_counter()
+        results = self.index.search(query, self.top_k_results)
+        hit = bool(results) and max(coverage for _, _, coverage in results) >= self.min_coverage
+        docs = [self.index.document(doc_id, self.doc_content_chars_max) for doc_id, _, _ in results] if hit else None
+        wiki_index_stats.record(hit, time.perf_counter() - start)
+        return docs
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        docs = self.search(query)
+        if docs is None and self.fallback is not None:
+            docs = self.fallback.invoke(query, config={'callbacks': run_manager.get_child()})
+        return docs or []
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        docs = await asyncio.to_thread(self.search, query)
+        if docs is None and self.fallback is not None:
+            docs = await self.fallback.ainvoke(query, config={'callbacks': run_manager.get_child()})
+        return docs or []
+
+
+def local_first(live: BaseRetriever) -> BaseRetriever:
+    """`live` behind the local index at WIKI_INDEX_DIR, or `live` alone if there is none."""
+    if not WIKI_INDEX_DIR:
+        return live
+    try:
+        index = WikipediaIndex(WIKI_INDEX_DIR)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Not using the Wikipedia index at {WIKI_INDEX_DIR}: {e}")
+        return live
+    logger.info(f"Searching {index.size} Wikipedia articles locally before the live API")
+    return LocalWikipediaRetriever(index=index, fallback=live, name=live.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query an offline Wikipedia index")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Index a MediaWiki XML dump or a JSON lines file')
+    build.add_argument('--dump', required=True, help='.xml, .jsonl, optionally .bz2 or .gz')
+    build.add_argument('--out', default=WIKI_INDEX_DIR or 'data/wiki_index')
+    build.add_argument('--limit', type=int, default=None, help='Index at most this many articles')
+    build.add_argument('--min_chars', type=int, default=MIN_CHARS)
+    search = commands.add_parser('search', help='Query an index')
+    search.add_argument('query')
+    search.add_argument('--index', default=WIKI_INDEX_DIR or 'data/wiki_index')
+    search.add_argument('-k', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        meta = build_index(read_dump(args.dump), args.out, limit=args.limit, min_chars=args.min_chars)
+        print(f"Indexed {meta['documents']} articles, {meta['terms']} terms into {args.out} "
+              f"in {time.perf_counter() - start:.0f}s")
+    else:
+        index = WikipediaIndex(args.index)
+        start = time.perf_counter()
+        results = index.search(args.query, args.k)
+        print(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        for doc_id, score, coverage in results:
+            print(f"{score:8.2f}  {coverage:.0%}  {index.document(doc_id).metadata['title']}")
@@ -1,4 +1,3 @@
-from langchain_community.retrievers import WikipediaRetriever
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
@@ -9,7 +8,10 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from chains.api_retrievers import WikipediaAPIRetriever
+from chains.llms import get_chat_model
+from chains.retrieval_cache import cached, WIKIPEDIA_TTL
+from chains.wiki_index import local_first
 
 
 
@@ -27,9 +29,10 @@ class WikipediaCheckOutput(TypedDict):
     context: Annotated[List[WikipediaMetaData], "The returned Wikipedia references"]
 
 
-llm = ChatOpenAI(model="gpt-4o-mini", streaming=True)
+llm = get_chat_model("gpt-4o-mini", streaming=True)
 
-retriever = WikipediaRetriever(name='wikipedia')
+# The offline index at WIKI_INDEX_DIR, if there is one, answers first; the live API only on a miss
+retriever = local_first(cached(WikipediaAPIRetriever(name='wikipedia'), source='wikipedia', ttl=WIKIPEDIA_TTL))
 
 prompt = ChatPromptTemplate.from_template(
     """
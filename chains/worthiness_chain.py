@@ -0,0 +1,182 @@
+"""Check-worthiness filter run before the statement checker.
+
+Extraction also returns opinions, predictions and trivial claims, and each
+one used to cost a full multi-agent check. `WorthinessBatcher` scores an
+article's statements with one cheap model call per batch, using the rubric
+of the statement worthiness evaluation metric: is it an objective claim, how
+verifiable is it, and how significant to the article. Statements scoring
+under the threshold are skipped instead of checked.
+
+Batching works like group commit. Statements submitted together, such as
+all those of a resumed job, are scored in one call. While a call is in
+flight, statements streaming out of extraction queue up and go together in
+the next one. So the first checks start without waiting for extraction to
+finish. If scoring fails, the statements are checked anyway.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.output_parsers import PydanticToolsParser
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+from chains.llms import get_chat_model
+
+logger = logging.getLogger(__name__)
+
+WORTHINESS_THRESHOLD = float(os.getenv('WORTHINESS_THRESHOLD', 0.5))  # 0 checks every statement
+WORTHINESS_MODEL = os.getenv('WORTHINESS_MODEL', 'gpt-4o-mini')
+BATCH_SIZE = int(os.getenv('WORTHINESS_BATCH_SIZE', 50))
+
+
+llm = get_chat_model(WORTHINESS_MODEL, temperature=0, name='worthiness_llm')
+
+
+class StatementWorthiness(BaseModel):
+    """How worthy one statement is of fact-checking."""
+
+    index: int = Field(description="The number of the statement in the list.")
+    objective_truth: bool = Field(description="This statement represents an objective fact or truth.")
+    verifiable: int = Field(description="Is the statement verifiable within the body of information available on the internet on a scale of 1 to 10 with 10 being definitely verifiable.", ge=1, le=10)
+    significant: int = Field(description="Is this statement significant to the overall argument or conclusion of the article it came from? Do other statements or conclusions in the article rely on this statement being true? Answer on a scale of 1 to 10 with 10 being very significant", ge=1, le=10)
+
+
+class StatementsWorthiness(BaseModel):
+    """Use this to evaluate the worthiness of each statement for verification."""
+
+    statements: List[StatementWorthiness]
+
+
+prompt = ChatPromptTemplate.from_template(
+    """
+Statements:
+{statements}
+
+
+You are an editor on the fact-checking team at a major news publication. The statements above were extracted from one article.
+Before the team spends time researching them, evaluate each statement's worthiness for verification: whether it states an
+objective fact rather than an opinion or prediction, how verifiable it is, and how significant it is to the article.
+Use the StatementsWorthiness tool and score every statement, referring to each by its number.
+"""
+)
+
+tools = [StatementsWorthiness]
+
+chain = (
+    prompt
+    | llm.bind_tools(tools, tool_choice='StatementsWorthiness')
+    | PydanticToolsParser(tools=tools, first_tool_only=True)
+).with_config({"run_name": "Statement Worthiness"})
+
+
+def worthiness(score: StatementWorthiness) -> float:
+    """0 for opinions, otherwise the mean of verifiability and significance, scaled to 0-1."""
+    if not score.objective_truth:
+        return 0.0
+    return round((score.verifiable + score.significant) / 20, 2)
+
+
+async def score_statements(statements: List[str]) -> List[Optional[float]]:
+    """Worthiness of each statement, in one model call; None for any the model didn't score."""
+    numbered = '\n'.join(f"{i}. {statement}" for i, statement in enumerate(statements, 1))
+    result = await chain.ainvoke({'statements': numbered})
+    scores = {score.index: worthiness(score) for score in result.statements} if result else {}
+    return [scores.get(i) for i in range(1, len(statements) + 1)]
+
+
+class WorthinessBatcher:
+    """Scores one article's statements in batches as they come in."""
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = max(batch_size, 1)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._scheduled: Optional[asyncio.Handle] = None
+        self._batches = set()
+        self.calls = 0
+
+    async def score(self, statement: str) -> Optional[float]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((statement, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif not self._batches and self._scheduled is None:
+            # Once everything submitted in this turn of the event loop is in
+            self._scheduled = asyncio.get_running_loop().call_soon(self._flush)
+        # Shielded, so one statement's check being cancelled doesn't cancel its whole batch
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._score(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._scored)
+
+    def _scored(self, task: asyncio.Task) -> None:
+        self._batches.discard(task)
+        if self._pending and not self._batches:
+            self._flush()
+
+    def close(self) -> None:
+        """Stop scoring, for a job that is finishing or shutting down."""
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        for task in list(self._batches):
+            task.cancel()
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+
+    async def _score(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            self.calls += 1
+            scores = await score_statements([statement for statement, _ in batch])
+        except Exception as e:
+            logger.error(f"Worthiness scoring failed, checking {len(batch)} statements anyway: {e}")
+            scores = [None] * len(batch)
+        for (_, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
+
+
+class WorthinessStats:
+    """Statements skipped as not check-worthy in recent articles, for the admin stats endpoint."""
+
+    def __init__(self, maxlen: int = 100):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=maxlen)
+
+    def record(self, article_id: Optional[int], threshold: float, scored: int, skipped: int,
+               calls: int) -> Dict[str, Any]:
+        stats = {'article_id': article_id, 'threshold': threshold, 'scored': scored,
+                 'agent_runs_avoided': skipped, 'scoring_calls': calls}
+        with self._lock:
+            self.recent.append(stats)
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = list(self.recent)
+        scored = sum(s['scored'] for s in recent)
+        avoided = sum(s['agent_runs_avoided'] for s in recent)
+        return {
+            'articles': len(recent),
+            'scored': scored,
+            'agent_runs_avoided': avoided,
+            'skip_rate': round(avoided / scored, 3) if scored else 0.0,
+            'scoring_calls': sum(s['scoring_calls'] for s in recent),
+            'recent': recent[-10:]
+        }
+
+
+worthiness_stats = WorthinessStats()
@@ -0,0 +1,237 @@
+"""Durable checkpoints for statement checks run by background jobs.
+
+The statement checker graph is compiled a second time with a checkpointer that
+stores its state in the app database, keyed by a thread id per statement. A
+check interrupted by a worker restart, a deploy or repeated OpenAI errors
+resumes from its last completed node on the next attempt instead of repeating
+every search and LLM call; nodes that had already finished in the interrupted
+step are replayed from their saved writes.
+
+Only the latest checkpoint of each thread is kept, since a check is only ever
+resumed, never replayed from an earlier point. A thread is deleted once its
+verdict is in, and `prune_checkpoints` removes threads abandoned for longer
+than `CHECKPOINT_MAX_AGE_HOURS`.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from agents.statement_checker import graph, initial_state
+from chains.adjudicator_chain import Verdict
+from chains.budget import budget_config
+from chains.evidence_pool import EvidencePool
+from config import settings
+from database import get_session_context, logger
+from models import GraphCheckpoint, GraphCheckpointWrite
+
+
+def _configurable_metadata(config: RunnableConfig) -> Dict[str, Any]:
+    """The thread's plain configurable values, so `alist` can filter on them.
+
+    Internal keys (`__pregel_*`) and objects such as the budget tracker and evidence pool are left
+    out, as they can't be serialized.
+    """
+    return {key: value for key, value in config.get('configurable', {}).items()
+            if not key.startswith('__') and isinstance(value, (str, int, float, bool))}
+
+
+class DatabaseCheckpointSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer on the app's async SQLAlchemy engine. Async only."""
+
+    def _config(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[RunnableConfig]:
+        if checkpoint_id is None:
+            return None
+        return {'configurable': {'thread_id': thread_id, 'checkpoint_ns': checkpoint_ns, 'checkpoint_id': checkpoint_id}}
+
+    def _tuple(self, row: GraphCheckpoint, writes: Sequence[GraphCheckpointWrite]) -> CheckpointTuple:
+        saved = self.serde.loads_typed((row.type, row.checkpoint))
+        return CheckpointTuple(
+            config=self._config(row.thread_id, row.checkpoint_ns, row.checkpoint_id),
+            checkpoint=saved['checkpoint'],
+            metadata=saved['metadata'],
+            parent_config=self._config(row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id),
+            pending_writes=[(w.task_id, w.channel, self.serde.loads_typed((w.type, w.value))) for w in writes]
+        )
+
+    async def _writes(self, session, row: GraphCheckpoint) -> Sequence[GraphCheckpointWrite]:
+        result = await session.execute(
+            select(GraphCheckpointWrite)
+            .where(GraphCheckpointWrite.thread_id == row.thread_id,
+                   GraphCheckpointWrite.checkpoint_ns == row.checkpoint_ns,
+                   GraphCheckpointWrite.checkpoint_id == row.checkpoint_id)
+            .order_by(GraphCheckpointWrite.task_id, GraphCheckpointWrite.idx)
+        )
+        return result.scalars().all()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        async with get_session_context() as session:
+            row = await session.get(GraphCheckpoint, (thread_id, checkpoint_ns))
+            checkpoint_id = get_checkpoint_id(config)
+            if row is None or (checkpoint_id and row.checkpoint_id != checkpoint_id):
+                return None
+            return self._tuple(row, await self._writes(session, row))
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        query = select(GraphCheckpoint).order_by(GraphCheckpoint.created_at.desc())
+        if config:
+            query = query.where(GraphCheckpoint.thread_id == config['configurable']['thread_id'])
+            if 'checkpoint_ns' in config['configurable']:
+                query = query.where(GraphCheckpoint.checkpoint_ns == config['configurable']['checkpoint_ns'])
+            if get_checkpoint_id(config):
+                query = query.where(GraphCheckpoint.checkpoint_id == get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query = query.where(GraphCheckpoint.checkpoint_id < get_checkpoint_id(before))
+        async with get_session_context() as session:
+            rows = (await session.execute(query)).scalars().all()
+            tuples = [self._tuple(row, await self._writes(session, row)) for row in rows]
+        for item in tuples:
+            if filter and any(item.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        type_, data = self.serde.dumps_typed({
+            'checkpoint': checkpoint,
+            'metadata': {**_configurable_metadata(config), **metadata}
+        })
+        async with get_session_context() as session:
+            # The new checkpoint replaces the thread's previous one, and the writes made against it
+            await session.execute(delete(GraphCheckpointWrite).where(
+                GraphCheckpointWrite.thread_id == thread_id,
+                GraphCheckpointWrite.checkpoint_ns == checkpoint_ns,
+                GraphCheckpointWrite.checkpoint_id != checkpoint['id']
+            ))
+            await session.merge(GraphCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint['id'],
+                parent_checkpoint_id=get_checkpoint_id(config),
+                type=type_,
+                checkpoint=data,
+                created_at=datetime.utcnow()
+            ))
+        return self._config(thread_id, checkpoint_ns, checkpoint['id'])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        checkpoint_id = config['configurable']['checkpoint_id']
+        async with get_session_context() as session:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                # Regular writes are kept as first saved; special ones (errors, interrupts) are replaced
+                if idx >= 0 and await session.get(GraphCheckpointWrite, key):
+                    continue
+                type_, data = self.serde.dumps_typed(value)
+                await session.merge(GraphCheckpointWrite(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    checkpoint_id=checkpoint_id,
+                    task_id=task_id,
+                    idx=idx,
+                    channel=channel,
+                    type=type_,
+                    value=data,
+                    task_path=task_path
+                ))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        async with get_session_context() as session:
+            await session.execute(delete(GraphCheckpointWrite).where(GraphCheckpointWrite.thread_id == thread_id))
+            await session.execute(delete(GraphCheckpoint).where(GraphCheckpoint.thread_id == thread_id))
+
+
+checkpointer = DatabaseCheckpointSaver()
+durable_agent_graph = graph.compile(checkpointer=checkpointer)
+durable_agent_graph.name = "Multi-Agent Statement Checker"
+
+
+def statement_thread_id(statement_id: int) -> str:
+    return f"statement-{statement_id}"
+
+
+async def run_durable_fact_check(statement: str, thread_id: str, budget: str = 'bulk',
+                                 evidence_pool: Optional[EvidencePool] = None) -> Verdict:
+    """Check `statement`, resuming thread `thread_id` if an earlier attempt was interrupted mid-check.
+
+    A resumed check gets a fresh `budget`, apart from the research turns it had already taken.
+    """
+    config = budget_config(budget)
+    config['configurable'].update(thread_id=thread_id, evidence_pool=evidence_pool)
+    snapshot = await durable_agent_graph.aget_state(config)
+    if snapshot.next:
+        logger.info(f"Resuming fact-check {thread_id} at {', '.join(snapshot.next)}")
+        state = None
+    else:
+        # Nothing to resume: clear anything left from a finished run so the check starts clean
+        if snapshot.values:
+            await checkpointer.adelete_thread(thread_id)
+        state = initial_state(statement)
+    result = await durable_agent_graph.ainvoke(state, config)
+    verdict = result.get('verdict')
+    if verdict is None:
+        raise ValueError("Fact-check finished without a verdict")
+    await checkpointer.adelete_thread(thread_id)
+    return verdict
+
+
+async def prune_checkpoints(max_age: timedelta) -> int:
+    """Delete threads whose latest checkpoint is older than `max_age`."""
+    cutoff = datetime.utcnow() - max_age
+    stale = select(GraphCheckpoint.thread_id).where(GraphCheckpoint.created_at < cutoff)
+    async with get_session_context() as session:
+        await session.execute(delete(GraphCheckpointWrite).where(GraphCheckpointWrite.thread_id.in_(stale)))
+        result = await session.execute(delete(GraphCheckpoint).where(GraphCheckpoint.created_at < cutoff))
+    if result.rowcount:
+        logger.info(f"Pruned {result.rowcount} stale fact-check checkpoints")
+    return result.rowcount
+
+
+async def prune_checkpoints_periodically() -> None:
+    while True:
+        try:
+            await prune_checkpoints(timedelta(hours=settings.CHECKPOINT_MAX_AGE_HOURS))
+        except Exception as e:
+            logger.error(f"Could not prune checkpoints: {e}")
+        await asyncio.sleep(settings.CHECKPOINT_PRUNE_SECONDS)
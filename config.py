@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Dict, List, Tuple
 import os
 
 class Settings(BaseSettings):
@@ -7,6 +8,57 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 525600
 
+    # Verdict reuse for repeated statements
+    VERDICT_CACHE_MAX_AGE_DAYS: int = 30
+    VERDICT_CACHE_UNCERTAIN_MAX_AGE_DAYS: int = 3
+    VERDICT_CACHE_SIMILARITY: float = 0.93
+    VERDICT_CACHE_SCAN_LIMIT: int = 5000
+
+    # Background fact-checking jobs
+    JOB_WORKERS: int = 2  # Jobs processed at once by each app process
+    JOB_STATEMENT_CONCURRENCY: int = 5  # Statements of one article checked at once
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_STATEMENT_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: int = 120  # A running job not heartbeating for this long is picked up again
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_STATEMENT_BATCH_SIZE: int = 10  # Verdicts written to the database together; 1 writes each as it completes
+    JOB_STATEMENT_FLUSH_SECONDS: float = 1.0  # Longest a finished verdict waits for the rest of its batch
+
+    # Durable statement checks: interrupted checks resume from their last checkpoint
+    CHECKPOINT_MAX_AGE_HOURS: float = 24  # Checkpoints of checks abandoned for longer are pruned
+    CHECKPOINT_PRUNE_SECONDS: float = 3600
+
+    # OpenAI rate limits, (requests per minute, tokens per minute) per model, e.g. '{"gpt-4o": [5000, 450000]}'
+    OPENAI_RATE_LIMITS: Dict[str, Tuple[int, int]] = {}
+
+    # Evidence packing: passages kept under token budgets; 0 hands the agents raw documents
+    PACK_EVIDENCE: bool = True
+    EVIDENCE_PASSAGE_TOKENS: int = 200  # Target passage size
+    EVIDENCE_QUERY_TOKENS: int = 1200  # Kept per search call
+    EVIDENCE_JUDGE_TOKENS: int = 4000  # Evidence sent to the judge
+
+    # Model cascade: models per graph node, cheapest first, e.g. '{"judge": ["gpt-4o"]}'; unlisted nodes keep their default
+    MODEL_POLICY: Dict[str, List[str]] = {}
+    ESCALATION_MIN_CONFIDENCE: float = 0.7  # Judge verdicts below this escalate
+
+    # Adaptive review: confident, well-sourced verdicts skip the reviewer
+    ADAPTIVE_REVIEW: bool = True  # 0 reviews every verdict and restarts research on Improve
+    REVIEW_SKIP_MIN_CONFIDENCE: float = 0.85
+    REVIEW_SKIP_MIN_SOURCES: int = 2  # Distinct domains among the verdict's references
+
+    # Per-check budget overrides by entry point, e.g. '{"bulk": {"max_hops": 8, "max_cost_usd": 0.5}}'
+    CHECK_BUDGETS: Dict[str, Dict[str, float]] = {}
+
+    # Speculative judging alongside the supervisor's turn
+    SPECULATIVE_JUDGING: bool = True
+    SPECULATIVE_GRACE_SECONDS: float = 2
+
+    # Passage reranking against the statement
+    RERANK: bool = True
+    RERANK_MIN_RELATIVE_SCORE: float = 0.1  # BM25 as a share of the best passage's
+    RERANK_CROSS_ENCODER: str = ''  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2 (pip install sentence-transformers)
+    RERANK_MIN_CROSS_ENCODER_SCORE: float = 0.1
+
     class Config:
         env_file = ".env"
 
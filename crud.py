@@ -2,10 +2,13 @@ from pydantic import AnyHttpUrl
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
-from sqlalchemy import update, delete, desc
-from typing import Optional, List
-from models import User, Article, Statement
-from schemas import UserCreate, UserUpdate, ArticleCreate, ArticleUpdate, StatementCreate, Reference
+from sqlalchemy import update, delete, desc, insert, func, tuple_, cast, type_coerce, String
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime
+import base64
+from models import User, Article, Statement, Job, reference_domain
+from schemas import UserCreate, UserUpdate, ArticleCreate, ArticleUpdate, StatementCreate, Reference, ArticleSummary, ArticlePage, StatementRead
 from auth import get_password_hash
 import json
 from sqlalchemy.exc import IntegrityError
@@ -65,9 +68,6 @@ async def create_article(db: AsyncSession, article: ArticleCreate, user_id: int)
     if article.domain and await check_domain_exists(db, article.domain):
         raise ValueError(f"An article with domain '{article.domain}' already exists")
 
-    # Convert links to JSON string if provided
-    links_json = json.dumps(article.links) if article.links else "[]"
-
     db_article = Article(
         title=article.title,
         text=article.text,
@@ -75,7 +75,7 @@ async def create_article(db: AsyncSession, article: ArticleCreate, user_id: int)
         authors=article.authors,
         publication_date=article.publication_date,
         user_id=user_id,
-        links=links_json,  # Pass JSON string instead of list
+        links=article.links or [],
         is_active=True
     )
 
@@ -138,11 +138,80 @@ async def get_articles(db: AsyncSession, skip: int = 0, limit: int = 100):
     return result.unique().scalars().all()
 
 
+EXCERPT_LENGTH = 300
+
+def encode_cursor(date: datetime, article_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{article_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        date, article_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(date), int(article_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def list_articles(db: AsyncSession, limit: int = 20, cursor: Optional[str] = None,
+                        include_statements: bool = False) -> ArticlePage:
+    """Newest articles first, keyset-paginated on (date, id).
+
+    Only the listing columns and an excerpt of the text are read; verdict counts are
+    aggregated in SQL for the page, and statements are loaded only if asked for.
+    """
+    stmt = (
+        select(
+            Article.id,
+            Article.title,
+            Article.domain,
+            Article.authors,
+            Article.publication_date,
+            Article.date,
+            Article.user_id,
+            Article.is_active,
+            func.substr(Article.text, 1, EXCERPT_LENGTH).label('excerpt')
+        )
+        .order_by(desc(Article.date), desc(Article.id))
+        .limit(limit + 1)
+    )
+    if cursor:
+        stmt = stmt.where(tuple_(Article.date, Article.id) < tuple_(*decode_cursor(cursor)))
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return ArticlePage(items=[])
+
+    ids = [row.id for row in rows]
+    items = {row.id: ArticleSummary(**row._mapping) for row in rows}
+    counts = await db.execute(
+        select(Statement.article_id, Statement.verdict, func.count(Statement.id))
+        .where(Statement.article_id.in_(ids))
+        .group_by(Statement.article_id, Statement.verdict)
+    )
+    for article_id, verdict, count in counts.all():
+        items[article_id].statement_count += count
+        if verdict:
+            items[article_id].verdict_counts[verdict] = count
+
+    if include_statements:
+        for item in items.values():
+            item.statements = []
+        statements = await db.execute(
+            select(Statement).where(Statement.article_id.in_(ids)).order_by(Statement.id)
+        )
+        for statement in statements.scalars().all():
+            items[statement.article_id].statements.append(StatementRead.model_validate(statement, from_attributes=True))
+
+    last = rows[-1]
+    return ArticlePage(
+        items=list(items.values()),
+        next_cursor=encode_cursor(last.date, last.id) if has_more else None
+    )
+
+
 async def update_article(db: AsyncSession, article: Article, article_update: ArticleUpdate):
     update_data = article_update.dict(exclude_unset=True)
-    if 'links' in update_data:
-        update_data['links'] = json.dumps(update_data['links'])
-    
+
     for key, value in update_data.items():
         setattr(article, key, value)
     
@@ -174,6 +243,32 @@ async def create_statement(db: AsyncSession, statement: Statement, article_id: i
     await db.refresh(statement)
     return statement
 
+async def create_statements_bulk(db: AsyncSession, statements: List[Statement], article_id: int, user_id: int) -> List[Statement]:
+    """Insert all of an article's statements with one multi-row INSERT ... RETURNING and a single commit."""
+    if not statements:
+        return []
+    rows = [
+        {**statement.model_dump(exclude={'id'}), 'article_id': article_id, 'user_id': user_id}
+        for statement in statements
+    ]
+    # Callers zip the rows back to `statements`, and executemany only keeps their order when asked to
+    result = await db.execute(insert(Statement).returning(Statement, sort_by_parameter_order=True), rows)
+    created = result.scalars().all()
+    await db.commit()
+    return created
+
+async def update_statements_bulk(db: AsyncSession, values: List[Dict[str, Any]]):
+    """Apply per-statement updates (each dict holds an `id` plus the columns to set) as one executemany."""
+    if not values:
+        return
+    # Rows setting different columns can't share a statement, so group them by column set
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in values:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for rows in groups.values():
+        await db.execute(update(Statement), rows)
+    await db.commit()
+
 async def get_statement(db: AsyncSession, statement_id: int):
     stmt = select(Statement).where(Statement.id == statement_id)
     result = await db.execute(stmt)
@@ -189,12 +284,30 @@ async def get_article_statements(db: AsyncSession, article_id: int):
     result = await db.execute(stmt)
     return result.scalars().all()
 
+async def get_statements_citing(db: AsyncSession, domain: Optional[str] = None, source: Optional[str] = None,
+                                skip: int = 0, limit: int = 100):
+    """Statements with a reference from `domain` (e.g. "nature.com") or to the exact `source` URL, newest first.
+
+    On Postgres this is a JSONB containment query answered from the GIN index on references.
+    """
+    if domain:
+        match = {'domain': reference_domain(domain if '//' in domain else f"//{domain}")}
+    else:
+        match = {'source': source}
+    if db.bind.dialect.name == 'postgresql':
+        condition = type_coerce(Statement.references, JSONB).contains([match])
+    else:
+        # Plain JSON text (SQLite in development): match the serialized key/value pair
+        key, value = next(iter(match.items()))
+        condition = cast(Statement.references, String).contains(f'"{key}": {json.dumps(value)}')
+    stmt = select(Statement).where(condition).order_by(desc(Statement.created_at)).offset(skip).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
 async def update_statement(db: AsyncSession, statement: Statement, verdict: str, explanation: str, references: List[Reference] = None):
     statement.verdict = verdict
     statement.explanation = explanation
-    statement.references = references
-    #if references is not None:
-    #    statement.set_references(references)
+    statement.set_references([dict(ref) for ref in references or []])
     await db.commit()
     await db.refresh(statement)
     return statement
@@ -202,3 +315,24 @@ async def update_statement(db: AsyncSession, statement: Statement, verdict: str,
 async def delete_statement(db: AsyncSession, statement: Statement):
     await db.delete(statement)
     await db.commit()
+
+
+# Job CRUD operations
+async def create_job(db: AsyncSession, job: Job):
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+async def get_job(db: AsyncSession, job_id: int):
+    return await db.get(Job, job_id)
+
+async def get_latest_article_job(db: AsyncSession, article_id: int):
+    stmt = (
+        select(Job)
+        .where(Job.article_id == article_id)
+        .order_by(desc(Job.created_at))
+        .limit(1)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
@@ -11,6 +11,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from models import User, Article, Statement, get_table_name
+from migrations.jsonb_columns import migrate as migrate_jsonb_columns
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +52,8 @@ async def init_db():
             # Optionally, create tables if they don’t exist without dropping existing ones
             async with engine.begin() as conn:
                 await conn.run_sync(SQLModel.metadata.create_all, checkfirst=True)
+                await add_missing_columns(conn)
+                await migrate_jsonb_columns(conn)
             #SQLModel.metadata.create_all(engine, checkfirst=True)
         else:
             async with engine.begin() as conn:
@@ -63,6 +66,36 @@ async def init_db():
         logger.error(f"Error in database reset: {e}")
         raise
 
+# Columns added to existing tables after they were first created in production.
+# create_all only creates missing tables, so these are added in place.
+ADDED_COLUMNS = [
+    # (table, column, type, indexed)
+    (get_table_name('statement'), 'content_hash', 'VARCHAR(64)', True),
+    (get_table_name('statement'), 'status', "VARCHAR(20) DEFAULT 'checked'", False),
+    (get_table_name('statement'), 'attempts', 'INTEGER DEFAULT 0', False),
+    (get_table_name('statement'), 'worthiness', 'FLOAT', False),
+    (get_table_name('statement'), 'checked_at', 'TIMESTAMP', False),
+    (get_table_name('statement'), 'budget_limited', 'VARCHAR', False),
+    (get_table_name('job'), 'extracted', 'BOOLEAN DEFAULT TRUE', False),
+    (get_table_name('job'), 'worthiness_threshold', 'FLOAT', False),
+]
+
+# Indexes added to existing tables, likewise
+ADDED_INDEXES = [
+    # (index, table, columns)
+    (f"ix_{get_table_name('article')}_date_id", get_table_name('article'), 'date, id'),
+]
+
+async def add_missing_columns(conn):
+    """Add columns and indexes introduced since the production tables were created"""
+    for table, column, column_type, indexed in ADDED_COLUMNS:
+        await conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS {column} {column_type}'))
+        if indexed:
+            await conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON "{table}" ({column})'))
+    for index, table, columns in ADDED_INDEXES:
+        await conn.execute(text(f'CREATE INDEX IF NOT EXISTS {index} ON "{table}" ({columns})'))
+    logger.info("Added columns checked")
+
 async def update_admin_user(session: AsyncSession):
     """Update the test user to have admin privileges"""
     try:
@@ -0,0 +1,498 @@
+"""Background fact-checking jobs.
+
+Article ingestion is queued as a `Job` row instead of running inside the HTTP
+request. A pool of asyncio workers in each app process claims queued jobs
+from the database (`FOR UPDATE SKIP LOCKED` on Postgres, so several processes
+can share the queue without an external broker), extracts the article's
+statements into `pending` Statement rows and checks them with bounded
+concurrency, skipping those scored as not worth checking. Extraction streams: statements are
+inserted in small batches as the model finishes writing them, and each one's check starts as soon
+as it is in, so checking overlaps with the rest of the extraction.
+
+Running jobs heartbeat `locked_at`. A job whose lease goes stale, because its
+process crashed or was redeployed, is claimed again and resumes with the
+statements that were not yet checked, each from its last graph checkpoint
+(checkpoints.py). Failed statements are retried with
+exponential backoff, and failed jobs are requeued with backoff until
+`max_attempts`.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
+
+import crud
+from chains.evidence_pool import EvidencePool, ResearchPlanner, evidence_pool_stats, plan_research
+from chains.statement_chain import estimate_extraction, stream_statements
+from chains.worthiness_chain import WORTHINESS_THRESHOLD, WorthinessBatcher, worthiness_stats
+from chains.tavily_chain import retriever as web_retriever
+from chains.wikipedia_chain import retriever as wiki_retriever
+from checkpoints import prune_checkpoints_periodically, statement_thread_id
+from config import settings
+from database import get_session_context, logger
+from models import Article, Job, Statement, with_reference_domains
+from routers.api import run_fact_check
+from schemas import JobStatus, StatementProgress, StatementRead
+from streaming import article_events, sse_comment, sse_event
+from verdict_cache import index_statements, lookup_verdict, statement_hash
+
+
+class JobError(Exception):
+    """A job that can never succeed, so it is failed without further attempts."""
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(30 * 2 ** max(attempts - 1, 0), 900))
+
+
+async def enqueue_article_job(db: AsyncSession, article_id: int, user_id: int, force_refresh: bool = False,
+                              worthiness_threshold: Optional[float] = None) -> Job:
+    job = await crud.create_job(db, Job(
+        kind='article',
+        article_id=article_id,
+        user_id=user_id,
+        force_refresh=force_refresh,
+        worthiness_threshold=worthiness_threshold,
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    ))
+    job_worker.notify()
+    return job
+
+
+async def get_job_status(db: AsyncSession, job: Job) -> JobStatus:
+    statements = await crud.get_article_statements(db, job.article_id) if job.article_id else []
+    progress = [StatementProgress.model_validate(st) for st in statements]
+    return JobStatus(
+        **job.model_dump(),
+        total=len(progress),
+        checked=sum(st.status == 'checked' for st in progress),
+        failed=sum(st.status == 'failed' for st in progress),
+        skipped=sum(st.status == 'skipped' for st in progress),
+        statements=progress
+    )
+
+
+async def stream_article_job(article_id: int) -> AsyncIterator[str]:
+    """Server-sent events for an article's latest job: `progress` whenever counts change, `statement`
+    as each statement is checked or fails, then `done` once the job has finished."""
+    queue = article_events.subscribe(article_id)
+    sent = {}
+    progress = None
+    try:
+        while True:
+            async with get_session_context() as session:
+                job = await crud.get_latest_article_job(session, article_id)
+                statements = await crud.get_article_statements(session, article_id) if job else []
+            if job is None:
+                yield sse_event('error', {'detail': 'No fact-check job for this article'})
+                return
+
+            changed = False
+            for st in statements:
+                if st.status in ('checked', 'failed', 'skipped') and sent.get(st.id) != st.status:
+                    sent[st.id] = st.status
+                    changed = True
+                    yield sse_event('statement', StatementRead.model_validate(st, from_attributes=True))
+            current = {
+                'job_id': job.id,
+                'status': job.status,
+                'total': len(statements),
+                'checked': sum(st.status == 'checked' for st in statements),
+                'failed': sum(st.status == 'failed' for st in statements),
+                'skipped': sum(st.status == 'skipped' for st in statements)
+            }
+            if current != progress:
+                progress = current
+                changed = True
+                yield sse_event('progress', progress)
+            if job.status in ('completed', 'failed'):
+                yield sse_event('done', progress)
+                return
+            if not changed:
+                yield sse_comment()
+
+            try:
+                await asyncio.wait_for(queue.get(), timeout=settings.JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            while not queue.empty():
+                queue.get_nowait()
+    finally:
+        article_events.unsubscribe(article_id, queue)
+
+
+async def claim_job() -> Optional[Job]:
+    """Take the next due job, or a running job whose lease has gone stale."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    async with get_session_context() as session:
+        result = await session.execute(
+            select(Job)
+            .where(or_(
+                and_(Job.status == 'queued', Job.next_attempt_at <= now),
+                and_(Job.status == 'running', Job.locked_at < stale)
+            ))
+            .order_by(Job.next_attempt_at, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalars().first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.locked_at = now
+        job.updated_at = now
+    return job
+
+
+async def recover_jobs() -> int:
+    """Requeue running jobs whose lease expired while no worker was alive to notice."""
+    stale = datetime.utcnow() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    async with get_session_context() as session:
+        result = await session.execute(
+            update(Job)
+            .where(Job.status == 'running', Job.locked_at < stale)
+            .values(status='queued', locked_at=None, next_attempt_at=datetime.utcnow())
+        )
+    if result.rowcount:
+        logger.info(f"Requeued {result.rowcount} interrupted jobs")
+    return result.rowcount
+
+
+async def _update_job(job_id: int, **values) -> None:
+    async with get_session_context() as session:
+        await session.execute(update(Job).where(Job.id == job_id).values(updated_at=datetime.utcnow(), **values))
+
+
+class StatementWriter:
+    """Buffers an article's statement updates and writes them in batches.
+
+    A batch is written once `batch_size` statements have updates waiting, or `flush_seconds` after
+    the first of them, whichever comes first, as a single executemany. Streams are told about
+    finished statements only once they are in the database.
+    """
+
+    def __init__(self, article_id: int, batch_size: int, flush_seconds: float):
+        self.article_id = article_id
+        self.batch_size = max(batch_size, 1)
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[int, dict] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def write(self, statement_id: int, **values) -> None:
+        self._pending.setdefault(statement_id, {'id': statement_id}).update(values)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_seconds)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Could not write statements of article {self.article_id}, will retry: {e}")
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+                self._timer = None
+            rows, self._pending = list(self._pending.values()), {}
+            if not rows:
+                return
+            try:
+                async with get_session_context() as session:
+                    await crud.update_statements_bulk(session, rows)
+            except Exception:
+                # Keep the updates for the next flush, without overwriting anything newer
+                for row in rows:
+                    self._pending[row['id']] = {**row, **self._pending.get(row['id'], {})}
+                raise
+        for row in rows:
+            if row.get('status') in ('checked', 'failed', 'skipped'):
+                article_events.publish(self.article_id, 'statement', row['id'])
+
+
+async def _heartbeat(job_id: int) -> None:
+    """Renew the job's lease until cancelled.
+
+    A failed renewal is logged and tried again at the next beat: if the heartbeat stopped, the lease
+    would lapse and another worker would claim the job while this one is still running it.
+    """
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        try:
+            await _update_job(job_id, locked_at=datetime.utcnow())
+        except Exception as e:
+            logger.error(f"Job {job_id}: could not renew its lease, will retry: {e}")
+
+
+async def _insert_statements(job: Job, article: Article, statements: List[Statement]) -> List[Statement]:
+    async with get_session_context() as session:
+        created = await crud.create_statements_bulk(session, statements, article_id=article.id, user_id=job.user_id)
+    for statement in created:
+        article_events.publish(article.id, 'extracted', statement.id)
+    return created
+
+
+async def _extract_statements(job: Job, article: Article, known: Set[str]) -> AsyncIterator[Statement]:
+    """Insert statements as extraction streams them, skipping those whose hash is in `known`.
+
+    As with `StatementWriter`, statements are inserted in batches: once `JOB_STATEMENT_BATCH_SIZE`
+    are waiting, or `JOB_STATEMENT_FLUSH_SECONDS` after the first of them, one multi-row insert
+    each. They are yielded as soon as they have ids, so their checks can start.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def extract() -> None:
+        try:
+            async for content in stream_statements(article.text):
+                queue.put_nowait(content)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    loop = asyncio.get_running_loop()
+    extraction = asyncio.create_task(extract())
+    pending: List[Statement] = []
+    deadline: Optional[float] = None
+    try:
+        while True:
+            try:
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = ''  # Flush what has waited long enough
+            if isinstance(item, Exception):
+                raise item
+            if item:
+                content_hash = statement_hash(item)
+                if content_hash in known:
+                    continue
+                known.add(content_hash)
+                pending.append(Statement(content=item, content_hash=content_hash, status='pending'))
+                if deadline is None:
+                    deadline = loop.time() + settings.JOB_STATEMENT_FLUSH_SECONDS
+            if pending and (not item or len(pending) >= settings.JOB_STATEMENT_BATCH_SIZE):
+                batch, pending, deadline = pending, [], None
+                for statement in await _insert_statements(job, article, batch):
+                    yield statement
+            if item is None:
+                break
+    finally:
+        extraction.cancel()
+    await _update_job(job.id, extracted=True)
+
+
+async def _check_statement(job: Job, statement: Statement, semaphore: asyncio.Semaphore,
+                           writer: StatementWriter, pool: EvidencePool,
+                           planner: Optional[ResearchPlanner] = None,
+                           worthiness: Optional[WorthinessBatcher] = None) -> Optional[Statement]:
+    if worthiness is not None:
+        threshold = _worthiness_threshold(job)
+        if statement.worthiness is None:
+            statement.worthiness = await worthiness.score(statement.content)
+            if statement.worthiness is not None:
+                await writer.write(statement.id, worthiness=statement.worthiness)
+        if statement.worthiness is not None and statement.worthiness < threshold:
+            await writer.write(statement.id, status='skipped', explanation=(
+                f"Not checked: scored {statement.worthiness:.2f} for check-worthiness, under {threshold:.2f}."))
+            statement.status = 'skipped'
+            return None
+    async with semaphore:
+        await writer.write(statement.id, status='checking')
+        attempts = 0
+        cached = None if job.force_refresh else await lookup_verdict(statement.content)
+        if cached:
+            logger.info(f"Job {job.id}: reusing {cached.match} verdict from statement {cached.statement_id} "
+                        f"for statement {statement.id}")
+            verdict = cached.verdict
+        else:
+            # Only statements that will search plan research; a stored verdict needs none
+            if planner is not None:
+                await planner.add(statement.content)
+            try:
+                async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(settings.JOB_STATEMENT_ATTEMPTS),
+                    wait=wait_exponential(multiplier=2, min=2, max=60),
+                    reraise=True
+                ):
+                    with attempt:
+                        attempts = attempt.retry_state.attempt_number
+                        # The stored verdict was looked up above
+                        verdict = await run_fact_check(statement.content, force_refresh=True,
+                                                       thread_id=statement_thread_id(statement.id), budget='bulk',
+                                                       evidence_pool=pool)
+            except Exception as e:
+                logger.error(f"Job {job.id}: statement {statement.id} failed after {attempts} attempts: {e}")
+                await writer.write(statement.id, status='failed', attempts=statement.attempts + attempts)
+                return None
+
+        values = {
+            'verdict': verdict.verdict,
+            'explanation': verdict.explanation,
+            'references': with_reference_domains(verdict.references),
+            # A reused verdict keeps its original time, so reuse doesn't restart its freshness
+            'checked_at': verdict.checked_at or datetime.utcnow(),
+            'budget_limited': verdict.budget_limited,
+            'status': 'checked',
+            'attempts': statement.attempts + attempts
+        }
+        await writer.write(statement.id, **values)
+        for key, value in values.items():
+            setattr(statement, key, value)
+        return statement
+
+
+def _worthiness_threshold(job: Job) -> float:
+    return WORTHINESS_THRESHOLD if job.worthiness_threshold is None else job.worthiness_threshold
+
+
+async def process_article_job(job: Job) -> None:
+    async with get_session_context() as session:
+        article = await session.get(Article, job.article_id)
+        statements = await crud.get_article_statements(session, job.article_id)
+    if article is None:
+        raise JobError(f"Article {job.article_id} no longer exists")
+
+    todo = [st for st in statements if st.status in ('pending', 'checking')]
+    pool = EvidencePool(job.article_id)
+    retrievers = {'wiki': wiki_retriever, 'web': web_retriever}
+    semaphore = asyncio.Semaphore(settings.JOB_STATEMENT_CONCURRENCY)
+    writer = StatementWriter(job.article_id, settings.JOB_STATEMENT_BATCH_SIZE, settings.JOB_STATEMENT_FLUSH_SECONDS)
+    # Statements not worth checking are skipped before they get an agent run
+    worthiness = WorthinessBatcher() if _worthiness_threshold(job) > 0 else None
+    queued: List[Statement] = []
+    tasks: List[asyncio.Task] = []
+    try:
+        # Statements are only extracted once; a resumed job picks up where it left off
+        if job.extracted and statements:
+            logger.info(f"Job {job.id}: checking {len(todo)} of {len(statements)} statements")
+            # Research shared by several statements is retrieved once, up front, into the article's evidence pool
+            try:
+                await plan_research(pool, [st.content for st in todo], retrievers)
+            except Exception as e:
+                logger.error(f"Job {job.id}: research planning failed, statements will search on their own: {e}")
+            queued = list(todo)
+            tasks = [asyncio.create_task(_check_statement(job, st, semaphore, writer, pool, worthiness=worthiness))
+                     for st in todo]
+        else:
+            estimate = estimate_extraction(article.text)
+            logger.info(f"Job {job.id}: extracting about {estimate.statements} statements from {estimate.windows} "
+                        f"windows, estimated ${estimate.extraction_cost_usd:.2f} to extract and at most "
+                        f"${estimate.check_cost_usd_max:.2f} to check")
+            # Check statements while the rest are still being extracted, planning research as entities recur
+            planner = ResearchPlanner(pool, retrievers)
+            queued = list(todo)
+            tasks = [asyncio.create_task(_check_statement(job, st, semaphore, writer, pool, planner, worthiness))
+                     for st in todo]
+            async for statement in _extract_statements(job, article, {st.content_hash for st in statements}):
+                queued.append(statement)
+                tasks.append(asyncio.create_task(
+                    _check_statement(job, statement, semaphore, writer, pool, planner, worthiness)))
+            logger.info(f"Job {job.id}: extracted {len(tasks) - len(todo)} statements, checking {len(tasks)}")
+        checked = await asyncio.gather(*tasks)
+    finally:
+        # Don't leave checks running if extraction failed or the job is shutting down
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if worthiness is not None:
+            worthiness.close()
+        # Also on shutdown, so verdicts that are already in aren't checked again
+        await writer.flush()
+        stats = evidence_pool_stats.record(pool)
+        logger.info(f"Job {job.id}: {stats['external_calls']} external searches for {stats['agent_searches']} "
+                    f"agent searches, {stats['answered_from_pool']} answered from the evidence pool and "
+                    f"{stats['answered_from_memory']} from evidence memory")
+        if worthiness is not None:
+            stats = worthiness_stats.record(job.article_id, _worthiness_threshold(job),
+                                            scored=sum(st.worthiness is not None for st in queued),
+                                            skipped=sum(st.status == 'skipped' for st in queued),
+                                            calls=worthiness.calls)
+            logger.info(f"Job {job.id}: skipped {stats['agent_runs_avoided']} of {len(queued)} statements as not "
+                        f"check-worthy, in {stats['scoring_calls']} scoring calls")
+    await index_statements([st for st in checked if st])
+
+
+JOB_HANDLERS = {
+    'article': process_article_job
+}
+
+
+class JobWorker:
+    """Pool of asyncio tasks that claim and run jobs until stopped."""
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake idle workers now instead of at their next poll."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        await recover_jobs()
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(prune_checkpoints_periodically()))
+        logger.info(f"Started {self.workers} job workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while True:
+            try:
+                job = await claim_job()
+            except Exception as e:
+                logger.error(f"Job worker {index} could not claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._process(job)
+
+    async def _process(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(_heartbeat(job.id))
+        try:
+            if job.attempts > job.max_attempts:
+                raise JobError(f"Gave up after {job.max_attempts} attempts")
+            await JOB_HANDLERS[job.kind](job)
+            await _update_job(job.id, status='completed', error=None, locked_at=None, finished_at=datetime.utcnow())
+            article_events.publish(job.article_id, 'job', 'completed')
+            logger.info(f"Job {job.id} completed")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job straight back to the queue rather than waiting out its lease
+            await _update_job(job.id, status='queued', attempts=job.attempts - 1, locked_at=None,
+                              next_attempt_at=datetime.utcnow())
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} attempt {job.attempts} failed: {e}")
+            if isinstance(e, JobError) or job.attempts >= job.max_attempts:
+                await _update_job(job.id, status='failed', error=str(e), locked_at=None, finished_at=datetime.utcnow())
+                article_events.publish(job.article_id, 'job', 'failed')
+            else:
+                await _update_job(job.id, status='queued', error=str(e), locked_at=None,
+                                  next_attempt_at=datetime.utcnow() + retry_delay(job.attempts))
+        finally:
+            heartbeat.cancel()
+
+
+job_worker = JobWorker(workers=settings.JOB_WORKERS, poll_seconds=settings.JOB_POLL_SECONDS)
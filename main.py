@@ -5,8 +5,11 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from routers import users, api, articles, admin
+from routers import users, api, articles, admin, jobs
 from database import create_db_and_tables
+from jobs import job_worker
+from chains.evidence_memory import memory as evidence_memory
+from chains.http_clients import http_clients
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -59,6 +62,7 @@ app.include_router(users.router)
 app.include_router(api.router)
 app.include_router(articles.router)
 app.include_router(admin.router)
+app.include_router(jobs.router)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -69,6 +73,17 @@ templates = Jinja2Templates(directory="templates")
 @app.on_event("startup")
 async def on_startup():
     await create_db_and_tables()
+    http_clients.open()
+    await job_worker.start()
+    if evidence_memory:
+        await evidence_memory.prune()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await job_worker.stop()
+    if evidence_memory:
+        await evidence_memory.close()
+    await http_clients.aclose()
 
 @app.get("/")
 @limiter.limit("20/minute")
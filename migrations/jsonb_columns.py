@@ -0,0 +1,125 @@
+"""Move `Statement.references` and `Article.links` from JSON text columns to JSONB.
+
+    python -m migrations.jsonb_columns [--dry_run]
+
+Safe to run more than once: columns that are already JSONB are skipped. Each
+column is copied into a new JSONB column in batches and then swapped in, all
+in one transaction. Values are parsed in Python so that legacy rows survive:
+double-encoded strings are unwrapped, anything unparseable becomes `[]`, and
+references gain the `domain` key used by "statements citing X" queries.
+`init_db` runs this in production, after creating missing tables.
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models import get_table_name, with_reference_domains
+
+BATCH_SIZE = 1000
+
+
+def parse_legacy(value: Any) -> List:
+    # Some rows were json.dumps'd twice; unwrap until we reach the list
+    for _ in range(3):
+        if not isinstance(value, str):
+            break
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def _references(value: Any) -> List[dict]:
+    return with_reference_domains([ref for ref in parse_legacy(value) if isinstance(ref, dict)])
+
+
+def _links(value: Any) -> List[str]:
+    return [link for link in parse_legacy(value) if isinstance(link, str)]
+
+
+COLUMNS = [
+    # (table, column, transform)
+    (get_table_name('statement'), 'references', _references),
+    (get_table_name('article'), 'links', _links),
+]
+
+INDEXES = [
+    f'CREATE INDEX IF NOT EXISTS ix_{get_table_name("statement")}_references '
+    f'ON "{get_table_name("statement")}" USING gin ("references" jsonb_path_ops)',
+]
+
+
+async def column_type(conn: AsyncConnection, table: str, column: str) -> str:
+    result = await conn.execute(
+        text("SELECT data_type FROM information_schema.columns WHERE table_name = :table AND column_name = :column"),
+        {'table': table, 'column': column}
+    )
+    return result.scalar()
+
+
+async def migrate_column(conn: AsyncConnection, table: str, column: str, transform: Callable[[Any], List],
+                         dry_run: bool = False) -> int:
+    """Convert one column to JSONB. Returns the number of rows rewritten."""
+    if await column_type(conn, table, column) in (None, 'jsonb'):
+        return 0
+    staging = f"{column}_jsonb"
+    await conn.execute(text(f'ALTER TABLE "{table}" DROP COLUMN IF EXISTS "{staging}"'))
+    await conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{staging}" jsonb'))
+
+    converted, last_id = 0, 0
+    while True:
+        rows = (await conn.execute(
+            text(f'SELECT id, "{column}" AS value FROM "{table}" WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        )).all()
+        if not rows:
+            break
+        await conn.execute(
+            text(f'UPDATE "{table}" SET "{staging}" = CAST(:value AS jsonb) WHERE id = :id'),
+            [{'id': row.id, 'value': json.dumps(transform(row.value))} for row in rows]
+        )
+        converted += len(rows)
+        last_id = rows[-1].id
+
+    if dry_run:
+        await conn.execute(text(f'ALTER TABLE "{table}" DROP COLUMN "{staging}"'))
+    else:
+        await conn.execute(text(f'ALTER TABLE "{table}" DROP COLUMN "{column}"'))
+        await conn.execute(text(f'ALTER TABLE "{table}" RENAME COLUMN "{staging}" TO "{column}"'))
+        await conn.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN "{column}" SET DEFAULT \'[]\'::jsonb'))
+    return converted
+
+
+async def migrate(conn: AsyncConnection, dry_run: bool = False) -> dict:
+    if conn.dialect.name != 'postgresql':
+        return {}
+    converted = {}
+    for table, column, transform in COLUMNS:
+        converted[f"{table}.{column}"] = await migrate_column(conn, table, column, transform, dry_run=dry_run)
+    if not dry_run:
+        for index in INDEXES:
+            await conn.execute(text(index))
+    return converted
+
+
+async def main(dry_run: bool) -> None:
+    from database import engine, logger
+
+    engine.echo = False
+    async with engine.begin() as conn:
+        converted = await migrate(conn, dry_run=dry_run)
+    await engine.dispose()
+    for column, rows in converted.items():
+        logger.info(f"{column}: {rows} rows {'checked' if dry_run else 'converted'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dry_run', action='store_true', help='Parse and convert every row, then roll the columns back')
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run))
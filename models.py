@@ -1,8 +1,10 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import JSON, Column, ForeignKey, Index, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional, List
+from urllib.parse import urlparse
 from pydantic import AnyHttpUrl, validator
 from datetime import datetime
-import json
 import os
 
 from schemas import Reference
@@ -20,6 +22,21 @@ def get_table_name(model_name: str) -> str:
     return f"{table_prefix}{model_name}"
 
 
+def json_column() -> Column:
+    """JSONB on Postgres (JSON elsewhere), so lists of references/links are stored and loaded natively."""
+    return Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=True, server_default='[]')
+
+
+def reference_domain(source: Optional[str]) -> Optional[str]:
+    host = urlparse(source or '').hostname
+    return host[4:] if host and host.startswith('www.') else host
+
+
+def with_reference_domains(references: Optional[List[dict]]) -> List[dict]:
+    """References as stored: each gets a `domain` key so "statements citing X" is an indexed containment query."""
+    return [{**ref, 'domain': reference_domain(ref.get('source'))} for ref in references or []]
+
+
 class User(SQLModel, table=True):
     __tablename__ = f"{table_prefix}user"
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -36,38 +53,45 @@ class Statement(SQLModel, table=True):
     __tablename__ = f"{table_prefix}statement"
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str = Field(index=True)
+    content_hash: Optional[str] = Field(default=None, max_length=64, index=True)  # sha256 of the normalized content, for verdict reuse
     verdict: Optional[str] = Field(default=None)
     explanation: Optional[str] = Field(default=None)
-    references: Optional[str] = Field(default="[]")  # Store as JSON string in the database
+    references: Optional[List[dict]] = Field(default_factory=list, sa_column=json_column())
+    status: Optional[str] = Field(default="checked", max_length=20)  # pending, checking, checked, skipped or failed
+    attempts: int = Field(default=0)
+    worthiness: Optional[float] = Field(default=None)  # Check-worthiness score, 0-1 (chains/worthiness_chain.py)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    checked_at: Optional[datetime] = Field(default=None)  # When the verdict was reached; a reused verdict keeps the original's
+    budget_limited: Optional[str] = Field(default=None)  # The budget that cut research short; such verdicts aren't reused
     article_id: Optional[int] = Field(default=None, foreign_key=f"{get_table_name('article')}.id")
     user_id: Optional[int] = Field(default=None, foreign_key=f"{get_table_name('user')}.id")
 
     article: Optional["Article"] = Relationship(back_populates="statements")
 
-    @validator("references", pre=True, always=True)
-    def parse_references(cls, v):
-        # If references is a JSON string, parse it to a list
-        if isinstance(v, str):
-            try:
-                return json.loads(v)  # Convert JSON string to list
-            except json.JSONDecodeError:
-                return []  # Return empty list if JSON parsing fails
-        return v or []
+    __table_args__ = (
+        # Containment queries on references, e.g. references @> '[{"domain": "nature.com"}]'
+        Index(f"ix_{table_prefix}statement_references", "references", postgresql_using="gin",
+              postgresql_ops={"references": "jsonb_path_ops"}),
+    )
 
     def set_references(self, references: List[dict]) -> None:
-        # Converts a list of dictionaries to a JSON string for storage
-        if references is None:
-            self.references = '[]'
-        else:
-            try:
-                self.references = json.dumps(references)
-            except (TypeError, ValueError):
-                self.references = '[]'
+        self.references = with_reference_domains(references)
+
+
+class StatementEmbedding(SQLModel, table=True):
+    """Embedding of a Statement's content, used to find near-duplicate statements that already have a verdict."""
+    __tablename__ = f"{table_prefix}statement_embedding"
+    statement_id: int = Field(
+        sa_column=Column(Integer, ForeignKey(f"{get_table_name('statement')}.id", ondelete="CASCADE"), primary_key=True)
+    )
+    model: str = Field(max_length=100)
+    embedding: str  # Store as JSON list of floats
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Article(SQLModel, table=True):
     __tablename__ = f"{table_prefix}article"
+    __table_args__ = (Index(f"ix_{table_prefix}article_date_id", "date", "id"),)  # Keyset pagination of listings
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(max_length=200)
     text: str
@@ -75,28 +99,64 @@ class Article(SQLModel, table=True):
     user_id: int = Field(foreign_key=f"{get_table_name('user')}.id")
     is_active: bool = Field(default=True)
     domain: Optional[str] = Field(max_length=500, unique=True, index=True)
-    links: Optional[str] = Field(default="[]")  # Store as JSON string
+    links: Optional[List[str]] = Field(default_factory=list, sa_column=json_column())
     authors: Optional[str] = Field(max_length=1000)
     publication_date: Optional[datetime]
     extraction_date: datetime = Field(default_factory=datetime.utcnow)
 
     user: Optional[User] = Relationship(back_populates="articles")
     statements: List[Statement] = Relationship(back_populates="article", sa_relationship_kwargs={"lazy": "joined"})
-    
-    @validator("links", pre=True, always=True)
-    def parse_links(cls, v):
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
-        return v
 
     def set_links(self, links: List[str]) -> None:
-        if links is None:
-            self.links = '[]'
-        else:
-            try:
-                self.links = json.dumps(links)
-            except (TypeError, ValueError):
-                self.links = '[]'
+        self.links = list(links or [])
+
+
+class Job(SQLModel, table=True):
+    """Background work item, claimed and processed by the worker pool in jobs.py."""
+    __tablename__ = f"{table_prefix}job"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(default="article", max_length=50)
+    status: str = Field(default="queued", max_length=20, index=True)  # queued, running, completed or failed
+    article_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, ForeignKey(f"{get_table_name('article')}.id", ondelete="CASCADE"), index=True)
+    )
+    user_id: int = Field(foreign_key=f"{get_table_name('user')}.id")
+    force_refresh: bool = Field(default=False)
+    extracted: bool = Field(default=False)  # All statements are in; until then a resumed job extracts again
+    worthiness_threshold: Optional[float] = Field(default=None)  # Skip statements scoring lower; None uses the default
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    error: Optional[str] = Field(default=None)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    locked_at: Optional[datetime] = Field(default=None)  # Lease heartbeat while running
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
+class GraphCheckpoint(SQLModel, table=True):
+    """Latest LangGraph checkpoint of an in-flight statement check, so an interrupted check resumes (checkpoints.py)."""
+    __tablename__ = f"{table_prefix}graph_checkpoint"
+    thread_id: str = Field(primary_key=True, max_length=100)
+    checkpoint_ns: str = Field(default="", primary_key=True, max_length=255)
+    checkpoint_id: str = Field(max_length=64)
+    parent_checkpoint_id: Optional[str] = Field(default=None, max_length=64)
+    type: str = Field(max_length=20)  # Serializer type of `checkpoint`
+    checkpoint: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # Checkpoint and its metadata
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class GraphCheckpointWrite(SQLModel, table=True):
+    """Output of a graph node that finished after the latest checkpoint, replayed on resume."""
+    __tablename__ = f"{table_prefix}graph_checkpoint_write"
+    thread_id: str = Field(primary_key=True, max_length=100)
+    checkpoint_ns: str = Field(default="", primary_key=True, max_length=255)
+    checkpoint_id: str = Field(primary_key=True, max_length=64)
+    task_id: str = Field(primary_key=True, max_length=64)
+    idx: int = Field(primary_key=True)
+    channel: str = Field(max_length=255)
+    type: str = Field(max_length=20)
+    value: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    task_path: str = Field(default="", max_length=255)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,11 +6,19 @@ from database import get_session
 from models import User, Article, Statement
 from auth import get_current_active_user
 from sqlalchemy import select, func
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import selectinload
 import crud
-from schemas import ArticleRead, ArticleUpdate, UserUpdate, StatementUpdate
-import json
+from chains.retrieval_cache import retrieval_cache
+from chains.rate_limiter import rate_limiter_stats
+from chains.cascade import cascade_stats
+from chains.evidence_pool import evidence_pool_stats
+from chains.worthiness_chain import worthiness_stats
+from chains.wiki_index import wiki_index_stats
+from chains.arxiv_index import arxiv_index_stats
+from chains.evidence_memory import memory as evidence_memory
+from chains.http_clients import http_clients
+from schemas import ArticlePage, ArticleRead, ArticleUpdate, UserUpdate, StatementUpdate
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -88,6 +96,114 @@ async def get_admin_stats(
         "statements_count": statements_count
     }
 
+@router.get("/api/admin/retrieval_cache")
+async def get_retrieval_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return retrieval_cache.stats()
+
+@router.get("/api/admin/llm_rate_limits")
+async def get_llm_rate_limit_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return rate_limiter_stats()
+
+@router.get("/api/admin/model_cascade")
+async def get_model_cascade_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return cascade_stats.stats()
+
+@router.get("/api/admin/evidence_pool")
+async def get_evidence_pool_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return evidence_pool_stats.stats()
+
+@router.get("/api/admin/worthiness")
+async def get_worthiness_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return worthiness_stats.stats()
+
+@router.get("/api/admin/wiki_index")
+async def get_wiki_index_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return wiki_index_stats.stats()
+
+@router.get("/api/admin/arxiv_index")
+async def get_arxiv_index_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return arxiv_index_stats.stats()
+
+@router.get("/api/admin/evidence_memory")
+async def get_evidence_memory_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return await evidence_memory.stats() if evidence_memory else {'enabled': False}
+
+@router.get("/api/admin/http_clients")
+async def get_http_client_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin stats"
+        )
+
+    return http_clients.stats()
+
 @router.get("/api/admin/users")
 async def get_admin_users(
     db: AsyncSession = Depends(get_session),
@@ -166,8 +282,10 @@ async def get_admin_article(
         )
     return article
 
-@router.get("/api/admin/articles", response_model=List[ArticleRead])
+@router.get("/api/admin/articles", response_model=ArticlePage)
 async def get_admin_articles(
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -176,10 +294,11 @@ async def get_admin_articles(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access article management"
         )
-    
-    result = await db.execute(select(Article).options(selectinload(Article.user)))
-    articles = result.scalars().unique().all()
-    return articles
+
+    try:
+        return await crud.list_articles(db, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.put("/api/admin/articles/{article_id}", response_model=ArticleRead)
 async def update_article_admin(
@@ -273,7 +392,7 @@ async def update_statement_admin(
         if statement_data.explanation is not None:
             statement.explanation = statement_data.explanation
         if statement_data.references is not None:
-            statement.references = json.dumps([ref.model_dump() for ref in statement_data.references])
+            statement.set_references([ref.model_dump() for ref in statement_data.references])
         
         await db.commit()
         await db.refresh(statement)
@@ -1,20 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_session
 from models import User
 from auth import get_current_active_user
-from typing import List, Union
+from typing import List, Optional, Union
 
-from schemas import StatementRequest
-from chains.statement_chain import get_statements as _get_statements
+import crud
+from schemas import StatementRequest, StatementRead
+from chains.statement_chain import ExtractionEstimate, estimate_extraction, get_statements as _get_statements
 from chains.adjudicator_chain import Verdict
 #from chains.fact_check_chain import multi_hop_fact_check as fact_check_chain
-from agents.statement_checker import multi_agent_fact_check as fact_check_chain
+from agents.statement_checker import multi_agent_fact_check as fact_check_chain, stream_fact_check
+from verdict_cache import lookup_verdict
+from checkpoints import run_durable_fact_check
+from streaming import sse_event, SSE_HEADERS
+from chains.budget import budget_config
+from chains.evidence_pool import EvidencePool
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api", tags=["api"])
 
 
+async def run_fact_check(statement: str, force_refresh: bool = False, thread_id: Optional[str] = None,
+                         budget: str = 'interactive', evidence_pool: Optional[EvidencePool] = None) -> Verdict:
+    """Fact-check a statement, reusing a stored verdict unless `force_refresh`. Raises on failure.
+
+    With a `thread_id` the check is checkpointed, and a retry with the same id resumes where it stopped.
+    `budget` names the limits on the check (chains/budget.py); a check that runs out is judged on the
+    research it has, with `budget_limited` set on the verdict. Searches look in `evidence_pool` first.
+    """
+    if not force_refresh:
+        cached = await lookup_verdict(statement)
+        if cached:
+            logger.info(f"Reusing {cached.match} verdict from statement {cached.statement_id}")
+            return cached.verdict
+    if thread_id:
+        return await run_durable_fact_check(statement, thread_id, budget, evidence_pool)
+    config = budget_config(budget)
+    config['configurable']['evidence_pool'] = evidence_pool
+    verdict = await fact_check_chain.ainvoke({'statement': statement}, config)
+    if verdict is None:
+        raise ValueError("Fact-check finished without a verdict")
+    return verdict
+
+
 @router.post("/check_statement", response_model=Union[Verdict, None])
 async def check_statement(
     statement: StatementRequest,
@@ -22,14 +55,43 @@ async def check_statement(
     db: AsyncSession = Depends(get_session)
 ):
     try:
-        _statement = statement.statement
-        verdict = await fact_check_chain.ainvoke({'statement': _statement})
+        verdict = await run_fact_check(statement.statement, force_refresh=statement.force_refresh)
         return verdict
     except Exception as e:
         #raise HTTPException(status_code=500, detail=str(e))
         return None
 
 
+@router.post("/check_statement/stream")
+async def check_statement_stream(
+    statement: StatementRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Same check as /check_statement, streamed as server-sent events while the agents work.
+
+    Events: `tool` (research or judgement chosen), `sources` (documents retrieved), `draft` (a verdict
+    before review), `review` (reviewer outcome), then `verdict` or `error`. A stored verdict is sent
+    straight away as `verdict` with `cached: true`.
+    """
+    async def events():
+        yield sse_event('status', {'stage': 'started'})
+        try:
+            if not statement.force_refresh:
+                cached = await lookup_verdict(statement.statement)
+                if cached:
+                    yield sse_event('verdict', {**cached.verdict.dict(), 'cached': True, 'match': cached.match})
+                    return
+            async for event, data in stream_fact_check(statement.statement):
+                if event == 'verdict':
+                    data = {**data, 'cached': False}
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.exception(f"Streaming check failed: {e}")
+            yield sse_event('error', {'detail': 'An error occurred while checking the statement'})
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers=SSE_HEADERS)
+
+
 @router.post("/get_statements", response_model=List[str])
 async def get_statements(
     content: str,
@@ -41,3 +103,27 @@ async def get_statements(
         return statements
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/get_statements/estimate", response_model=ExtractionEstimate)
+async def estimate_statements(
+    content: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """What extracting and checking `content` would cost, estimated without calling any model."""
+    return estimate_extraction(content)
+
+
+@router.get("/statements/citing", response_model=List[StatementRead])
+async def get_statements_citing(
+    domain: Optional[str] = Query(default=None, description="Reference domain, e.g. nature.com"),
+    source: Optional[str] = Query(default=None, description="Exact reference URL"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_session)
+):
+    """Statements whose verdict cites a given domain or source."""
+    if bool(domain) == bool(source):
+        raise HTTPException(status_code=400, detail="Pass exactly one of domain or source")
+    return await crud.get_statements_citing(db, domain=domain, source=source, skip=skip, limit=limit)
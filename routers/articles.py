@@ -1,67 +1,61 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Union
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from database import get_session
-from schemas import ArticleCreate, ArticleRead, ArticleUpdate, StatementRequest
+from schemas import ArticleCreate, ArticleRead, ArticleJobRead, ArticleUpdate, ArticlePage, JobStatus
 from models import User, Article, Statement
 from crud import (
     create_article,
     get_article,
     get_article_by_url,
     get_articles,
+    list_articles,
     update_article,
     delete_article,
-    create_statement
+    get_latest_article_job
 )
 from auth import get_current_active_user
-from routers.api import get_statements, check_statement
 from chains.article_metadata_chain import chain as metadata_chain
-from langchain_community.retrievers import TavilySearchAPIRetriever
-import json
-import asyncio
+from jobs import enqueue_article_job, get_job_status, stream_article_job
+from streaming import SSE_HEADERS
+from chains.api_retrievers import TavilyAPIRetriever
 
 router = APIRouter(prefix="/api/articles", tags=["articles"])
 
-@router.post("", response_model=ArticleRead)
+logger = logging.getLogger(__name__)
+
+@router.post("", response_model=ArticleJobRead, status_code=status.HTTP_202_ACCEPTED)
 async def create_new_article(
     article: ArticleCreate,
+    force_refresh: bool = Query(default=False),
+    worthiness_threshold: Optional[float] = Query(
+        default=None, ge=0, le=1, description="Skip statements scoring lower for check-worthiness; 0 checks all"),
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
+    """Save the article and queue its fact-check. Progress is reported at /api/jobs/{job_id}."""
     db_article = await create_article(db=db, article=article, user_id=current_user.id)
-
-    statements = await get_statements(article.text)
-    statements = [st for st in statements if st]
-
-    check_tasks = [check_statement(StatementRequest(statement=st)) for st in statements]
-    verdicts = await asyncio.gather(*check_tasks)
-
-    for statement, verdict in zip(statements, verdicts):
-        if verdict:
-            statement_create = Statement(
-                content=statement,
-                verdict=verdict.verdict,
-                explanation=verdict.explanation
-            )
-            statement_create.references = json.dumps(verdict.references)
-            db_statement = await create_statement(
-                db=db,
-                statement=statement_create, 
-                article_id=db_article.id, 
-                user_id=current_user.id
-            )
-        
-    return db_article
+    job = await enqueue_article_job(
+        db,
+        article_id=db_article.id,
+        user_id=current_user.id,
+        force_refresh=force_refresh,
+        worthiness_threshold=worthiness_threshold
+    )
+    return ArticleJobRead(**ArticleRead.model_validate(db_article).model_dump(), job_id=job.id)
 
 
 class UrlRequest(BaseModel):
     url: str
 
-@router.post("/from_url", response_model=Union[ArticleRead, None])
+@router.post("/from_url", response_model=ArticleJobRead)
 async def get_article_from_url(
     url: UrlRequest,
+    force_refresh: bool = Query(default=False),
+    worthiness_threshold: Optional[float] = Query(default=None, ge=0, le=1),
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -69,35 +63,39 @@ async def get_article_from_url(
     domain = url.split('//')[1].split('/')[0]
     domain = 'https://' + domain
 
-    search = TavilySearchAPIRetriever(k=3, include_raw_content=True, include_domains=[domain])
+    search = TavilyAPIRetriever(k=3, include_raw_content=True, include_domains=[domain])
 
     try:
         res = await search.ainvoke(url)
+    except Exception:
+        logger.exception("Article search failed for %s", url)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not reach the article search service"
+        )
 
-        doc = [doc for doc in res if doc.metadata['source']==url]
-        if doc:
-            print("Search url found")
-            doc = doc[0]
-        else:
-            print('Search url not found, using closest article')
-            doc = res[0]
-
-        result = {
-            'title': doc.metadata['title'],
-            'domain': doc.metadata['source'],
-            'text': doc.page_content
-        }
-    except Exception as e:
-        print(e)
-        result = None
-
-    if result:
-        metadata = await metadata_chain.ainvoke(result['text'])
-        result = result | metadata.dict()
-        db_article = await create_new_article(article=ArticleCreate(**result), db=db, current_user=current_user)
-        return db_article
-    else:
-        return None
+    if not res:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No article found at that URL")
+
+    doc = next((doc for doc in res if doc.metadata['source'] == url), None)
+    if doc is None:
+        logger.info("%s not found by search, using the closest article %s", url, res[0].metadata['source'])
+        doc = res[0]
+
+    result = {
+        'title': doc.metadata['title'],
+        'domain': doc.metadata['source'],
+        'text': doc.page_content
+    }
+    metadata = await metadata_chain.ainvoke(result['text'])
+    result = result | metadata.dict()
+    return await create_new_article(
+        article=ArticleCreate(**result),
+        force_refresh=force_refresh,
+        worthiness_threshold=worthiness_threshold,
+        db=db,
+        current_user=current_user
+    )
 
 @router.get("", response_model=List[ArticleRead])
 async def read_articles(
@@ -108,6 +106,19 @@ async def read_articles(
     articles = await get_articles(db, skip=skip, limit=limit)
     return articles
 
+@router.get("/list", response_model=ArticlePage)
+async def list_article_page(
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    include: Optional[str] = Query(default=None, pattern="^statements$", description="'statements' to embed each article's statements"),
+    db: AsyncSession = Depends(get_session)
+):
+    """Lightweight listing for the front page: newest first, with verdict counts instead of full statements."""
+    try:
+        return await list_articles(db, limit=limit, cursor=cursor, include_statements=include == 'statements')
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{article_id}", response_model=ArticleRead)
 async def read_article(
     article_id: int,
@@ -128,6 +139,33 @@ async def read_article_by_url(
         raise HTTPException(status_code=404, detail="Article not found")
     return article
 
+@router.get("/{article_id}/job", response_model=JobStatus)
+async def read_article_job(
+    article_id: int,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    job = await get_latest_article_job(db, article_id=article_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No fact-check job for this article")
+    if job.user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to view this job")
+    return await get_job_status(db, job)
+
+@router.get("/{article_id}/stream")
+async def stream_article(
+    article_id: int,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Server-sent events pushing each statement's verdict as soon as its check finishes."""
+    job = await get_latest_article_job(db, article_id=article_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No fact-check job for this article")
+    if job.user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to view this job")
+    return StreamingResponse(stream_article_job(article_id), media_type='text/event-stream', headers=SSE_HEADERS)
+
 @router.put("/{article_id}", response_model=ArticleRead)
 async def update_existing_article(
     article_id: int,
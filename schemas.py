@@ -1,9 +1,8 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List, Any, Union
+from typing import Optional, List, Any, Union, Dict
 from typing_extensions import TypedDict
 from datetime import datetime
 from dateutil import parser
-import json
 
 # User schemas
 class UserCreate(BaseModel):
@@ -46,6 +45,7 @@ class StatementBase(BaseModel):
 
 class StatementRequest(BaseModel):
     statement: str
+    force_refresh: bool = False  # Skip stored verdicts and run a fresh check
 
 class StatementCreate(StatementBase):
     pass
@@ -66,18 +66,16 @@ class StatementRead(BaseModel):
     content: str
     verdict: Optional[str] = None
     explanation: Optional[str] = None
-    references: List[Reference] = []  # Expect this as a list in the response
+    references: List[Reference] = []
+    status: Optional[str] = None
+    worthiness: Optional[float] = None
+    budget_limited: Optional[str] = None
     created_at: datetime
     article_id: Optional[int] = None
     user_id: Optional[int] = None
 
     @validator("references", pre=True)
-    def parse_references(cls, v):
-        if isinstance(v, str):  # Parse JSON string to list
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
+    def default_references(cls, v):
         return v or []
 
 # Article schemas
@@ -123,15 +121,31 @@ class ArticleRead(BaseModel):
         }
 
     @validator('links', pre=True)
-    def parse_links(cls, v):
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
+    def default_links(cls, v):
         return v or []
 
 
+class ArticleSummary(BaseModel):
+    """Listing projection of an Article: no full text, statements only when asked for."""
+    id: int
+    title: str
+    domain: Optional[str] = None
+    authors: Optional[str] = None
+    publication_date: Optional[datetime] = None
+    date: datetime
+    user_id: int
+    is_active: bool = True
+    excerpt: str = ''
+    statement_count: int = 0
+    verdict_counts: Dict[str, int] = {}
+    statements: Optional[List[StatementRead]] = None
+
+
+class ArticlePage(BaseModel):
+    items: List[ArticleSummary]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page; None on the last page
+
+
 class ArticleUpdate(BaseModel):
     title: Optional[str] = None
     text: Optional[str] = None
@@ -140,3 +154,44 @@ class ArticleUpdate(BaseModel):
     publication_date: Optional[datetime] = None
     is_active: Optional[bool] = None
     links: Optional[List[str]] = None
+
+
+# Job schemas
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: str
+    article_id: Optional[int] = None
+    attempts: int
+    worthiness_threshold: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class StatementProgress(BaseModel):
+    id: int
+    content: str
+    status: Optional[str] = None
+    verdict: Optional[str] = None
+    worthiness: Optional[float] = None
+    attempts: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class JobStatus(JobRead):
+    total: int = 0
+    checked: int = 0
+    failed: int = 0
+    skipped: int = 0  # Not check-worthy, so no agent run
+    statements: List[StatementProgress] = []
+
+
+class ArticleJobRead(ArticleRead):
+    job_id: int
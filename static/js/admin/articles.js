@@ -4,19 +4,25 @@ document.addEventListener('DOMContentLoaded', () => {
     // Event listeners for edit article modal
     const saveArticleChangesBtn = document.getElementById('save-article-changes');
     saveArticleChangesBtn.addEventListener('click', saveArticleChanges);
+    document.getElementById('load-more-articles').addEventListener('click', () => loadArticles(nextCursor));
 });
 
-async function loadArticles() {
+let nextCursor = null;
+
+async function loadArticles(cursor = null) {
     try {
-        const response = await fetch('/api/admin/articles', {
+        const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`/api/admin/articles${params}`, {
             headers: {
                 'Authorization': `Bearer ${localStorage.getItem('access_token')}`
             }
         });
 
         if (response.ok) {
-            const articles = await response.json();
-            displayArticles(articles);
+            const page = await response.json();
+            displayArticles(page.items, Boolean(cursor));
+            nextCursor = page.next_cursor;
+            document.getElementById('load-more-articles').style.display = nextCursor ? 'inline-block' : 'none';
         } else {
             console.error('Failed to load articles');
             showError('Failed to load articles. Please try again.');
@@ -27,9 +33,9 @@ async function loadArticles() {
     }
 }
 
-function displayArticles(articles) {
+function displayArticles(articles, append = false) {
     const tbody = document.getElementById('articles-table-body');
-    tbody.innerHTML = articles.map(article => `
+    const rows = articles.map(article => `
         <tr data-id="${article.id}">
             <td>${article.id}</td>
             <td>${article.title}</td>
@@ -54,6 +60,7 @@ function displayArticles(articles) {
             </td>
         </tr>
     `).join('');
+    tbody.innerHTML = append ? tbody.innerHTML + rows : rows;
 }
 
 async function editArticle(articleId) {
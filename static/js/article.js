@@ -5,6 +5,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const sidebarToggle = document.getElementById('sidebar-toggle');
     const mainContent = document.getElementById('main-content');
     let sidebarOpen = true;
+    let currentArticle = null;
 
     // Sidebar toggle functionality
     sidebarToggle.addEventListener('click', () => {
@@ -67,6 +68,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function displayArticle(article) {
+        currentArticle = article;
         document.title = `${article.title} - Statement Checker`;
         document.getElementById('article-title').textContent = article.title;
         
@@ -92,6 +94,12 @@ document.addEventListener('DOMContentLoaded', () => {
                         <i id="statement-icon-${index}" class="bi bi-chevron-right"></i>
                     </div>
                     <div id="statement-content-${index}" class="statement-content">
+                        ${statement.status === 'pending' || statement.status === 'checking' ? `
+                            <div class="verdict mb-3 text-muted">Checking...</div>
+                        ` : ''}
+                        ${statement.status === 'failed' ? `
+                            <div class="verdict mb-3 text-muted">This statement could not be checked.</div>
+                        ` : ''}
                         ${statement.verdict ? `
                             <div class="verdict mb-3">
                                 <strong>Verdict:</strong> ${statement.verdict}
@@ -129,6 +137,134 @@ document.addEventListener('DOMContentLoaded', () => {
         window.toggleStatement = toggleStatement;
     }
 
+    function showProgress(job) {
+        const progress = document.getElementById('job-progress');
+        if (job.status === 'queued' || job.status === 'running') {
+            progress.textContent = job.total > 0
+                ? `Fact-checking: ${job.checked + job.failed + (job.skipped || 0)} of ${job.total} statements done`
+                : 'Extracting statements...';
+        } else if (job.status === 'failed') {
+            progress.textContent = 'Fact-checking failed for this article.';
+        } else {
+            progress.textContent = '';
+        }
+    }
+
+    // Job progress is only shown to the article's owner and admins, so these requests carry the token
+    function authHeaders() {
+        return { 'Authorization': `Bearer ${localStorage.getItem('access_token')}` };
+    }
+
+    // Articles are fact-checked in the background; verdicts are pushed as each statement finishes
+    async function watchJob() {
+        try {
+            const response = await fetch(`/api/articles/${articleId}/job`, { headers: authHeaders() });
+            if (!response.ok) {
+                return;
+            }
+            const job = await response.json();
+            showProgress(job);
+            if (job.status !== 'queued' && job.status !== 'running') {
+                return;
+            }
+        } catch (error) {
+            console.error('Error checking fact-check progress:', error);
+            return;
+        }
+
+        // EventSource can't send the Authorization header, so the stream is read with fetch
+        let finished = false;
+        while (!finished) {
+            try {
+                const response = await fetch(`/api/articles/${articleId}/stream`, { headers: authHeaders() });
+                if (!response.ok) {
+                    return;
+                }
+                finished = await readEvents(response, handleJobEvent);
+            } catch (error) {
+                console.error('Lost the fact-check progress stream, reconnecting:', error);
+            }
+            if (!finished) {
+                await new Promise(resolve => setTimeout(resolve, 3000));
+            }
+        }
+    }
+
+    function handleJobEvent(event, data) {
+        switch (event) {
+            case 'progress':
+                showProgress(data);
+                // Newly extracted statements aren't in the article we loaded yet
+                if (currentArticle && data.total !== currentArticle.statements.length) {
+                    reloadArticle();
+                }
+                break;
+            case 'statement': {
+                if (!currentArticle) {
+                    break;
+                }
+                const index = currentArticle.statements.findIndex(st => st.id === data.id);
+                if (index === -1) {
+                    reloadArticle();
+                } else {
+                    currentArticle.statements[index] = data;
+                    displayArticle(currentArticle);
+                }
+                break;
+            }
+            case 'done':
+                showProgress(data);
+                reloadArticle();
+                return true;
+            case 'error':
+                return true;
+        }
+        return false;
+    }
+
+    // Parse a text/event-stream response body, calling onEvent(event, data) per frame.
+    // Resolves true once onEvent returns true, false if the stream ends first.
+    async function readEvents(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                return false;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                });
+                if (data && onEvent(event, JSON.parse(data))) {
+                    await reader.cancel();
+                    return true;
+                }
+            }
+        }
+    }
+
+    async function reloadArticle() {
+        const response = await fetch(`/api/articles/${articleId}`);
+        if (response.ok) {
+            displayArticle(await response.json());
+        }
+    }
+
     function displayError(message) {
         const articleContainer = document.querySelector('.article-container');
         articleContainer.innerHTML = `
@@ -143,5 +279,5 @@ document.addEventListener('DOMContentLoaded', () => {
         `;
     }
 
-    loadArticle();
+    loadArticle().then(watchJob);
 });
@@ -22,18 +22,24 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    async function loadArticles() {
+    const loadMoreBtn = document.getElementById('load-more-btn');
+    let nextCursor = null;
+
+    async function loadArticles(cursor = null) {
         try {
             loadingSpinner.style.display = 'block';
 
-            const response = await fetch('/api/articles');
+            const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+            const response = await fetch(`/api/articles/list${params}`);
 
             if (!response.ok) {
                 throw new Error(`Failed to load articles: ${response.statusText}`);
             }
 
-            const articles = await response.json();
-            displayArticles(articles);
+            const page = await response.json();
+            displayArticles(page.items, Boolean(cursor));
+            nextCursor = page.next_cursor;
+            loadMoreBtn.style.display = nextCursor ? 'inline-block' : 'none';
         } catch (error) {
             displayError(error.message);
         } finally {
@@ -57,8 +63,8 @@ document.addEventListener('DOMContentLoaded', () => {
         return text.substring(0, maxLength - 3) + '...';
     }
 
-    function displayArticles(articles) {
-        if (!articles.length) {
+    function displayArticles(articles, append = false) {
+        if (!articles.length && !append) {
             articlesContainer.innerHTML = `
                 <div class="alert alert-info">
                     No articles found. Be the first to create one!
@@ -66,7 +72,7 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
 
-        articlesContainer.innerHTML = articles.map(article => `
+        const cards = articles.map(article => `
             <div class="card article-card">
                 <div class="card-body">
                     <div class="d-flex justify-content-between align-items-start mb-3">
@@ -77,20 +83,22 @@ document.addEventListener('DOMContentLoaded', () => {
                         ${article.authors ? `By ${article.authors} • ` : ''}
                         ${formatDate(article.date)}
                     </div>
-                    <p class="card-text mb-4">${truncateText(article.text)}</p>
+                    <p class="card-text mb-4">${truncateText(article.excerpt)}</p>
                     <div class="d-flex justify-content-between align-items-center">
                         <div>
-                            ${article.statements ? `
-                                <span class="badge bg-secondary me-2">
-                                    ${article.statements.length} Statements
-                                </span>
-                            ` : ''}
+                            <span class="badge bg-secondary me-2">
+                                ${article.statement_count} Statements
+                            </span>
+                            ${Object.entries(article.verdict_counts).map(([verdict, count]) => `
+                                <span class="badge bg-light text-dark me-1">${verdict}: ${count}</span>
+                            `).join('')}
                         </div>
                         <a href="/articles/${article.id}" class="btn btn-outline-primary">Read More</a>
                     </div>
                 </div>
             </div>
         `).join('');
+        articlesContainer.innerHTML = append ? articlesContainer.innerHTML + cards : cards;
     }
 
     function displayError(message) {
@@ -103,6 +111,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     checkAuthAndUpdateUI();
     loadArticles();
+    loadMoreBtn.addEventListener('click', () => loadArticles(nextCursor));
 
     newArticleBtn.addEventListener('click', () => {
         alert('New article creation will be implemented in the next phase');
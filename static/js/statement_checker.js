@@ -22,7 +22,7 @@ document.addEventListener('DOMContentLoaded', () => {
         loadingSpinner.style.display = 'inline-block';
 
         try {
-            const response = await fetch('/api/check_statement', {
+            const response = await fetch('/api/check_statement/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -41,8 +41,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(errorData.detail || 'An error occurred while checking the statement');
             }
 
-            const data = await response.json();
-            displayResults(data);
+            await readEvents(response, handleEvent);
         } catch (error) {
             displayError(error.message);
             console.error('Statement check error:', error);
@@ -51,10 +50,88 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    function displayResults(result) {
+    // Parse a text/event-stream response body, calling onEvent(event, data) per frame
+    async function readEvents(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                });
+                if (data) {
+                    onEvent(event, JSON.parse(data));
+                }
+            }
+        }
+    }
+
+    function handleEvent(event, data) {
+        switch (event) {
+            case 'tool':
+                addProgress(data.tool === 'JudgeStatement'
+                    ? 'Weighing the evidence...'
+                    : `Searching ${toolLabel(data.tool)} for "${data.query}"`);
+                break;
+            case 'sources':
+                addProgress(`Found ${data.sources.length} sources on ${toolLabel(data.tool)}`);
+                break;
+            case 'draft':
+                displayResults(data, 'Draft verdict, under review');
+                break;
+            case 'review':
+                addProgress(data.next === 'FINISH'
+                    ? 'Review passed'
+                    : `Reviewer asked for more work: ${data.comments}`);
+                break;
+            case 'verdict':
+                displayResults(data, data.cached ? 'Previously checked' : null);
+                break;
+            case 'error':
+                throw new Error(data.detail);
+        }
+    }
+
+    function toolLabel(tool) {
+        return { search_wikipedia: 'Wikipedia', search_arxiv: 'arXiv', search_web: 'the web' }[tool] || tool;
+    }
+
+    function addProgress(message) {
+        let progress = document.getElementById('check-progress');
+        if (!progress) {
+            progress = document.createElement('ul');
+            progress.id = 'check-progress';
+            progress.className = 'list-unstyled text-muted';
+            searchResults.prepend(progress);
+        }
+        const item = document.createElement('li');
+        item.textContent = message;
+        progress.appendChild(item);
+    }
+
+    function displayResults(result, note) {
         const resultHtml = `
             <div class="card mb-3">
                 <div class="card-body">
+                    ${note ? `<h6 class="card-subtitle mb-2 text-muted">${note}</h6>` : ''}
                     <h5 class="card-title">Verdict: ${result.verdict}</h5>
                     <p class="card-text">${result.explanation}</p>
                     <h6>References:</h6>
@@ -70,7 +147,11 @@ document.addEventListener('DOMContentLoaded', () => {
             </div>
         `;
 
+        const progress = document.getElementById('check-progress');
         searchResults.innerHTML = resultHtml;
+        if (progress) {
+            searchResults.prepend(progress);
+        }
     }
 
     function displayError(message) {
@@ -0,0 +1,57 @@
+"""Server-sent event helpers for streaming fact-check progress to the browser.
+
+`sse_event` formats one `text/event-stream` frame. `ArticleEvents` is a small
+in-process pub/sub: the job worker publishes as each statement of an article
+finishes, and article streams wake up immediately instead of at their next
+database poll. Streams still poll, so a job running in another process is
+picked up too, just less promptly.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+from fastapi.encoders import jsonable_encoder
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # Don't let nginx buffer the stream
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def sse_comment(comment: str = 'ping') -> str:
+    """Keep-alive frame; ignored by EventSource."""
+    return f": {comment}\n\n"
+
+
+class ArticleEvents:
+    """Per-article queues for subscribers in this process."""
+
+    def __init__(self, maxsize: int = 100):
+        self.maxsize = maxsize
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, article_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        self._subscribers[article_id].add(queue)
+        return queue
+
+    def unsubscribe(self, article_id: int, queue: asyncio.Queue) -> None:
+        self._subscribers[article_id].discard(queue)
+        if not self._subscribers[article_id]:
+            del self._subscribers[article_id]
+
+    def publish(self, article_id: int, event: str, data: Any = None) -> None:
+        for queue in self._subscribers.get(article_id, ()):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A slow reader only misses the wakeup; it re-reads state from the database anyway
+                pass
+
+
+article_events = ArticleEvents()
@@ -0,0 +1,108 @@
+"""Shared fixtures: a throwaway SQLite database standing in for the app's Postgres, and a stubbed statement checker."""
+import asyncio
+import os
+
+# Settings and API clients are read when the app modules are imported
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('APP_SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ.setdefault('TAVILY_API_KEY', 'test')
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+import database
+from models import Article, User
+
+
+@pytest_asyncio.fixture
+async def test_db_engine(monkeypatch, tmp_path):
+    """SQLite engine with every table, used by all of the app's sessions during the test.
+
+    A file rather than :memory:, so concurrent sessions (the worker's, the checkpointer's) get
+    connections of their own, as they do on Postgres.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    # get_session_context, and so jobs, the checkpointer and the verdict cache, open sessions from here
+    monkeypatch.setattr(database, 'async_session_maker', async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False))
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def test_db(test_db_engine):
+    async with database.async_session_maker() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def test_user(test_db) -> User:
+    user = User(username='tester', email='tester@example.com', hashed_password='x')
+    test_db.add(user)
+    await test_db.commit()
+    await test_db.refresh(user)
+    return user
+
+
+@pytest_asyncio.fixture
+async def test_article(test_db, test_user) -> Article:
+    article = Article(title='Rates', text='The Federal Reserve raised rates.', user_id=test_user.id,
+                      domain='https://example.com/rates', authors='A. Writer', publication_date=None)
+    test_db.add(article)
+    await test_db.commit()
+    await test_db.refresh(article)
+    return article
+
+
+@pytest.fixture
+def stub_checker(monkeypatch):
+    """Replace the statement checker's LLMs and retrievers with the scripted stubs of the benchmarks.
+
+    Call the fixture with how many search tools the supervisor uses and the judge's verdict; it returns
+    the inputs of every judge call.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    from agents import statement_checker
+    from benchmarks.agent_throughput import StubChatModel, StubRetriever
+    from chains.adjudicator_chain import Verdict
+
+    def install(sources: int = 1, one_tool_per_turn: bool = False, latency: float = 0.01,
+                verdict: Verdict = None) -> list:
+        verdict = verdict or Verdict(verdict='True', explanation='Stub verdict.', references=[])
+        judge_calls = []
+
+        async def judge(inputs):
+            judge_calls.append(inputs)
+            await asyncio.sleep(latency)
+            return verdict.model_copy()
+
+        model = StubChatModel(latency=latency, sources=sources, one_tool_per_turn=one_tool_per_turn)
+        monkeypatch.setattr(statement_checker, 'get_chat_model', lambda name, **kwargs: model)
+        monkeypatch.setattr(statement_checker, 'get_judge_chain',
+                            lambda name: RunnableLambda(lambda x: None, afunc=judge))
+        for name in ('wiki_retriever', 'arxiv_retriever', 'web_retriever'):
+            monkeypatch.setattr(statement_checker, name, StubRetriever(latency=latency))
+        return judge_calls
+
+    return install
+
+
+class _WordEncoding:
+    def encode(self, text: str, **kwargs) -> list:
+        return text.split()
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count words instead of BPE tokens, so token budgets are predictable and tiktoken's encoding
+    file needn't be downloaded."""
+    from chains import evidence
+    monkeypatch.setattr(evidence, '_encoding', lambda: _WordEncoding())
@@ -0,0 +1,100 @@
+import json
+from datetime import date
+
+import httpx
+import pytest
+
+from chains.arxiv_index import ArxivIndex, LocalArxivRetriever, Paper, in_categories, read_snapshot, to_document
+
+
+def paper(id: str, title: str, abstract: str, categories: str = 'cs.CL', updated: str = '2024-01-02') -> Paper:
+    return Paper(id=id, title=title, authors='A. Author', abstract=abstract, categories=categories, updated=updated)
+
+
+PAPERS = [
+    paper('2401.00001', 'Attention is all you need', 'We propose the Transformer, based solely on attention.'),
+    paper('2401.00002', 'Retrieval augmented generation', 'Generation conditioned on retrieved passages, '
+                                                          'using attention over documents.'),
+    paper('2401.00003', 'Monetary policy shocks', 'Interest rate surprises and inflation.', categories='econ.GN'),
+]
+
+OAI_RESPONSE = """<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords>
+  <record><header><identifier>oai:arXiv.org:2401.00002</identifier><datestamp>2024-02-01</datestamp></header>
+    <metadata><arXiv xmlns="http://arxiv.org/OAI/arXiv/"><id>2401.00002</id>
+      <title>Retrieval augmented
+        generation, revisited</title>
+      <authors><author><keyname>Lewis</keyname><forenames>Patrick</forenames></author></authors>
+      <categories>cs.CL</categories><abstract>Sparse retrieval for fact checking.</abstract>
+      <updated>2024-02-01</updated></arXiv></metadata></record>
+  <record><header status="deleted"><identifier>oai:arXiv.org:2401.00001</identifier>
+    <datestamp>2024-02-03</datestamp></header></record>
+</ListRecords></OAI-PMH>"""
+
+
+@pytest.fixture
+def index(tmp_path) -> ArxivIndex:
+    index = ArxivIndex(str(tmp_path / 'arxiv.db'))
+    index.upsert(PAPERS)
+    return index
+
+
+def test_in_categories_matches_archives_and_exact_categories():
+    assert in_categories('cs.CL stat.ML', ['cs'])
+    assert in_categories('stat.ML', ['stat.ML'])
+    assert not in_categories('csx.AB', ['cs'])
+    assert in_categories('econ.GN', None)
+
+
+def test_search_ranks_by_bm25_with_stemming_and_reports_coverage(index):
+    results = index.search('attention transformers')
+
+    assert [p['id'] for p, _ in results] == ['2401.00001', '2401.00002']
+    assert [coverage for _, coverage in results] == [1.0, 0.5]
+    assert index.search('the') == []
+    assert index.search('quantum chromodynamics') == []
+
+
+def test_titles_weigh_more_than_abstracts(index):
+    assert index.search('retrieval')[0][0]['id'] == '2401.00002'
+    assert [p['id'] for p, _ in index.search('generation attention', k=1)] == ['2401.00002']
+
+
+def test_snapshot_ingest_filters_categories_and_records_progress(tmp_path):
+    snapshot = tmp_path / 'snapshot.json'
+    snapshot.write_text('\n'.join(json.dumps({
+        'id': p['id'], 'title': f"  {p['title']}\n  ", 'authors': 'ignored', 'abstract': p['abstract'],
+        'categories': p['categories'], 'update_date': p['updated'],
+        'authors_parsed': [['Vaswani', 'Ashish', '']]}) for p in PAPERS))
+    index = ArxivIndex(str(tmp_path / 'arxiv.db'))
+
+    assert index.ingest_snapshot(str(snapshot), ['cs']) == 2
+    assert next(read_snapshot(str(snapshot)))['authors'] == 'Ashish Vaswani'
+    assert index.get_state('harvested_through') == '2024-01-02'
+    assert index.get_state('categories') == 'cs'
+
+
+def test_update_applies_changes_and_deletions_from_oai(index):
+    index.set_state('harvested_through', '2024-01-02')
+    http = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=OAI_RESPONSE)))
+
+    assert index.update(http=http) == (1, 1)
+    assert len(index) == 2
+    assert index.search('transformer') == []
+    assert index.search('sparse fact checking')[0][0]['title'] == 'Retrieval augmented generation, revisited'
+    assert index.get_state('harvested_through') == '2024-02-03'
+
+
+def test_documents_have_the_arxiv_retriever_shape():
+    doc = to_document(PAPERS[0], chars=10)
+
+    assert doc.page_content == 'We propose'
+    assert doc.metadata == {'Entry ID': 'http://arxiv.org/abs/2401.00001', 'Published': date(2024, 1, 2),
+                            'Title': 'Attention is all you need', 'Authors': 'A. Author'}
+
+
+def test_retriever_answers_well_covered_queries_locally(index):
+    retriever = LocalArxivRetriever(index=index)
+
+    assert retriever.search('monetary policy inflation')[0].metadata['Title'] == 'Monetary policy shocks'
+    assert retriever.search('monetary policy in quantum gravity black holes') is None
+    assert retriever.invoke('quantum gravity') == []
@@ -0,0 +1,102 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from agents import statement_checker
+from chains import budget
+from chains.budget import Budget, BudgetTracker, budget_config, cost_usd, get_tracker
+from config import settings
+
+
+def llm_result(model: str, input_tokens: int, output_tokens: int) -> LLMResult:
+    message = AIMessage(content='', response_metadata={'model_name': model}, usage_metadata={
+        'input_tokens': input_tokens, 'output_tokens': output_tokens, 'total_tokens': input_tokens + output_tokens})
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def test_dated_snapshots_are_priced_as_their_base_model():
+    assert cost_usd('gpt-4o-mini-2024-07-18', 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert cost_usd('gpt-4o-2024-08-06', 1_000_000, 0) == pytest.approx(2.50)
+    assert cost_usd(None, 0, 1_000_000) == pytest.approx(budget.FALLBACK_PRICE[1])
+
+
+def test_tracker_adds_up_the_usage_of_every_llm_call():
+    tracker = BudgetTracker(budget.DEFAULT_BUDGETS['interactive'])
+
+    tracker.on_llm_end(llm_result('gpt-4o-mini', 1000, 200))
+    tracker.on_llm_end(llm_result('gpt-4o', 2000, 100))
+    tracker.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage(content=''))]]))
+
+    assert tracker.tokens == 3300
+    assert tracker.cost_usd == pytest.approx(cost_usd('gpt-4o-mini', 1000, 200) + cost_usd('gpt-4o', 2000, 100))
+
+
+@pytest.mark.parametrize('limits, tokens, cost, hops, reason', [
+    ({}, 0, 0, 0, None),
+    ({'max_hops': 2}, 0, 0, 2, '2 research turns'),
+    ({'max_tokens': 100}, 150, 0, 0, '150 tokens'),
+    ({'deadline_seconds': 0}, 0, 0, 0, '0s elapsed'),
+    ({'max_cost_usd': 0.01}, 0, 0.02, 0, '$0.02 spent'),
+])
+def test_exhausted_names_the_limit_reached(limits, tokens, cost, hops, reason):
+    base = Budget(max_hops=4, max_tokens=1000, deadline_seconds=60, max_cost_usd=1.0)
+    tracker = BudgetTracker(Budget(**{**base.__dict__, **limits}))
+    tracker.tokens, tracker.cost_usd = tokens, cost
+
+    assert tracker.exhausted(hops) == reason
+
+
+def test_budget_config_carries_the_tracker_and_a_recursion_limit_above_the_hops():
+    config = budget_config('bulk')
+    tracker = get_tracker(config)
+
+    assert tracker.budget == budget.BUDGETS['bulk']
+    assert config['callbacks'] == [tracker]
+    assert config['recursion_limit'] == tracker.budget.max_hops * 3 + 10
+    assert get_tracker(None) is None
+
+
+def test_settings_override_budgets_per_field(monkeypatch):
+    monkeypatch.setattr(settings, 'CHECK_BUDGETS', {'bulk': {'max_hops': 9}, 'nightly': {'max_tokens': 5}})
+
+    budgets = budget._configured_budgets()
+
+    assert budgets['bulk'].max_hops == 9
+    assert budgets['bulk'].max_tokens == budget.DEFAULT_BUDGETS['bulk'].max_tokens
+    assert budgets['nightly'].max_hops == budget.DEFAULT_BUDGETS['interactive'].max_hops
+
+
+@pytest.mark.asyncio
+async def test_checks_out_of_budget_are_judged_on_the_evidence_so_far(stub_checker, monkeypatch):
+    stub_checker(sources=3, one_tool_per_turn=True)
+    monkeypatch.setitem(budget.BUDGETS, 'tight', Budget(max_hops=1, max_tokens=10 ** 6, deadline_seconds=60,
+                                                        max_cost_usd=1.0))
+
+    state = await statement_checker.agent_graph.ainvoke(statement_checker.initial_state('Statement 0'),
+                                                        budget_config('tight'))
+
+    assert state['budget_limited'] == '1 research turns'
+    assert state['verdict'].budget_limited == '1 research turns'
+    assert state['review_skipped'].startswith('budget exhausted')
+
+
+@pytest.mark.parametrize('tokens, cost, hops, reason', [
+    (0, 0, 0, None),
+    (0, 0, 3, '3 of 4 research turns'),
+    (750, 0, 0, '750 of 1000 tokens'),
+    (0, 0.8, 0, '$0.80 of $1.00'),
+])
+def test_running_low_warns_on_the_last_turn_or_past_the_low_share(tokens, cost, hops, reason):
+    tracker = BudgetTracker(Budget(max_hops=4, max_tokens=1000, deadline_seconds=60, max_cost_usd=1.0))
+    tracker.tokens, tracker.cost_usd = tokens, cost
+
+    assert tracker.running_low(hops) == reason
+
+
+def test_usage_counts_discarded_speculations():
+    tracker = BudgetTracker(budget.BUDGETS['interactive'])
+    tracker.record_speculation(used=True)
+    tracker.record_speculation(used=False)
+
+    assert tracker.usage()['speculations'] == 2
+    assert tracker.usage()['discarded_speculations'] == 1
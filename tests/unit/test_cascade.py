@@ -0,0 +1,54 @@
+import pytest
+
+from chains import cascade
+from chains.adjudicator_chain import Verdict
+from chains.cascade import CascadeStats, can_escalate, judge_escalation_reason, node_model
+from config import settings
+
+
+def verdict(value: str = 'True', confidence: float = None) -> Verdict:
+    return Verdict(verdict=value, explanation='', references=[], confidence=confidence)
+
+
+def test_nodes_move_up_their_own_model_list_and_stay_on_its_last_model():
+    assert node_model('supervisor', 0) == 'gpt-4o-mini'
+    assert node_model('supervisor', 1) == 'gpt-4o'
+    assert node_model('supervisor', 5) == 'gpt-4o'
+    assert node_model('unknown', 0) == cascade.FALLBACK_MODEL
+
+
+def test_can_escalate_only_when_the_model_would_change():
+    assert can_escalate('judge', 0)
+    assert not can_escalate('judge', 1)
+    assert not can_escalate('review', 0)
+
+
+def test_settings_override_the_policy_per_node(monkeypatch):
+    monkeypatch.setattr(settings, 'MODEL_POLICY', {'review': ['gpt-4o-mini', 'gpt-4o', 'o1']})
+    monkeypatch.setattr(cascade, 'MODEL_POLICY', cascade._configured_policy())
+
+    assert node_model('review', 2) == 'o1'
+    assert can_escalate('review', 1)
+    assert node_model('judge', 0) == cascade.DEFAULT_POLICY['judge'][0]
+
+
+@pytest.mark.parametrize('value, confidence, reason', [
+    ('Uncertain', 0.9, 'uncertain verdict'),
+    ('True', 0.2, 'low confidence'),
+    ('True', 0.9, None),
+    ('False', None, None),
+])
+def test_judge_escalates_on_uncertain_or_low_confidence_verdicts(value, confidence, reason):
+    assert judge_escalation_reason(verdict(value, confidence)) == reason
+
+
+def test_stats_count_calls_and_escalations_per_node():
+    stats = CascadeStats()
+    stats.record_call('judge', 'gpt-4o-mini')
+    stats.record_call('judge', 'gpt-4o-mini')
+
+    escalation = stats.record_escalation('judge', 'gpt-4o-mini', 'gpt-4o', 'low confidence')
+
+    assert escalation == {'node': 'judge', 'from_model': 'gpt-4o-mini', 'to_model': 'gpt-4o', 'reason': 'low confidence'}
+    assert stats.stats()['calls'] == {'judge:gpt-4o-mini': 2}
+    assert stats.stats()['escalations'] == {'judge': {'low confidence': 1}}
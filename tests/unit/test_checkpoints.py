@@ -0,0 +1,107 @@
+import asyncio
+import operator
+from datetime import timedelta
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from chains.adjudicator_chain import Verdict
+from chains.evidence_pool import EvidencePool
+from checkpoints import DatabaseCheckpointSaver, checkpointer, prune_checkpoints, run_durable_fact_check
+
+
+class State(TypedDict):
+    steps: Annotated[List[str], operator.add]
+
+
+def flaky_graph(calls: List[str], failures: List[str]):
+    """research, then search and adjudicate in parallel, then report. Nodes in `failures` fail once."""
+
+    def node(name: str):
+        async def run(state: State) -> State:
+            calls.append(name)
+            if name in failures:
+                failures.remove(name)
+                await asyncio.sleep(0.05)  # Let the node running alongside finish first
+                raise RuntimeError(f"{name} failed")
+            return {'steps': [name]}
+        return run
+
+    builder = StateGraph(State)
+    for name in ('research', 'search', 'adjudicate', 'report'):
+        builder.add_node(name, node(name))
+    builder.add_edge(START, 'research')
+    builder.add_edge('research', 'search')
+    builder.add_edge('research', 'adjudicate')
+    builder.add_edge(['search', 'adjudicate'], 'report')
+    builder.add_edge('report', END)
+    return builder.compile(checkpointer=DatabaseCheckpointSaver())
+
+
+@pytest.mark.asyncio
+async def test_resume_after_a_failed_node_skips_completed_work(test_db_engine):
+    calls = []
+    graph = flaky_graph(calls, failures=['adjudicate'])
+    config = {'configurable': {'thread_id': 'statement-1'}}
+
+    with pytest.raises(RuntimeError):
+        await graph.ainvoke({'steps': []}, config)
+    snapshot = await graph.aget_state(config)
+    # search finished in the failed step: its write is saved, so only adjudicate is left to run
+    assert snapshot.next == ('adjudicate',)
+    assert snapshot.values['steps'] == ['research', 'search']
+
+    result = await graph.ainvoke(None, config)
+
+    assert sorted(calls) == sorted(['research', 'search', 'adjudicate', 'adjudicate', 'report'])
+    assert sorted(result['steps']) == ['adjudicate', 'report', 'research', 'search']
+    assert not (await graph.aget_state(config)).next
+
+
+@pytest.mark.asyncio
+async def test_only_the_latest_checkpoint_is_kept(test_db_engine):
+    graph = flaky_graph([], failures=[])
+    config = {'configurable': {'thread_id': 'statement-1'}}
+
+    await graph.ainvoke({'steps': []}, config)
+
+    checkpoints = [item async for item in graph.checkpointer.alist(config)]
+    assert len(checkpoints) == 1
+    assert checkpoints[0].config == (await graph.checkpointer.aget_tuple(config)).config
+
+
+@pytest.mark.asyncio
+async def test_deleted_and_pruned_threads_start_over(test_db_engine):
+    graph = flaky_graph([], failures=['report', 'report'])
+    first, second = ({'configurable': {'thread_id': f"statement-{i}"}} for i in (1, 2))
+    for config in (first, second):
+        with pytest.raises(RuntimeError):
+            await graph.ainvoke({'steps': []}, config)
+
+    await graph.checkpointer.adelete_thread('statement-1')
+    assert await graph.checkpointer.aget_tuple(first) is None
+    assert await prune_checkpoints(timedelta(hours=1)) == 0
+    assert await prune_checkpoints(timedelta(seconds=-1)) == 1
+    assert await graph.checkpointer.aget_tuple(second) is None
+
+
+@pytest.mark.asyncio
+async def test_durable_checks_keep_unserializable_config_out_of_checkpoints(test_db_engine, stub_checker, monkeypatch):
+    stub_checker(sources=2)
+    saved = []
+    aput = checkpointer.aput
+
+    async def record(config, checkpoint, metadata, new_versions):
+        result = await aput(config, checkpoint, metadata, new_versions)
+        saved.append((await checkpointer.aget_tuple(result)).metadata)
+        return result
+
+    monkeypatch.setattr(checkpointer, 'aput', record)
+
+    verdict = await run_durable_fact_check('Statement 0', 'statement-1', budget='bulk', evidence_pool=EvidencePool())
+
+    assert isinstance(verdict, Verdict)
+    assert saved and all(metadata['thread_id'] == 'statement-1' for metadata in saved)
+    assert not any({'budget', 'evidence_pool'} & metadata.keys() for metadata in saved)
+    assert await checkpointer.aget_tuple({'configurable': {'thread_id': 'statement-1'}}) is None
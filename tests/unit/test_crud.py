@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+import crud
+from models import Article, Statement
+
+
+@pytest.mark.asyncio
+async def test_create_statements_bulk_returns_rows_in_order(test_db, test_user, test_article):
+    statements = [Statement(content=f"Claim {i}.", status='pending') for i in range(5)]
+
+    created = await crud.create_statements_bulk(test_db, statements, article_id=test_article.id, user_id=test_user.id)
+
+    assert [st.content for st in created] == [f"Claim {i}." for i in range(5)]
+    assert all(st.id is not None for st in created)
+    stored = await crud.get_article_statements(test_db, test_article.id)
+    assert sorted(st.id for st in stored) == sorted(st.id for st in created)
+    assert {(st.article_id, st.user_id, st.status) for st in stored} == {(test_article.id, test_user.id, 'pending')}
+
+
+@pytest.mark.asyncio
+async def test_create_statements_bulk_with_nothing_to_insert(test_db, test_user, test_article):
+    assert await crud.create_statements_bulk(test_db, [], article_id=test_article.id, user_id=test_user.id) == []
+
+
+@pytest.mark.asyncio
+async def test_update_statements_bulk_sets_only_the_given_columns(test_db, test_user, test_article):
+    first, second, third = await crud.create_statements_bulk(
+        test_db, [Statement(content=f"Claim {i}.", status='pending') for i in range(3)],
+        article_id=test_article.id, user_id=test_user.id)
+
+    await crud.update_statements_bulk(test_db, [
+        {'id': first.id, 'status': 'checked', 'verdict': 'True', 'explanation': 'Sourced.'},
+        {'id': second.id, 'status': 'checking'},
+        {'id': third.id, 'status': 'checked', 'verdict': 'False', 'explanation': 'Refuted.'},
+    ])
+
+    rows = (await test_db.execute(
+        select(Statement.id, Statement.status, Statement.verdict, Statement.explanation).order_by(Statement.id)
+    )).all()
+    assert [tuple(row) for row in rows] == [
+        (first.id, 'checked', 'True', 'Sourced.'),
+        (second.id, 'checking', None, None),
+        (third.id, 'checked', 'False', 'Refuted.'),
+    ]
+
+
+async def add_articles(db, user, dates) -> list:
+    articles = [Article(title=f"Article {i}", text='x' * 1000, user_id=user.id, publication_date=None, date=date)
+                for i, date in enumerate(dates)]
+    db.add_all(articles)
+    await db.commit()
+    return articles
+
+
+async def all_pages(db, limit: int) -> list:
+    pages, cursor = [], None
+    while True:
+        page = await crud.list_articles(db, limit=limit, cursor=cursor)
+        pages.append([item.id for item in page.items])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.asyncio
+async def test_list_articles_pages_through_every_article_once(test_db, test_user):
+    now = datetime.utcnow()
+    articles = await add_articles(test_db, test_user, [now - timedelta(hours=i) for i in range(7)])
+
+    pages = await all_pages(test_db, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == [article.id for article in articles]
+
+
+@pytest.mark.asyncio
+async def test_list_articles_breaks_date_ties_by_id(test_db, test_user):
+    now = datetime.utcnow()
+    # Five articles share a timestamp, across page boundaries
+    articles = await add_articles(test_db, test_user, [now] * 5 + [now - timedelta(hours=1)])
+
+    pages = await all_pages(test_db, limit=2)
+
+    tied = sorted((article.id for article in articles[:5]), reverse=True)
+    assert sum(pages, []) == tied + [articles[5].id]
+
+
+@pytest.mark.asyncio
+async def test_list_articles_counts_verdicts_and_trims_text(test_db, test_user, test_article):
+    await crud.create_statements_bulk(test_db, [
+        Statement(content='A.', verdict='True'), Statement(content='B.', verdict='True'),
+        Statement(content='C.', verdict='False'), Statement(content='D.', verdict=None, status='pending'),
+    ], article_id=test_article.id, user_id=test_user.id)
+
+    page = await crud.list_articles(test_db, include_statements=True)
+
+    [item] = page.items
+    assert item.statement_count == 4
+    assert item.verdict_counts == {'True': 2, 'False': 1}
+    assert item.excerpt == test_article.text[:crud.EXCERPT_LENGTH]
+    assert [st.content for st in item.statements] == ['A.', 'B.', 'C.', 'D.']
+    assert page.next_cursor is None
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    date = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+    assert crud.decode_cursor(crud.encode_cursor(date, 42)) == (date, 42)
+    with pytest.raises(ValueError):
+        crud.decode_cursor('not-a-cursor')
+
+
+@pytest.mark.asyncio
+async def test_get_statements_citing_matches_domain_or_exact_source(test_db, test_user, test_article):
+    nature, blog = [Statement(content='Cites Nature.'), Statement(content='Cites a blog.')]
+    nature.set_references([{'source': 'https://www.nature.com/articles/123', 'content': 'Paper.'}])
+    blog.set_references([{'source': 'https://blog.example.org/post', 'content': 'Post.'}])
+    await crud.create_statements_bulk(test_db, [nature, blog], article_id=test_article.id, user_id=test_user.id)
+
+    by_domain = await crud.get_statements_citing(test_db, domain='nature.com')
+    by_url = await crud.get_statements_citing(test_db, domain='https://www.nature.com/')
+    by_source = await crud.get_statements_citing(test_db, source='https://blog.example.org/post')
+
+    assert [st.content for st in by_domain] == [st.content for st in by_url] == ['Cites Nature.']
+    assert [st.content for st in by_source] == ['Cites a blog.']
+    assert await crud.get_statements_citing(test_db, domain='example.org') == []
@@ -0,0 +1,64 @@
+import pytest
+from langchain_core.documents.base import Document
+
+from chains.evidence import (Passage, bm25_scores, count_tokens, covers, format_evidence, pack_evidence,
+                             select_passages, split_passages, summarize_passages)
+
+
+FED = ('The Federal Reserve raised interest rates by a quarter point in March.\n\n'
+       'The decision was the ninth rate increase in a row.')
+WEATHER = 'It rained in Paris for most of the week, and the Seine rose.'
+
+pytestmark = pytest.mark.usefixtures('word_tokens')
+
+
+def passage(id: str, score: float, tokens: int = 10) -> Passage:
+    return Passage(id=id, title='T', source='S', text=id, score=score, tokens=tokens)
+
+
+def test_bm25_ranks_texts_that_share_the_query_terms_first():
+    scores = bm25_scores('federal reserve rates', [WEATHER, FED])
+
+    assert scores[0] == 0
+    assert scores[1] > 0
+    assert bm25_scores('anything', []) == []
+
+
+def test_split_passages_keeps_paragraphs_under_the_token_target():
+    assert split_passages(FED, max_tokens=1000) == [FED.replace('\n\n', ' ')]
+    assert all(count_tokens(p) <= 20 for p in split_passages(FED, max_tokens=20))
+
+
+def test_pack_evidence_keeps_the_best_passages_under_budget_with_stable_ids():
+    docs = [Document(page_content=WEATHER, metadata={'title': 'Paris', 'source': 'https://w/paris'}),
+            Document(page_content=FED, metadata={'title': 'Federal Reserve', 'source': 'https://w/fed'})]
+
+    passages = pack_evidence('Did the Federal Reserve raise rates?', docs, 'wiki', budget=40)
+
+    assert passages[0]['title'] == 'Federal Reserve'
+    assert sum(p['tokens'] for p in passages) <= 40
+    assert all(p['id'].startswith('wiki:') for p in passages)
+    assert [p['id'] for p in pack_evidence('rates', docs, 'wiki', budget=40)][0] in {p['id'] for p in passages}
+
+
+def test_select_passages_is_greedy_by_score_and_skips_duplicates():
+    candidates = [passage('a', 1.0, tokens=6), passage('b', 3.0, tokens=6), passage('b', 2.0), passage('c', 0.5, 4)]
+
+    assert [p['id'] for p in select_passages(candidates, budget=10)] == ['b', 'c']
+
+
+def test_covers_needs_enough_of_the_query_terms():
+    passages = pack_evidence('rates', [Document(page_content=FED, metadata={'title': 'Fed'})], 'wiki')
+
+    assert covers('Federal Reserve rates', passages, min_coverage=1.0)
+    assert not covers('Federal Reserve unemployment', passages, min_coverage=1.0)
+    assert covers('Federal Reserve unemployment', passages, min_coverage=0.6)
+    assert not covers('Federal Reserve', [], min_coverage=0.1)
+
+
+def test_supervisor_and_judge_see_passages_under_their_citation_ids():
+    passages = [passage('wiki:1', 1.0), passage('wiki:1', 1.0), passage('web:2', 0.5)]
+
+    assert summarize_passages([]) == 'No relevant passages found.'
+    assert summarize_passages(passages[:1]) == '[wiki:1] T: wiki:1'
+    assert format_evidence('statement', passages).count('[wiki:1]') == 1
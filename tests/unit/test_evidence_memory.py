@@ -0,0 +1,113 @@
+from typing import List
+
+import pytest
+import pytest_asyncio
+from langchain_core.documents.base import Document
+from qdrant_client import AsyncQdrantClient
+
+from agents import statement_checker
+from benchmarks.agent_throughput import StubRetriever
+from benchmarks.evidence_memory import HashedBagOfWords
+from chains import evidence_memory
+from chains.evidence_pool import EvidencePool
+from chains.evidence_memory import EvidenceMemory
+
+
+pytestmark = pytest.mark.usefixtures('word_tokens')
+
+DOCS = [Document(page_content='The Federal Reserve raised interest rates by a quarter point in March.',
+                 metadata={'title': 'Federal Reserve', 'source': 'https://en.wikipedia.org/wiki/Federal_Reserve'})]
+
+
+class CountingEmbeddings(HashedBagOfWords):
+    def __init__(self):
+        self.queries = 0
+        self.documents = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.documents += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.queries += 1
+        return super().embed_query(text)
+
+
+@pytest_asyncio.fixture
+async def memory(tmp_path):
+    memory = EvidenceMemory(AsyncQdrantClient(path=str(tmp_path / 'memory')), CountingEmbeddings())
+    yield memory
+    await memory.close()
+
+
+async def remember(memory: EvidenceMemory, prefix: str, query: str, docs: List[Document]) -> None:
+    """`memory.remember`, waiting for the background write to finish."""
+    memory.remember(prefix, query, docs)
+    for write in list(memory._writes):
+        await write
+
+
+@pytest.mark.asyncio
+async def test_remembered_passages_answer_similar_searches_from_the_same_source(memory):
+    await remember(memory, 'wiki', 'Federal Reserve', DOCS)
+
+    passages = await memory.search('wiki', 'Federal Reserve interest rates')
+
+    assert passages[0]['title'] == 'Federal Reserve'
+    assert passages[0]['source'] == DOCS[0].metadata['source']
+    assert await memory.search('web', 'Federal Reserve interest rates') is None
+    assert await memory.search('wiki', 'Bank of Japan yen intervention') is None
+    assert (await memory.stats())['passages'] == 1
+
+
+@pytest.mark.asyncio
+async def test_passages_retrieved_again_are_renewed_without_embedding_them_again(memory):
+    for _ in range(2):
+        await remember(memory, 'wiki', 'Federal Reserve', DOCS)
+
+    assert memory.embeddings.documents == 1
+    assert memory.counters['embedded'] == 1
+    assert memory.counters['renewed'] == 1
+
+
+@pytest.mark.asyncio
+async def test_an_empty_memory_is_searched_without_embedding_the_query(memory):
+    assert await memory.search('wiki', 'Federal Reserve') is None
+
+    assert memory.embeddings.queries == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_passages_are_not_used_and_are_pruned(memory, monkeypatch):
+    monkeypatch.setitem(evidence_memory.MAX_AGE_DAYS, 'web', -1)
+    await remember(memory, 'web', 'Federal Reserve', DOCS)
+
+    assert await memory.search('web', 'Federal Reserve interest rates') is None
+    await memory.prune()
+    assert (await memory.stats())['passages'] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_failures_fall_back_to_the_external_search(memory, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError('qdrant is down')
+
+    monkeypatch.setattr(memory.client, 'collection_exists', unavailable)
+
+    assert await memory.search('wiki', 'Federal Reserve') is None
+    assert memory.counters['errors'] == 1
+
+
+@pytest.mark.asyncio
+async def test_searches_answered_from_memory_count_as_external_calls_saved(memory, monkeypatch):
+    await remember(memory, 'wiki', 'Federal Reserve', DOCS)
+    monkeypatch.setattr(statement_checker, 'memory', memory)
+    pool = EvidencePool()
+
+    _, passages = await statement_checker._search(StubRetriever(latency=0), 'wiki', 'Federal Reserve interest rates',
+                                                  'The Fed raised rates.', {'configurable': {'evidence_pool': pool}})
+
+    assert passages[0]['title'] == 'Federal Reserve'
+    assert pool.stats()['answered_from_memory'] == 1
+    assert pool.stats()['agent_searches'] == 1
+    assert pool.stats()['external_calls_saved'] == 1
@@ -0,0 +1,62 @@
+import pytest
+from langchain_core.documents.base import Document
+
+from benchmarks.agent_throughput import StubRetriever
+from chains import evidence_pool
+from chains.evidence_pool import EvidencePool, ResearchPlanner, entities, group_query, group_statements
+
+
+pytestmark = pytest.mark.usefixtures('word_tokens')
+
+
+def retrievers() -> dict:
+    return {'wiki': StubRetriever(latency=0), 'web': StubRetriever(latency=0)}
+
+
+def test_entities_are_names_not_capitalised_sentence_openers():
+    text = 'However, the Bank of England met on Monday. Officials at the U.S. Treasury agreed. Markets fell.'
+
+    assert entities(text) == ['Bank of England', 'Monday', 'U.S. Treasury']
+
+
+def test_statements_sharing_an_entity_are_grouped_and_searched_for_together():
+    statements = ['Angela Merkel visited Paris.', 'The weather was fine.', 'Angela Merkel met Emmanuel Macron.']
+
+    assert group_statements(statements) == [[0, 2], [1]]
+    assert group_query([statements[0], statements[2]]).startswith('Angela Merkel')
+
+
+def test_pool_answers_queries_its_passages_cover():
+    pool = EvidencePool()
+    pool.add('wiki', 'Federal Reserve', [Document(page_content='The Federal Reserve raised interest rates.',
+                                                  metadata={'title': 'Federal Reserve', 'source': 'https://w/fed'})])
+
+    assert pool.search('wiki', 'Federal Reserve interest rates')[0]['title'] == 'Federal Reserve'
+    assert pool.search('wiki', 'Bank of Japan yen intervention') is None
+    assert pool.search('web', 'Federal Reserve') is None
+
+
+@pytest.mark.asyncio
+async def test_planner_searches_an_entity_once_it_is_shared():
+    pool = EvidencePool()
+    planner = ResearchPlanner(pool, retrievers())
+
+    await planner.add('Angela Merkel visited Paris.')
+    assert pool.planned_calls == 0
+
+    await planner.add('Angela Merkel met Emmanuel Macron.')
+    await planner.add('Angela Merkel left office in 2021.')
+    assert pool.planned_calls == len(evidence_pool.PLAN_SOURCES)
+    assert pool.passages['wiki']
+
+
+@pytest.mark.asyncio
+async def test_planner_searches_at_most_plan_max_searches_entities(monkeypatch):
+    monkeypatch.setattr(evidence_pool, 'PLAN_MAX_SEARCHES', 2)
+    pool = EvidencePool()
+    planner = ResearchPlanner(pool, retrievers())
+
+    for _ in range(2):
+        await planner.add('Angela Merkel, Emmanuel Macron and Olaf Scholz met in Berlin.')
+
+    assert pool.planned_calls == 2 * len(evidence_pool.PLAN_SOURCES)
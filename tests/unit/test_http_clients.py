@@ -0,0 +1,80 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from chains.http_clients import HTTPClients, USER_AGENT
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so connections can be reused
+
+    def do_GET(self):
+        body = self.headers['User-Agent'].encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_each_service_has_one_shared_client():
+    clients = HTTPClients()
+
+    assert clients.get('wikipedia') is clients.get('wikipedia')
+    assert clients.get_sync('wikipedia') is clients.get_sync('wikipedia')
+    assert clients.get('wikipedia') is not clients.get('arxiv')
+    assert clients.get('tavily').headers['User-Agent'] == USER_AGENT
+
+
+@pytest.mark.asyncio
+async def test_requests_are_counted_and_reuse_pooled_connections(server_url):
+    clients = HTTPClients()
+
+    for _ in range(3):
+        response = await clients.get('arxiv').get(server_url)
+        assert response.text == USER_AGENT
+    clients.get_sync('arxiv').get(server_url)
+
+    stats = clients.stats()['services']['arxiv']
+    assert (stats['requests'], stats['in_flight'], stats['max_in_flight'], stats['errors']) == (4, 0, 1, 0)
+    assert stats['connections']['async'] == {'open': 1, 'busy': 0, 'idle': 1}
+    assert stats['connections']['sync']['open'] == 1
+    await clients.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_are_counted_as_errors():
+    clients = HTTPClients()
+
+    with pytest.raises(httpx.ConnectError):
+        await clients.get('wikipedia').get('http://127.0.0.1:1')
+
+    stats = clients.stats()['services']['wikipedia']
+    assert (stats['requests'], stats['errors'], stats['in_flight']) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_clients_reconnect_after_their_pools_are_closed(server_url):
+    clients = HTTPClients()
+    client = clients.get('tavily')
+    await client.get(server_url)
+
+    await clients.aclose()
+
+    assert clients.stats()['services']['tavily']['connections']['async'] == {'open': 0, 'busy': 0, 'idle': 0}
+    assert (await client.get(server_url)).status_code == 200
+    await clients.aclose()
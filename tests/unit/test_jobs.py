@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import crud
+import jobs
+import verdict_cache
+from benchmarks.agent_throughput import StubRetriever
+from benchmarks.evidence_memory import HashedBagOfWords
+from config import settings
+from database import get_session_context
+from models import Job
+
+
+def seconds_ago(seconds: float) -> datetime:
+    return datetime.utcnow() - timedelta(seconds=seconds)
+
+
+async def add_job(db, user, **values) -> Job:
+    job = Job(user_id=user.id, **values)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+@pytest.mark.asyncio
+async def test_claim_job_takes_due_jobs_in_order(test_db, test_user):
+    later = await add_job(test_db, test_user, next_attempt_at=seconds_ago(10))
+    first = await add_job(test_db, test_user, next_attempt_at=seconds_ago(60))
+    await add_job(test_db, test_user, next_attempt_at=datetime.utcnow() + timedelta(minutes=5))
+
+    claimed = [await jobs.claim_job(), await jobs.claim_job(), await jobs.claim_job()]
+
+    assert [job.id if job else None for job in claimed] == [first.id, later.id, None]
+    assert claimed[0].status == 'running'
+    assert claimed[0].attempts == 1
+    assert claimed[0].locked_at is not None
+
+
+@pytest.mark.asyncio
+async def test_claim_job_takes_over_an_expired_lease(test_db, test_user):
+    stale = await add_job(test_db, test_user, status='running', attempts=1,
+                          locked_at=seconds_ago(settings.JOB_LEASE_SECONDS + 5))
+
+    claimed = await jobs.claim_job()
+
+    assert claimed.id == stale.id
+    assert claimed.attempts == 2
+    assert claimed.locked_at > seconds_ago(5)
+
+
+@pytest.mark.asyncio
+async def test_claim_job_leaves_a_live_lease_alone(test_db, test_user):
+    await add_job(test_db, test_user, status='running', attempts=1,
+                  locked_at=seconds_ago(settings.JOB_LEASE_SECONDS / 2))
+
+    assert await jobs.claim_job() is None
+
+
+@pytest.mark.asyncio
+async def test_recover_jobs_requeues_only_expired_leases(test_db, test_user):
+    stale = await add_job(test_db, test_user, status='running', locked_at=seconds_ago(settings.JOB_LEASE_SECONDS + 5))
+    live = await add_job(test_db, test_user, status='running', locked_at=seconds_ago(1))
+
+    assert await jobs.recover_jobs() == 1
+
+    await test_db.refresh(stale)
+    await test_db.refresh(live)
+    assert (stale.status, stale.locked_at) == ('queued', None)
+    assert live.status == 'running'
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_beating_after_a_failed_renewal(monkeypatch):
+    monkeypatch.setattr(settings, 'JOB_LEASE_SECONDS', 0.03)
+    renewals = []
+
+    async def update_job(job_id, **values):
+        renewals.append(values['locked_at'])
+        if len(renewals) == 1:
+            raise ConnectionError('database went away')
+
+    monkeypatch.setattr(jobs, '_update_job', update_job)
+    heartbeat = asyncio.create_task(jobs._heartbeat(1))
+    await asyncio.sleep(0.1)
+
+    assert not heartbeat.done()
+    heartbeat.cancel()
+    assert len(renewals) >= 2
+
+
+@pytest.mark.asyncio
+async def test_article_jobs_check_every_statement_and_complete(test_db, test_user, test_article, stub_checker,
+                                                               word_tokens, monkeypatch):
+    judge_calls = stub_checker(sources=2)
+    contents = ['The Federal Reserve raised rates in March.', 'Unemployment fell to 3.9% in April.']
+
+    async def stream_statements(text):
+        for content in contents:
+            yield content
+
+    monkeypatch.setattr(jobs, 'stream_statements', stream_statements)
+    monkeypatch.setattr(jobs, 'wiki_retriever', StubRetriever(latency=0))
+    monkeypatch.setattr(jobs, 'web_retriever', StubRetriever(latency=0))
+    monkeypatch.setattr(verdict_cache, 'embeddings', HashedBagOfWords())
+    monkeypatch.setattr(verdict_cache, '_embedding_cache', verdict_cache._EmbeddingCache())
+    monkeypatch.setattr(verdict_cache, '_index', verdict_cache._NearDuplicateIndex())
+    monkeypatch.setattr(settings, 'JOB_STATEMENT_ATTEMPTS', 1)
+    job = await add_job(test_db, test_user, article_id=test_article.id, worthiness_threshold=0)
+
+    await jobs.JobWorker(workers=1, poll_seconds=1)._process(await jobs.claim_job())
+
+    async with get_session_context() as session:
+        statements = await crud.get_article_statements(session, test_article.id)
+        job = await session.get(Job, job.id)
+    assert sorted(st.content for st in statements) == sorted(contents)
+    assert [(st.status, st.verdict) for st in statements] == [('checked', 'True')] * 2
+    assert len(judge_calls) == 2
+    assert (job.status, job.extracted, job.error) == ('completed', True, None)
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from chains import rate_limiter
+from chains.rate_limiter import ModelRateLimiter
+from config import settings
+
+
+def drain(limiter: ModelRateLimiter) -> int:
+    taken = 0
+    while limiter.acquire(blocking=False):
+        taken += 1
+    return taken
+
+
+def test_bucket_allows_a_burst_of_ten_seconds_of_requests():
+    limiter = ModelRateLimiter('gpt-4o', requests_per_minute=60, tokens_per_minute=10 ** 9)
+
+    assert drain(limiter) == 10
+    assert limiter.stats()['acquired'] == 10
+
+
+def test_token_reservations_are_settled_against_actual_usage():
+    # 100 tokens of capacity, and each request reserves all of it up front
+    limiter = ModelRateLimiter('gpt-4o', requests_per_minute=6000, tokens_per_minute=600)
+    assert drain(limiter) == 1
+
+    limiter.record_usage(None)  # A failed request refunds its reservation
+    assert drain(limiter) == 1
+
+    limiter.record_usage(60)
+    assert not limiter.acquire(blocking=False)
+    assert limiter.stats()['tokens_used'] == 60
+
+
+@pytest.mark.asyncio
+async def test_callers_wait_for_the_bucket_to_refill():
+    limiter = ModelRateLimiter('gpt-4o', requests_per_minute=600, tokens_per_minute=10 ** 9)
+    drain(limiter)
+
+    start = time.monotonic()
+    assert await limiter.aacquire()
+
+    assert 0.05 < time.monotonic() - start < 1
+    assert limiter.stats()['throttled'] == 1
+
+
+def test_limiters_are_shared_per_model_with_configured_limits(monkeypatch):
+    monkeypatch.setattr(settings, 'OPENAI_RATE_LIMITS', {'gpt-test': (120, 1000)})
+    monkeypatch.setattr(rate_limiter, '_limits', rate_limiter._configured_limits())
+    monkeypatch.setattr(rate_limiter, '_limiters', {})
+
+    limiter = rate_limiter.get_rate_limiter('gpt-test')
+
+    assert rate_limiter.get_rate_limiter('gpt-test') is limiter
+    assert (limiter.requests_per_minute, limiter.tokens_per_minute) == (120, 1000)
+    assert rate_limiter.get_rate_limiter('gpt-4o').requests_per_minute == rate_limiter.DEFAULT_LIMITS['gpt-4o'][0]
@@ -0,0 +1,62 @@
+from typing import List
+
+import pytest
+
+from chains import reranker
+from chains.evidence import Passage
+from chains.reranker import arerank, rerank
+
+
+STATEMENT = 'The Federal Reserve raised interest rates in March'
+
+
+def passage(id: str, text: str) -> Passage:
+    return Passage(id=id, title='', source='', text=text, score=0.0, tokens=len(text.split()))
+
+
+PASSAGES = [
+    passage('weather', 'Paris saw heavy rain all week'),
+    passage('mention', 'Rates on mortgages were little changed over the week and banks said demand was steady'),
+    passage('fed', 'The Federal Reserve raised interest rates by a quarter point in March'),
+]
+
+
+class StubCrossEncoder:
+    def __init__(self, probabilities: dict):
+        self.probabilities = probabilities
+
+    def predict(self, pairs: List[tuple]) -> List[float]:
+        return [self.probabilities[text.strip()] for _, text in pairs]
+
+
+def test_passages_sharing_no_terms_are_dropped_and_the_rest_ranked():
+    assert [p['id'] for p in rerank(STATEMENT, 'fed rates', PASSAGES)] == ['fed', 'mention']
+    assert rerank(STATEMENT, 'fed rates', []) == []
+
+
+def test_passages_far_below_the_best_are_dropped(monkeypatch):
+    monkeypatch.setattr(reranker, 'MIN_RELATIVE_SCORE', 0.5)
+
+    assert [p['id'] for p in rerank(STATEMENT, 'fed rates', PASSAGES)] == ['fed']
+
+
+def test_cross_encoder_rescores_the_bm25_survivors():
+    cross_encoder = StubCrossEncoder({PASSAGES[1]['text']: 0.7, PASSAGES[2]['text']: 0.05})
+
+    kept = rerank(STATEMENT, 'fed rates', PASSAGES, cross_encoder)
+
+    assert [(p['id'], p['score']) for p in kept] == [('mention', 0.7)]
+
+
+@pytest.mark.asyncio
+async def test_reranking_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(reranker, 'RERANK', False)
+
+    assert await arerank(STATEMENT, 'fed rates', PASSAGES) == PASSAGES
+
+
+@pytest.mark.asyncio
+async def test_bm25_only_without_a_cross_encoder(monkeypatch):
+    monkeypatch.setattr(reranker, 'CROSS_ENCODER_MODEL', '')
+
+    assert [p['id'] for p in await arerank(STATEMENT, 'fed rates', PASSAGES)] == ['fed', 'mention']
@@ -0,0 +1,107 @@
+import time
+from typing import List
+
+import pytest
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from chains.retrieval_cache import EMPTY_TTL, WIKIPEDIA_TTL, CachedRetriever, RetrievalCache
+
+
+class CountingRetriever(BaseRetriever):
+    k: int = 3
+    empty: bool = False
+    _calls: int = PrivateAttr(default=0)  # Not a field, so not part of the cache key
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def _docs(self, query: str) -> List[Document]:
+        self._calls += 1
+        if self.empty:
+            return []
+        return [Document(page_content=f'About {query}', metadata={'title': query, 'source': 'https://example.org'})]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._docs(query)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._docs(query)
+
+
+def cached(retriever: BaseRetriever, cache: RetrievalCache, ttl: float = WIKIPEDIA_TTL) -> CachedRetriever:
+    return CachedRetriever(retriever=retriever, cache=cache, source='wikipedia', ttl=ttl)
+
+
+def test_cache_key_ignores_case_spacing_and_punctuation_but_not_params():
+    retriever = cached(CountingRetriever(), RetrievalCache())
+
+    assert retriever.cache_key('Federal  Reserve rates?') == retriever.cache_key('federal reserve rates')
+    assert retriever.cache_key('federal reserve') != retriever.cache_key('federal reserve rates')
+    assert cached(CountingRetriever(k=5), RetrievalCache()).cache_key('federal reserve') \
+        != retriever.cache_key('federal reserve')
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_are_answered_from_the_cache():
+    inner = CountingRetriever()
+    cache = RetrievalCache()
+    retriever = cached(inner, cache)
+
+    first = await retriever.ainvoke('Federal Reserve')
+    second = await retriever.ainvoke('federal reserve.')
+
+    assert inner.calls == 1
+    assert second[0].page_content == first[0].page_content
+    assert cache.stats()['wikipedia'] == {'hits': 1, 'store_hits': 0, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_expired_entries_are_fetched_again():
+    inner = CountingRetriever()
+    retriever = cached(inner, RetrievalCache(), ttl=-1)
+
+    retriever.invoke('Federal Reserve')
+    retriever.invoke('Federal Reserve')
+
+    assert inner.calls == 2
+
+
+def test_hits_are_copies_callers_can_change():
+    cache = RetrievalCache()
+    cache.set('key', 'wikipedia', [Document(page_content='text', metadata={'title': 'T'})], WIKIPEDIA_TTL)
+
+    cache.get('key', 'wikipedia')[0].metadata['score'] = 0.5
+
+    assert cache.get('key', 'wikipedia')[0].metadata == {'title': 'T'}
+
+
+def test_empty_results_expire_sooner_than_the_source_ttl(monkeypatch):
+    inner = CountingRetriever(empty=True)
+    cache = RetrievalCache()
+    retriever = cached(inner, cache)
+
+    assert retriever.invoke('Federal Reserve') == []
+    assert retriever.invoke('Federal Reserve') == []
+    assert inner.calls == 1
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + EMPTY_TTL + 1)
+    retriever.invoke('Federal Reserve')
+    assert inner.calls == 2
+
+
+def test_sql_tier_survives_a_restart(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    inner = CountingRetriever()
+    cached(inner, RetrievalCache(url=url)).invoke('Federal Reserve')
+
+    restarted = RetrievalCache(url=url)
+    docs = cached(inner, restarted).invoke('Federal Reserve')
+
+    assert inner.calls == 1
+    assert docs[0].page_content == 'About Federal Reserve'
+    assert restarted.stats()['wikipedia']['store_hits'] == 1
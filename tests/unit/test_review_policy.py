@@ -0,0 +1,39 @@
+import pytest
+
+from chains import review_policy
+from chains.adjudicator_chain import Verdict
+from chains.review_policy import confident_reason, distinct_domains, skip_review_reason
+
+
+def verdict(value: str = 'True', confidence: float = 0.95, sources=('https://www.bbc.co.uk/a', 'https://reuters.com/b')):
+    refs = [{'title': 'T', 'source': source, 'summary': ''} for source in sources]
+    return Verdict(verdict=value, explanation='', references=refs, confidence=confidence)
+
+
+def test_distinct_domains_ignores_www_case_and_missing_urls():
+    assert distinct_domains(['https://www.BBC.co.uk/a', 'https://bbc.co.uk/b', None, '', 'not a url']) == 1
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'value': 'Uncertain'},
+    {'confidence': None},
+    {'confidence': 0.5},
+    {'sources': ('https://bbc.co.uk/a', 'https://www.bbc.co.uk/b')},
+])
+def test_verdicts_need_confidence_and_independent_sources_to_skip_review(kwargs):
+    assert confident_reason(verdict(**kwargs)) is None
+
+
+def test_confident_well_sourced_verdicts_skip_review():
+    assert confident_reason(verdict()) == 'confidence 0.95 with 2 independent sources'
+    assert skip_review_reason(verdict(), improved=False) == confident_reason(verdict())
+
+
+def test_reviewed_verdicts_are_not_reviewed_again():
+    assert skip_review_reason(verdict(confidence=None), improved=True) == 'already reviewed'
+
+
+def test_every_verdict_is_reviewed_without_adaptive_review(monkeypatch):
+    monkeypatch.setattr(review_policy, 'ADAPTIVE_REVIEW', False)
+
+    assert skip_review_reason(verdict(), improved=True) is None
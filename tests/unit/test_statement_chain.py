@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from chains import statement_chain
+from chains.statement_chain import _Deduplicator, claim_markers
+
+
+pytestmark = pytest.mark.usefixtures('word_tokens')
+
+
+class ScriptedChain:
+    """Streams a fixed completion per article in small chunks, as the LLM would."""
+
+    def __init__(self, completions: dict, chunk: int = 7):
+        self.completions = completions
+        self.chunk = chunk
+
+    async def astream(self, article: str):
+        text = self.completions[article]
+        for i in range(0, len(text), self.chunk):
+            await asyncio.sleep(0)
+            yield text[i:i + self.chunk]
+
+
+def test_claim_markers_are_numbers_and_negation():
+    assert claim_markers('Inflation rose to 4.1% in 2,024.') == (frozenset({'4.1', '2024'}), False)
+    assert claim_markers("The bank didn't raise rates.")[1]
+    assert not claim_markers('It is not true that rates did not rise.')[1]
+
+
+def test_deduplicator_drops_repeats_and_near_duplicates_only():
+    seen = _Deduplicator(similarity=0.8)
+
+    assert seen.is_new('The Federal Reserve raised rates by 0.25 points in March.')
+    assert not seen.is_new('the federal reserve  raised rates by 0.25 points in March.')
+    assert not seen.is_new('In March the Federal Reserve raised rates by 0.25 points.')
+    assert seen.is_new('The Federal Reserve raised rates by 0.5 points in March.')
+    assert seen.is_new('The Federal Reserve did not raise rates by 0.25 points in March.')
+
+
+@pytest.mark.asyncio
+async def test_statements_stream_line_by_line_without_blanks_or_repeats(monkeypatch):
+    completion = 'Rates rose in March.\n\n  Unemployment fell to 3.9%.  \nRates rose in March.\nGDP grew.'
+    monkeypatch.setattr(statement_chain, 'chain', ScriptedChain({'article': completion}))
+
+    statements = statement_chain.stream_statements('article')
+
+    assert await statements.__anext__() == 'Rates rose in March.'
+    assert [st async for st in statements] == ['Unemployment fell to 3.9%.', 'GDP grew.']
+
+
+def paragraphs(n: int, words: int = 10) -> str:
+    return '\n\n'.join(' '.join(f'p{i}w{j}' for j in range(words)) + '.' for i in range(n))
+
+
+def test_short_articles_are_one_window():
+    assert statement_chain.split_article(paragraphs(3), max_tokens=100) == [paragraphs(3)]
+    assert statement_chain.split_article(paragraphs(30), max_tokens=0) == [paragraphs(30)]
+
+
+def test_long_articles_split_on_paragraphs_with_overlap():
+    windows = statement_chain.split_article(paragraphs(10), max_tokens=30, overlap_tokens=10)
+
+    assert len(windows) > 1
+    assert all(len(window.split()) <= 30 for window in windows)
+    for before, after in zip(windows, windows[1:]):
+        assert after.split('\n\n')[0] == before.split('\n\n')[-1]
+    assert all(f'p{i}w0' in ' '.join(windows) for i in range(10))
+
+
+@pytest.mark.asyncio
+async def test_windows_are_yielded_in_order_without_the_overlap_repeated(monkeypatch):
+    article = paragraphs(6)
+    windows = statement_chain.split_article(article, max_tokens=30)
+    monkeypatch.setattr(statement_chain, 'split_article', lambda text: windows)
+    # The overlap makes each window's last statement reappear as the next one's first
+    completions = {window: f'Statement {i}.\nStatement {i + 1}.' for i, window in enumerate(windows)}
+    monkeypatch.setattr(statement_chain, 'chain', ScriptedChain(completions))
+
+    statements = await statement_chain.get_statements(article)
+
+    assert statements == [f'Statement {i}.' for i in range(len(windows) + 1)]
+
+
+def test_estimate_prices_extraction_and_the_most_checks_may_cost():
+    estimate = statement_chain.estimate_extraction(paragraphs(14), budget='bulk')
+
+    assert estimate.article_tokens == 140
+    assert estimate.statements == 2
+    assert estimate.windows == 1
+    assert estimate.check_cost_usd_max == pytest.approx(2 * statement_chain.BUDGETS['bulk'].max_cost_usd)
+    assert estimate.total_cost_usd_max == pytest.approx(estimate.extraction_cost_usd + estimate.check_cost_usd_max,
+                                                        abs=1e-4)
+
+
+def test_overlap_shrinks_to_keep_windows_within_the_token_limit():
+    article = '\n\n'.join([paragraphs(1, words=10), paragraphs(1, words=28), paragraphs(1, words=10)])
+
+    windows = statement_chain.split_article(article, max_tokens=30, overlap_tokens=10)
+
+    assert len(windows) == 3
+    assert all(len(window.split()) <= 30 for window in windows)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+
+from agents import statement_checker
+from chains.adjudicator_chain import Verdict
+from chains.budget import Budget, BudgetTracker, budget_config, get_tracker
+
+
+@pytest.mark.parametrize('node', ['supervisor_agent', 'judge', 'review', 'follow_up_research'])
+def test_graph_nodes_are_coroutines(node):
+    assert asyncio.iscoroutinefunction(getattr(statement_checker, node))
+
+
+@pytest.mark.asyncio
+async def test_checks_share_the_event_loop(stub_checker):
+    stub_checker(latency=0.05)
+    await statement_checker.multi_agent_fact_check.ainvoke({'statement': 'Warm-up'})  # Imports, compiled schemas
+
+    start = time.perf_counter()
+    await statement_checker.multi_agent_fact_check.ainvoke({'statement': 'Statement 0'})
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verdicts = await asyncio.gather(*[
+        statement_checker.multi_agent_fact_check.ainvoke({'statement': f'Statement {i}'}) for i in range(10)])
+    together = time.perf_counter() - start
+
+    assert all(isinstance(verdict, Verdict) for verdict in verdicts)
+    # Ten checks awaiting their I/O take a few times as long as one at most, not ten times as long
+    assert together < 5 * single
+
+
+def test_route_supervisor_sends_every_search_to_its_node():
+    calls = [{'name': name, 'args': {'query': 'q'}, 'id': f'call_{i}'}
+             for i, name in enumerate(['search_wikipedia', 'search_web'])]
+    state = {'next': 'research', 'statement': 'S', 'messages': [AIMessage(content='', tool_calls=calls)]}
+
+    sends = statement_checker.route_supervisor(state)
+
+    assert [send.node for send in sends] == ['wikipedia', 'web']
+    assert [[call['id'] for call in send.arg['messages'][0].tool_calls] for send in sends] == [['call_0'], ['call_1']]
+    assert statement_checker.route_supervisor({**state, 'next': 'JudgeStatement'}) == 'JudgeStatement'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('one_tool_per_turn, hops', [(False, 2), (True, 4)])
+async def test_searches_asked_for_together_take_one_supervisor_turn(stub_checker, one_tool_per_turn, hops):
+    stub_checker(sources=3, one_tool_per_turn=one_tool_per_turn)
+
+    state = await statement_checker.agent_graph.ainvoke(statement_checker.initial_state('Statement 0'))
+
+    searched = [msg.name for msg in state['messages'] if isinstance(msg, ToolMessage) and msg.name != 'review']
+    assert sorted(searched) == ['search_arxiv', 'search_web', 'search_wikipedia']
+    assert state['hops'] == hops
+
+
+def research(*sources: str) -> list:
+    return [ToolMessage(content='', name='search_web', tool_call_id=f'call_{i}',
+                        artifact=[{'id': f'web:{i}', 'title': 'T', 'source': source}])
+            for i, source in enumerate(sources)]
+
+
+def test_judgement_is_speculated_only_when_judging_is_likely_next():
+    low = BudgetTracker(Budget(max_hops=2, max_tokens=1000, deadline_seconds=60, max_cost_usd=1.0))
+
+    assert statement_checker._speculation_reason([], low, hops=1) is None
+    assert statement_checker._speculation_reason(research('https://bbc.co.uk/a'), None, hops=0) is None
+    assert statement_checker._speculation_reason(research('https://bbc.co.uk/a'), low, hops=1) \
+        == 'budget running low (1 of 2 research turns)'
+    assert statement_checker._speculation_reason(research('https://bbc.co.uk/a', 'https://reuters.com/b'), None, 0) \
+        == 'research from 2 independent sources'
+
+
+@pytest.mark.asyncio
+async def test_speculative_judgements_are_recorded_in_the_budget(stub_checker):
+    stub_checker(sources=3, one_tool_per_turn=True)
+    config = budget_config('interactive')
+
+    await statement_checker.agent_graph.ainvoke(statement_checker.initial_state('Statement 0'), config)
+
+    usage = get_tracker(config).usage()
+    assert usage['speculations'] >= 1
+    assert usage['discarded_speculations'] <= usage['speculations']
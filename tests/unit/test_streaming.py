@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import pytest
+
+from agents import statement_checker
+from streaming import ArticleEvents, sse_comment, sse_event
+
+
+def test_sse_event_is_one_text_event_stream_frame():
+    frame = sse_event('verdict', {'verdict': 'True'})
+
+    assert frame == 'event: verdict\ndata: {"verdict": "True"}\n\n'
+    assert sse_comment().startswith(':')
+
+
+@pytest.mark.asyncio
+async def test_article_events_reach_every_subscriber_until_they_leave():
+    events = ArticleEvents(maxsize=1)
+    first, second = events.subscribe(1), events.subscribe(1)
+
+    events.publish(1, 'statement', {'id': 7})
+    events.publish(1, 'statement', {'id': 8})  # Dropped: the queues are full
+    events.publish(2, 'statement', {'id': 9})
+
+    assert await asyncio.wait_for(first.get(), 1) == ('statement', {'id': 7})
+    assert second.get_nowait() == ('statement', {'id': 7})
+    assert first.empty()
+
+    events.unsubscribe(1, first)
+    events.unsubscribe(1, second)
+    events.publish(1, 'done')
+    assert first.empty() and second.empty()
+
+
+@pytest.mark.asyncio
+async def test_stream_fact_check_reports_research_before_the_verdict(stub_checker):
+    stub_checker(sources=2)
+
+    events = [(event, data) async for event, data in statement_checker.stream_fact_check('Statement 0')]
+    names = [event for event, _ in events]
+
+    assert names[-1] == 'verdict'
+    assert events[-1][1]['verdict'] == 'True'
+    assert names.index('tool') < names.index('sources') < names.index('draft') < names.index('verdict')
+    assert sorted(data['tool'] for event, data in events if event == 'sources') == ['search_arxiv', 'search_wikipedia']
+    json.dumps(events)  # Every payload can be sent as an SSE frame
@@ -0,0 +1,8 @@
+from chains import tavily_chain
+
+
+def test_web_checks_reuse_one_chain_per_set_of_excluded_domains():
+    chain = tavily_chain._web_check_chain(('a.com', 'b.com'))
+
+    assert tavily_chain._web_check_chain(('a.com', 'b.com')) is chain
+    assert tavily_chain._web_check_chain(()) is not chain
@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import verdict_cache
+from config import settings
+from models import Statement
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """Deterministic stand-in for the embedding model. Digits are ignored, so statements differing only in
+    a number embed identically, as they nearly do with the real model."""
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(64)
+        for word in verdict_cache.normalize_statement(text).split():
+            if not any(c.isdigit() for c in word):
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@pytest.fixture(autouse=True)
+def offline_cache(monkeypatch):
+    monkeypatch.setattr(verdict_cache, 'embeddings', BagOfWordsEmbeddings())
+    monkeypatch.setattr(verdict_cache, '_embedding_cache', verdict_cache._EmbeddingCache())
+    monkeypatch.setattr(verdict_cache, '_index', verdict_cache._NearDuplicateIndex())
+
+
+async def save_checked(db, content: str, verdict: str = 'True', checked_at=None, created_at=None,
+                       budget_limited=None) -> Statement:
+    statement = Statement(content=content, content_hash=verdict_cache.statement_hash(content), verdict=verdict,
+                          explanation='Because.', status='checked', checked_at=checked_at,
+                          created_at=created_at or datetime.utcnow(), budget_limited=budget_limited)
+    db.add(statement)
+    await db.commit()
+    await db.refresh(statement)
+    await verdict_cache.index_statements([statement])
+    return statement
+
+
+def days_ago(days: float) -> datetime:
+    return datetime.utcnow() - timedelta(days=days)
+
+
+@pytest.mark.asyncio
+async def test_exact_match_is_reused_while_fresh(test_db):
+    stored = await save_checked(test_db, 'The Federal Reserve raised rates in 2023.', checked_at=days_ago(1))
+
+    cached = await verdict_cache.lookup_verdict('the federal reserve raised rates in 2023')
+
+    assert cached.match == 'exact'
+    assert cached.statement_id == stored.id
+    assert cached.verdict.verdict == 'True'
+    assert cached.verdict.checked_at == stored.checked_at
+
+
+@pytest.mark.asyncio
+async def test_stale_verdict_is_not_reused(test_db):
+    await save_checked(test_db, 'The Federal Reserve raised rates in 2023.',
+                       checked_at=days_ago(settings.VERDICT_CACHE_MAX_AGE_DAYS + 1))
+
+    assert await verdict_cache.lookup_verdict('The Federal Reserve raised rates in 2023.') is None
+
+
+@pytest.mark.asyncio
+async def test_uncertain_verdict_expires_sooner(test_db):
+    await save_checked(test_db, 'The Federal Reserve raised rates in 2023.', verdict='Uncertain',
+                       checked_at=days_ago(settings.VERDICT_CACHE_UNCERTAIN_MAX_AGE_DAYS + 1))
+
+    assert await verdict_cache.lookup_verdict('The Federal Reserve raised rates in 2023.') is None
+
+
+@pytest.mark.asyncio
+async def test_reusing_a_verdict_does_not_restart_its_freshness(test_db):
+    checked_at = days_ago(settings.VERDICT_CACHE_MAX_AGE_DAYS - 1)
+    original = await save_checked(test_db, 'The Federal Reserve raised rates in 2023.', checked_at=checked_at)
+    cached = await verdict_cache.lookup_verdict('The Federal Reserve raised rates in 2023.')
+    assert cached.statement_id == original.id
+    # Stored again by a job that reused it today, carrying the original check time
+    await save_checked(test_db, 'The Federal Reserve raised rates in 2023.', checked_at=cached.verdict.checked_at)
+
+    later = datetime.utcnow() + timedelta(days=2)
+    assert not verdict_cache.is_fresh('True', cached.verdict.checked_at, now=later)
+    copy = await verdict_cache.lookup_verdict('The Federal Reserve raised rates in 2023.')
+    assert copy.checked_at == checked_at
+
+
+@pytest.mark.asyncio
+async def test_rows_without_checked_at_fall_back_to_created_at(test_db):
+    await save_checked(test_db, 'The Federal Reserve raised rates in 2023.',
+                       created_at=days_ago(settings.VERDICT_CACHE_MAX_AGE_DAYS + 1))
+
+    assert await verdict_cache.lookup_verdict('The Federal Reserve raised rates in 2023.') is None
+
+
+@pytest.mark.asyncio
+async def test_budget_limited_verdict_is_not_reused(test_db):
+    await save_checked(test_db, 'Unemployment rose to 4.1% in the United States.', checked_at=days_ago(1),
+                       budget_limited='6 research turns')
+
+    assert await verdict_cache.lookup_verdict('Unemployment rose to 4.1% in the United States.') is None
+    assert await verdict_cache.lookup_verdict('In the United States, unemployment rose to 4.1%.') is None
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_is_reused(test_db):
+    stored = await save_checked(test_db, 'Unemployment rose to 4.1% in the United States.', checked_at=days_ago(1))
+
+    cached = await verdict_cache.lookup_verdict('In the United States, unemployment rose to 4.1%.')
+
+    assert cached.match == 'similar'
+    assert cached.statement_id == stored.id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('statement', [
+    'Unemployment rose to 5.1% in the United States.',
+    'Unemployment did not rise to 4.1% in the United States.',
+])
+async def test_near_duplicate_with_other_numbers_or_polarity_is_not_reused(test_db, statement):
+    await save_checked(test_db, 'Unemployment rose to 4.1% in the United States.', checked_at=days_ago(1))
+
+    assert await verdict_cache.lookup_verdict(statement) is None
@@ -0,0 +1,96 @@
+import bz2
+import json
+
+from typing import List
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+
+from chains import wiki_index
+from chains.wiki_index import LocalWikipediaRetriever, WikipediaIndex, build_index, clean_wikitext, read_dump
+
+
+ARTICLES = [
+    ('Federal Reserve', 'The Federal Reserve is the central bank of the United States. It sets interest rates.\n'
+                        '== History ==\nIt was created in 1913. ' * 3),
+    ('Bank of England', 'The Bank of England is the central bank of the United Kingdom, founded in 1694. ' * 3),
+    ('Paris', 'Paris is the capital and largest city of France, on the river Seine. ' * 4),
+    ('Stub', 'Too short.'),
+]
+
+XML_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">
+  <page><title>Paris</title><ns>0</ns><revision><text>'''Paris''' is the [[capital city|capital]] of
+  [[France]].{{Infobox city|name=Paris}}<ref>A source</ref></text></revision></page>
+  <page><title>Talk:Paris</title><ns>1</ns><revision><text>Discussion</text></revision></page>
+  <page><title>Paname</title><ns>0</ns><redirect title="Paris" /><revision><text>#REDIRECT [[Paris]]</text></revision></page>
+</mediawiki>"""
+
+
+class LiveRetriever(BaseRetriever):
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [Document(page_content='live', metadata={'title': query})]
+
+
+@pytest.fixture
+def index(tmp_path) -> WikipediaIndex:
+    meta = build_index(ARTICLES, str(tmp_path / 'wiki_index'))
+    assert meta['documents'] == 3  # The stub isn't indexed
+    return WikipediaIndex(str(tmp_path / 'wiki_index'))
+
+
+def test_build_and_search_round_trip(index):
+    results = index.search('central bank of the United Kingdom')
+
+    doc = index.document(results[0][0])
+    assert doc.metadata == {'title': 'Bank of England', 'summary': ARTICLES[1][1].strip(),
+                            'source': 'https://en.wikipedia.org/wiki/Bank_of_England'}
+    assert results[0][2] == 1.0
+    assert [score for _, score, _ in results] == sorted((score for _, score, _ in results), reverse=True)
+    assert index.search('zebra') == []
+
+
+def test_documents_keep_the_lead_section_as_summary(index):
+    doc_id = index.search('Federal Reserve')[0][0]
+
+    assert index.document(doc_id).metadata['summary'] == ARTICLES[0][1].split('\n==')[0]
+    assert len(index.document(doc_id, chars=20).page_content) == 20
+
+
+def test_rebuilding_replaces_the_index(tmp_path):
+    out = str(tmp_path / 'wiki_index')
+    build_index(ARTICLES, out)
+    build_index(ARTICLES[2:], out)
+
+    assert WikipediaIndex(out).size == 1
+
+
+def test_xml_dumps_yield_cleaned_main_namespace_articles(tmp_path):
+    path = tmp_path / 'dump.xml.bz2'
+    path.write_bytes(bz2.compress(XML_DUMP.encode()))
+
+    assert list(read_dump(str(path))) == [('Paris', 'Paris is the capital of\n  France.')]
+
+
+def test_json_lines_dumps(tmp_path):
+    path = tmp_path / 'dump.jsonl'
+    path.write_text('\n'.join(json.dumps({'title': t, 'text': text}) for t, text in ARTICLES[:2]) + '\n\n')
+
+    assert [title for title, _ in read_dump(str(path))] == ['Federal Reserve', 'Bank of England']
+
+
+def test_clean_wikitext_unwraps_links_and_drops_markup():
+    assert clean_wikitext("[[File:x.jpg|thumb|[[a]]]]''Rates'' [[rose|went up]] {{cite|{{x}}}} [https://a.org today]") \
+        == 'Rates went up  today'
+
+
+@pytest.mark.asyncio
+async def test_retriever_answers_hits_locally_and_misses_from_the_live_api(index, monkeypatch):
+    monkeypatch.setattr(wiki_index, 'wiki_index_stats', wiki_index.LocalIndexStats('test'))
+    retriever = LocalWikipediaRetriever(index=index, fallback=LiveRetriever(), top_k_results=1)
+
+    assert (await retriever.ainvoke('Paris capital of France'))[0].metadata['title'] == 'Paris'
+    assert (await retriever.ainvoke('Paris Olympics medals'))[0].page_content == 'live'
+    assert wiki_index.wiki_index_stats.stats()['local_hits'] == 1
+    assert wiki_index.wiki_index_stats.stats()['live_fallbacks'] == 1
@@ -0,0 +1,67 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from chains import worthiness_chain
+from chains.worthiness_chain import StatementWorthiness, WorthinessBatcher, worthiness
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    """Stand-in for the scoring call: records each batch and scores statements by length."""
+    batches = []
+
+    async def score_statements(statements: List[str]):
+        batches.append(statements)
+        await asyncio.sleep(0.01)
+        if 'fail' in statements:
+            raise RuntimeError('model unavailable')
+        return [len(statement) / 10 for statement in statements]
+
+    monkeypatch.setattr(worthiness_chain, 'score_statements', score_statements)
+    return batches
+
+
+def test_opinions_score_zero_and_claims_their_scaled_mean():
+    assert worthiness(StatementWorthiness(index=1, objective_truth=False, verifiable=10, significant=10)) == 0
+    assert worthiness(StatementWorthiness(index=1, objective_truth=True, verifiable=8, significant=5)) == 0.65
+
+
+@pytest.mark.asyncio
+async def test_statements_submitted_together_are_scored_in_one_call(scorer):
+    batcher = WorthinessBatcher()
+
+    scores = await asyncio.gather(*[batcher.score(statement) for statement in ['a', 'bb', 'ccc']])
+
+    assert scores == [0.1, 0.2, 0.3]
+    assert scorer == [['a', 'bb', 'ccc']]
+
+
+@pytest.mark.asyncio
+async def test_statements_arriving_during_a_call_go_in_the_next_batch(scorer):
+    batcher = WorthinessBatcher()
+
+    first = asyncio.create_task(batcher.score('a'))
+    await asyncio.sleep(0)
+    later = [asyncio.create_task(batcher.score(statement)) for statement in ['bb', 'ccc']]
+    await asyncio.gather(first, *later)
+
+    assert scorer == [['a'], ['bb', 'ccc']]
+    assert batcher.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_full_batches_are_scored_straight_away(scorer):
+    batcher = WorthinessBatcher(batch_size=2)
+
+    await asyncio.gather(*[batcher.score(statement) for statement in ['a', 'b', 'c']])
+
+    assert scorer == [['a', 'b'], ['c']]
+
+
+@pytest.mark.asyncio
+async def test_statements_are_checked_anyway_when_scoring_fails(scorer):
+    batcher = WorthinessBatcher()
+
+    assert await asyncio.gather(batcher.score('fail'), batcher.score('ok')) == [None, None]
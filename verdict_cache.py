@@ -0,0 +1,218 @@
+"""Reuse verdicts for statements we've already checked.
+
+Before a statement goes through the multi-agent checker we look for a stored
+Statement with the same normalized content (sha256 `content_hash`), then for a
+near-duplicate by embedding similarity with the same numbers and polarity
+(`claim_markers`), since "rose to 4.1%" and "rose to 5.1%" embed almost
+identically but aren't the same claim. A match is only reused while it is
+fresh: `Uncertain` verdicts expire sooner than settled ones, since new
+evidence is more likely to change them. Freshness runs from when a verdict
+was reached (`checked_at`), which a reused verdict carries over, so reusing
+a verdict doesn't extend its life. Verdicts judged after the check's budget
+cut research short (`budget_limited`) are never reused.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import desc, func
+from sqlalchemy.future import select
+
+from chains.adjudicator_chain import Verdict
+from chains.llms import get_embeddings
+from chains.statement_chain import claim_markers
+from config import settings
+from database import get_session_context, logger
+from models import Statement, StatementEmbedding
+
+EMBEDDING_MODEL = 'text-embedding-3-small'
+INDEX_REFRESH_SECONDS = 300
+
+embeddings = get_embeddings(EMBEDDING_MODEL)
+
+
+class VerdictLookup(BaseModel):
+    verdict: Verdict
+    statement_id: int
+    match: str  # 'exact' or 'similar'
+    similarity: float
+    checked_at: datetime
+
+
+def normalize_statement(statement: str) -> str:
+    statement = unicodedata.normalize('NFKC', statement).casefold()
+    statement = re.sub(r'[^\w\s%$.-]', ' ', statement)
+    return re.sub(r'\s+', ' ', statement).strip(' .')
+
+
+def statement_hash(statement: str) -> str:
+    return hashlib.sha256(normalize_statement(statement).encode()).hexdigest()
+
+
+def is_fresh(verdict: Optional[str], checked_at: datetime, now: Optional[datetime] = None) -> bool:
+    now = now or datetime.utcnow()
+    max_age_days = (settings.VERDICT_CACHE_UNCERTAIN_MAX_AGE_DAYS if verdict == 'Uncertain'
+                    else settings.VERDICT_CACHE_MAX_AGE_DAYS)
+    return checked_at >= now - timedelta(days=max_age_days)
+
+
+def checked_time(statement: Statement) -> datetime:
+    """When the statement's verdict was reached; rows from before `checked_at` was recorded fall back to creation."""
+    return statement.checked_at or statement.created_at
+
+
+# The same, in SQL
+_checked_time = func.coalesce(Statement.checked_at, Statement.created_at)
+
+
+def to_verdict(statement: Statement) -> Verdict:
+    references = [{key: ref.get(key) for key in ('title', 'source', 'summary')} for ref in statement.references or []]
+    return Verdict(verdict=statement.verdict, explanation=statement.explanation or '', references=references,
+                   checked_at=checked_time(statement))
+
+
+class _EmbeddingCache:
+    """Small LRU so a statement looked up and then stored is only embedded once."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._items: OrderedDict[str, List[float]] = OrderedDict()
+
+    async def embed(self, statements: List[str]) -> List[List[float]]:
+        keys = [statement_hash(st) for st in statements]
+        missing = {key: st for key, st in zip(keys, statements) if key not in self._items}
+        if missing:
+            vectors = await embeddings.aembed_documents(list(missing.values()))
+            for key, vector in zip(missing.keys(), vectors):
+                self._items[key] = vector
+        for key in keys:
+            self._items.move_to_end(key)
+        result = [self._items[key] for key in keys]
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return result
+
+
+class _NearDuplicateIndex:
+    """In-memory matrix of recent statement embeddings, reloaded from the database periodically."""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.checked_at: List[datetime] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.loaded_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force: bool = False) -> None:
+        async with self._lock:
+            now = datetime.utcnow()
+            if not force and self.loaded_at and (now - self.loaded_at).total_seconds() < INDEX_REFRESH_SECONDS:
+                return
+            window = now - timedelta(days=settings.VERDICT_CACHE_MAX_AGE_DAYS)
+            async with get_session_context() as session:
+                result = await session.execute(
+                    select(StatementEmbedding.statement_id, StatementEmbedding.embedding,
+                           _checked_time.label('checked_at'))
+                    .join(Statement, Statement.id == StatementEmbedding.statement_id)
+                    .where(Statement.verdict.is_not(None), _checked_time >= window)
+                    .order_by(desc(_checked_time))
+                    .limit(settings.VERDICT_CACHE_SCAN_LIMIT)
+                )
+                rows = result.all()
+            self.ids = [row.statement_id for row in rows]
+            self.checked_at = [row.checked_at for row in rows]
+            self.matrix = _unit(np.array([json.loads(row.embedding) for row in rows], dtype=np.float32))
+            self.loaded_at = now
+
+    def add(self, statement_ids: List[int], vectors: List[List[float]], checked_at: List[datetime]) -> None:
+        if not statement_ids or self.loaded_at is None:
+            return
+        new = _unit(np.array(vectors, dtype=np.float32))
+        self.matrix = new if self.matrix.size == 0 else np.vstack([new, self.matrix])
+        self.ids = list(statement_ids) + self.ids
+        self.checked_at = list(checked_at) + self.checked_at
+
+    def search(self, vector: List[float], threshold: float) -> List[Tuple[int, float]]:
+        """Statement ids at or above `threshold` cosine similarity, best first."""
+        if self.matrix.size == 0:
+            return []
+        scores = self.matrix @ _unit(np.array([vector], dtype=np.float32))[0]
+        order = np.argsort(-scores)
+        return [(self.ids[i], float(scores[i])) for i in order if scores[i] >= threshold][:10]
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+_embedding_cache = _EmbeddingCache()
+_index = _NearDuplicateIndex()
+
+
+async def lookup_verdict(statement: str, similarity: Optional[float] = None) -> Optional[VerdictLookup]:
+    """Find a fresh stored verdict for `statement`: exact normalized match first, then nearest neighbour.
+
+    Lookup failures are logged and treated as a miss, so the statement is simply checked again.
+    """
+    try:
+        return await _lookup_verdict(statement, similarity)
+    except Exception as e:
+        logger.error(f"Error looking up stored verdict: {e}")
+        return None
+
+
+async def _lookup_verdict(statement: str, similarity: Optional[float]) -> Optional[VerdictLookup]:
+    content_hash = statement_hash(statement)
+    async with get_session_context() as session:
+        result = await session.execute(
+            select(Statement)
+            .where(Statement.content_hash == content_hash, Statement.verdict.is_not(None),
+                   Statement.budget_limited.is_(None))
+            .order_by(desc(_checked_time))
+            .limit(1)
+        )
+        exact = result.scalars().first()
+    if exact and is_fresh(exact.verdict, checked_time(exact)):
+        return VerdictLookup(verdict=to_verdict(exact), statement_id=exact.id, match='exact',
+                             similarity=1.0, checked_at=checked_time(exact))
+
+    threshold = similarity or settings.VERDICT_CACHE_SIMILARITY
+    await _index.refresh()
+    vector = (await _embedding_cache.embed([statement]))[0]
+    markers = claim_markers(statement)
+    for statement_id, score in _index.search(vector, threshold):
+        async with get_session_context() as session:
+            candidate = await session.get(Statement, statement_id)
+        if (candidate and candidate.verdict and not candidate.budget_limited
+                and is_fresh(candidate.verdict, checked_time(candidate))
+                and claim_markers(candidate.content) == markers):
+            return VerdictLookup(verdict=to_verdict(candidate), statement_id=candidate.id, match='similar',
+                                 similarity=score, checked_at=checked_time(candidate))
+    return None
+
+
+async def index_statements(statements: List[Statement]) -> None:
+    """Store embeddings for newly saved statements so later near-duplicates can reuse their verdicts."""
+    statements = [st for st in statements if st.id is not None and st.verdict and not st.budget_limited]
+    if not statements:
+        return
+    try:
+        vectors = await _embedding_cache.embed([st.content for st in statements])
+        async with get_session_context() as session:
+            session.add_all([
+                StatementEmbedding(statement_id=st.id, model=EMBEDDING_MODEL, embedding=json.dumps(vector))
+                for st, vector in zip(statements, vectors)
+            ])
+        _index.add([st.id for st in statements], vectors, [checked_time(st) for st in statements])
+    except Exception as e:
+        logger.error(f"Error indexing statement embeddings: {e}")